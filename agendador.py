@@ -0,0 +1,105 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import diagnostico
+
+# ==============================================================================
+# 🧵 AGENDADOR DE ATUALIZAÇÕES (fora da thread do Tk)
+# ==============================================================================
+# `calcular` roda num pool de threads e não toca em widgets; `aplicar(resultado)`
+# roda na thread do Tk. Pedidos repetidos da mesma chave são fundidos e
+# cancelar(chave) descarta o que ainda não foi exibido.
+INTERVALO_MS = 30
+
+
+class Aba:
+    # Base das abas: carregar() no pool (sem widgets), exibir(dados) no Tk.
+    # A chave no agendador (e no diagnóstico) é o nome da classe sem "Frame"
+    @property
+    def chave(self):
+        return type(self).__name__.replace("Frame", "")
+
+    def carregar(self):
+        return None
+
+    def exibir(self, dados):
+        pass
+
+    def recarregar(self):
+        # Pelo agendador, com a chave da aba no app
+        self.master.recarregar(self.chave)
+
+    @diagnostico.cronometrado(".atualizar")
+    def atualizar(self):
+        # Direto na thread do Tk, logo depois de uma escrita da própria aba
+        self.exibir(self.carregar())
+
+
+class Agendador:
+    def __init__(self, raiz, workers=2):
+        self.raiz = raiz
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="atualizacao")
+        self._resultados = queue.Queue()
+        self._geracao = {}
+        self._rodando = {}
+        self._pendente = {}
+        self._drenando = False
+        self._ativo = True
+
+    def agendar(self, chave, calcular, aplicar, ao_falhar=None):
+        if not self._ativo: return
+        if chave in self._rodando:
+            self._pendente[chave] = (calcular, aplicar, ao_falhar)
+            return
+        geracao = self._geracao.get(chave, 0) + 1
+        self._geracao[chave] = geracao
+        self._rodando[chave] = self._pool.submit(self._executar, chave, geracao, calcular, aplicar, ao_falhar)
+        self._vigiar()
+
+    def _executar(self, chave, geracao, calcular, aplicar, ao_falhar):
+        try:
+            resultado = diagnostico.medido(f"{chave}.carregar", calcular)()
+            self._resultados.put((chave, geracao, aplicar, ao_falhar, resultado, None))
+        except Exception as e:
+            self._resultados.put((chave, geracao, aplicar, ao_falhar, None, e))
+
+    def cancelar(self, chave):
+        self._pendente.pop(chave, None)
+        self._geracao[chave] = self._geracao.get(chave, 0) + 1
+        fut = self._rodando.get(chave)
+        if fut is not None and fut.cancel(): del self._rodando[chave]
+
+    def cancelar_outros(self, chave):
+        for k in list(self._rodando) + list(self._pendente):
+            if k != chave: self.cancelar(k)
+
+    def ocupado(self, chave=None):
+        return bool(self._rodando) if chave is None else chave in self._rodando
+
+    # --- THREAD DO TK ---
+    def _vigiar(self):
+        if not self._drenando:
+            self._drenando = True
+            self.raiz.after(INTERVALO_MS, self._drenar)
+
+    def _drenar(self):
+        self._drenando = False
+        if not self._ativo: return
+        while True:
+            try: chave, geracao, aplicar, ao_falhar, resultado, erro = self._resultados.get_nowait()
+            except queue.Empty: break
+            self._rodando.pop(chave, None)
+            try:
+                if geracao != self._geracao.get(chave): pass
+                elif erro is None:
+                    with diagnostico.medir(f"{chave}.exibir"): aplicar(resultado)
+                    with diagnostico.medir(f"{chave}.layout"): self.raiz.update_idletasks()
+                elif ao_falhar: ao_falhar(erro)
+            finally:
+                pendente = self._pendente.pop(chave, None)
+                if pendente: self.agendar(chave, *pendente)
+        if self._rodando: self._vigiar()
+
+    def encerrar(self):
+        self._ativo = False
+        self._pool.shutdown(wait=False, cancel_futures=True)
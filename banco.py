@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import diagnostico
+
+# ==============================================================================
+# 🗄️ CAMADA DE ACESSO A DADOS (conexões de longa duração)
+# ==============================================================================
+# Uma conexão por thread, mantida até o fechamento do app e cronometrada
+# pela aba Diagnóstico.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+CACHE_STATEMENTS = 256
+
+# Caches guardados por conexão (nucleo.resumo_cota, lupa.indice) se registram aqui
+# e esquecem a conexão quando fechar() a encerra
+_ao_fechar = []
+
+def ao_fechar(func):
+    _ao_fechar.append(func)
+    return func
+
+
+class Banco:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._conexoes = []
+        self._lock = threading.Lock()
+
+    # --- CONEXÃO ---
+    def conexao(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, isolation_level=None, check_same_thread=False,
+                                   cached_statements=CACHE_STATEMENTS, factory=diagnostico.fabrica_conexao())
+            for p in PRAGMAS: conn.execute(p)
+            self._local.conn = conn
+            self._local.nivel = 0
+            with self._lock: self._conexoes.append(conn)
+        return conn
+
+    def fechar(self):
+        with self._lock:
+            conexoes, self._conexoes = self._conexoes, []
+        for conn in conexoes:
+            for esquecer in _ao_fechar: esquecer(conn)
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error: pass
+        self._local = threading.local()
+
+    # --- TRANSAÇÕES ---
+    # A mais externa faz BEGIN IMMEDIATE/COMMIT; as internas viram SAVEPOINTs
+    @contextmanager
+    def transacao(self):
+        conn = self.conexao()
+        nivel = self._local.nivel
+        sp = f"sp_{nivel}"
+        conn.execute("BEGIN IMMEDIATE" if nivel == 0 else f"SAVEPOINT {sp}")
+        self._local.nivel = nivel + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.nivel = nivel
+            if nivel == 0: conn.execute("ROLLBACK")
+            else: conn.execute(f"ROLLBACK TO {sp}"); conn.execute(f"RELEASE {sp}")
+            raise
+        self._local.nivel = nivel
+        conn.execute("COMMIT" if nivel == 0 else f"RELEASE {sp}")
+
+    def em_transacao(self):
+        return getattr(self._local, "nivel", 0) > 0
+
+    # --- CONSULTAS ---
+    def consultar(self, sql, params=()):
+        return self.conexao().execute(sql, params).fetchall()
+
+    def linha(self, sql, params=()):
+        return self.conexao().execute(sql, params).fetchone()
+
+    def valor(self, sql, params=(), padrao=None):
+        res = self.linha(sql, params)
+        return res[0] if res and res[0] is not None else padrao
+
+    def dataframe(self, sql, params=()):
+        import pandas as pd
+        return pd.read_sql_query(sql, self.conexao(), params=params)
+
+    def executar(self, sql, params=()):
+        with self.transacao() as conn:
+            return conn.execute(sql, params)
+
+    def executar_varios(self, sql, seq):
+        with self.transacao() as conn:
+            return conn.executemany(sql, seq)
+
+    # --- ATALHOS USADOS PELAS TELAS ---
+    def caixa(self):
+        return self.valor("SELECT Qtd FROM ativos WHERE Ticker='CAIXA'", padrao=0.0)
+
+    def garantir_caixa(self):
+        self.executar("INSERT OR IGNORE INTO ativos (Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo) VALUES ('CAIXA', 0, 1, 1, 0, 'Caixa')")
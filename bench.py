@@ -0,0 +1,431 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import migracoes
+import recalculo
+from banco import Banco
+
+# ==============================================================================
+# ⏱️ BENCHMARKS
+# ==============================================================================
+# Uso:  python bench.py replay --linhas 1000000
+#       python bench.py tir --grupos 2000
+#       python bench.py dre --linhas 200000
+#       python bench.py planos [arquivo.db]
+#       python bench.py suite --escala media [--db media.db] [--base tempos.json [--salvar]]
+#       python bench.py boleta --ordens 40
+#       python bench.py extratos --escala media [--formatos xlsx,csv,pdf] [--processos 4]
+
+def gerar_ledger(linhas, chaves, seed=42):
+    rng = np.random.default_rng(seed)
+    chave = rng.integers(0, chaves, linhas)
+    datas = pd.Timestamp("2000-01-01") + pd.to_timedelta(rng.integers(0, 365 * 25, linhas), unit="D")
+    # ~75% aportes, ~20% resgates parciais, ~5% resgates que zeram a posição
+    sorteio = rng.random(linhas)
+    delta = np.where(sorteio < 0.75, rng.uniform(1, 100, linhas), -rng.uniform(1, 60, linhas))
+    delta[sorteio > 0.95] = -1e9
+    return pd.DataFrame({
+        "Cotista": np.char.add("C", chave.astype(str)),
+        "Data": datas.strftime("%Y-%m-%d"),
+        "Ordem": np.arange(linhas),
+        "Delta": delta,
+        "Preco": rng.uniform(0.8, 2.5, linhas),
+    })
+
+def replay_iterrows(df):
+    # Replay original do FrameSumario.atualizar (referência)
+    df = df.sort_values(["Data", "Ordem"], kind="mergesort")
+    posicoes = {}
+    for _, row in df.iterrows():
+        nome = row['Cotista']
+        qtd = row['Delta']
+        ref = row['Preco']
+        if nome not in posicoes: posicoes[nome] = {'Qtd': 0.0, 'PM': 0.0}
+
+        p = posicoes[nome]
+        if qtd > 0: # Compra
+            total_atual = p['Qtd'] * p['PM']
+            novo_total = qtd * ref
+            p['Qtd'] += qtd
+            if p['Qtd'] > 0: p['PM'] = (total_atual + novo_total) / p['Qtd']
+        else: # Venda
+            p['Qtd'] += qtd
+            if p['Qtd'] <= 0: p['Qtd'], p['PM'] = 0, 0
+    return posicoes
+
+def cronometrar(func, *args):
+    t0 = time.perf_counter()
+    res = func(*args)
+    return res, time.perf_counter() - t0
+
+def bench_replay(linhas, chaves):
+    df = gerar_ledger(linhas, chaves)
+    ref, t_loop = cronometrar(replay_iterrows, df)
+    vet, t_vet = cronometrar(recalculo.posicao_final, df, "Cotista")
+
+    erro = 0.0
+    for nome, qtd, pm in vet.itertuples(index=False):
+        r = ref[nome]
+        erro = max(erro, abs(qtd - r['Qtd']) / max(1.0, r['Qtd']), abs(pm - r['PM']) / max(1.0, r['PM']))
+
+    print(f"replay  linhas={linhas:,}  chaves={chaves:,}")
+    print(f"  iterrows   : {t_loop:9.3f} s")
+    print(f"  vetorizado : {t_vet:9.3f} s   ({t_loop / t_vet:,.0f}x)")
+    print(f"  maior erro relativo: {erro:.2e}")
+    return erro
+
+def gerar_fluxos(grupos, fluxos_por_grupo, seed=42):
+    # Aportes negativos ao longo de até 10 anos e um resgate final positivo por grupo
+    rng = np.random.default_rng(seed)
+    n = grupos * fluxos_por_grupo
+    grupo = np.repeat(np.arange(grupos), fluxos_por_grupo)
+    dias = rng.integers(0, 3650, n)
+    dias[::fluxos_por_grupo] = 0
+    valores = -rng.uniform(100, 1000, n)
+    ultimo = np.arange(fluxos_por_grupo - 1, n, fluxos_por_grupo)
+    dias[ultimo] = 3650
+    valores[ultimo] = 0.0
+    # Resgate que faz a TIR do grupo ser exatamente `taxa`
+    taxa = rng.uniform(-0.5, 0.8, grupos)
+    valores[ultimo] = np.bincount(grupo, -valores * (1 + taxa[grupo]) ** ((3650 - dias) / 365.0), grupos)
+    return grupo, dias, valores
+
+def xirr_brentq(grupo, dias, valores, n):
+    # Referência: uma raiz por vez com scipy.optimize.brentq
+    from scipy.optimize import brentq
+    res = np.full(n, np.nan)
+    for g in range(n):
+        m = grupo == g
+        t, v = dias[m] / 365.0, valores[m]
+        try: res[g] = brentq(lambda r: np.sum(v * (1 + r) ** (-t)), -0.9999, 1000.0)
+        except ValueError: pass
+    return res
+
+def bench_tir(grupos, fluxos_por_grupo):
+    import tir
+    grupo, dias, valores = gerar_fluxos(grupos, fluxos_por_grupo)
+    ref, t_loop = cronometrar(xirr_brentq, grupo, dias, valores, grupos)
+    vet, t_vet = cronometrar(tir.xirr_lote, grupo, dias, valores, grupos)
+    erro = float(np.nanmax(np.abs(vet - ref))) if grupos else 0.0
+    nan_divergente = int((np.isnan(vet) != np.isnan(ref)).sum())
+
+    print(f"tir  grupos={grupos:,}  fluxos={len(grupo):,}")
+    print(f"  brentq (um por vez) : {t_loop:9.3f} s")
+    print(f"  lote vetorizado     : {t_vet:9.3f} s   ({t_loop / t_vet:,.0f}x)")
+    print(f"  maior erro absoluto: {erro:.2e}   NaN divergentes: {nan_divergente}")
+    return max(erro, nan_divergente)
+
+def popular_tabelas(db, linhas, seed=42):
+    # Volume suficiente para o ANALYZE refletir tabelas grandes
+    rng = np.random.default_rng(seed)
+    datas = (pd.Timestamp("2000-01-01") + pd.to_timedelta(rng.integers(0, 365 * 25, linhas), unit="D")).strftime("%Y-%m-%d")
+    with db.transacao() as c:
+        c.executemany("INSERT INTO cotistas_mov (Data, Cotista, Tipo, Valor, Cota_Ref, Qtd_Cotas) VALUES (?, ?, 'Aporte (+)', 100, 1, 100)",
+                      [(d, f"C{i % 300}") for i, d in enumerate(datas)])
+        c.executemany("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?, ?, 'COMPRA', 1, 10, 0)",
+                      [(d, f"T{i % 50}") for i, d in enumerate(datas)])
+        c.executemany("INSERT OR IGNORE INTO historico_cota (Data, Valor_Cota) VALUES (?, 1)", [(d,) for d in datas])
+        c.executemany("INSERT OR IGNORE INTO precos_historico (Data, Ticker, Preco) VALUES (?, ?, 10)", [(d, f"T{i % 50}") for i, d in enumerate(datas)])
+        c.execute("ANALYZE")
+
+def bench_dre(linhas):
+    # Relatório mensal do histórico inteiro (25 anos) exportado em xlsx
+    import os, tempfile
+    import dre, posicoes
+    db = Banco(":memory:")
+    migracoes.migrar(db)
+    popular_tabelas(db, linhas)
+    with db.transacao() as c: posicoes.reconstruir_acumulados(c)
+    conn = db.conexao()
+    periodos = dre.meses(conn, fim="2024-12-31")
+    arquivo = os.path.join(tempfile.mkdtemp(), "dre.xlsx")
+    n, t = cronometrar(dre.exportar_xlsx, conn, arquivo, periodos)
+    print(f"dre  trades={linhas:,}  períodos={len(periodos)}  linhas no xlsx={n:,}")
+    print(f"  apuração + exportação: {t:9.3f} s   ({t / len(periodos) * 1000:.1f} ms/período)")
+    db.fechar()
+    return t
+
+def checar_planos(caminho, linhas=50_000):
+    db = Banco(caminho)
+    migracoes.migrar(db)
+    if caminho == ":memory:": popular_tabelas(db, linhas)
+    falhas = migracoes.verificar_planos(db)
+    for sql, detalhes in falhas:
+        print(f"SEM ÍNDICE: {sql}\n    {detalhes}")
+    print(f"planos: {len(migracoes.CONSULTAS_INDEXADAS) - len(falhas)}/{len(migracoes.CONSULTAS_INDEXADAS)} indexados")
+    db.fechar()
+    return falhas
+
+# ==============================================================================
+# 🧪 CARTEIRA SINTÉTICA + SUÍTE COM LIMITES
+# ==============================================================================
+# Banco completo pelas regras do app (nucleo.aplicar_lote); a suíte falha acima
+# do limite da escala ou, com --base, da medição salva + TOLERANCIA.
+ESCALAS = {
+    # cotistas, trades, anos, tickers
+    "pequena": (20, 2_000, 2, 10),
+    "media": (200, 20_000, 10, 30),
+    "grande": (1_000, 100_000, 25, 60),
+}
+# Teto em ms por operação e escala (folga de ~4x sobre uma máquina de referência).
+# snapshot_retroativo regrava todos os snapshots do meio do histórico em diante
+LIMITES_MS = {
+    "pequena": {"cota": 5, "sumario": 100, "snapshot": 20, "snapshot_retroativo": 150, "editor": 20, "grafico": 50, "serie_cota": 150, "lupa": 2},
+    "media": {"cota": 5, "sumario": 600, "snapshot": 20, "snapshot_retroativo": 1000, "editor": 30, "grafico": 100, "serie_cota": 1500, "lupa": 2},
+    "grande": {"cota": 5, "sumario": 2000, "snapshot": 20, "snapshot_retroativo": 6000, "editor": 30, "grafico": 100, "serie_cota": 6500, "lupa": 2},
+}
+TOLERANCIA = 0.5   # +50% sobre a base salva
+PISO_MS = 2.0      # abaixo disso é ruído de medição
+REPETICOES = 5
+
+
+def gerar_carteira(db, cotistas, trades, anos, tickers=20, seed=42):
+    import nucleo, recalculo
+    rng = np.random.default_rng(seed)
+    dias = pd.bdate_range(end="2024-12-31", periods=anos * 252).strftime("%Y-%m-%d").to_numpy()
+    nomes = [f"T{i:03d}" for i in range(tickers)]
+    # Preços em passeio aleatório (log-normal), os mesmos para ordens e fechamentos
+    precos = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (len(dias), tickers)), axis=0))
+
+    # Aportes: um inicial por cotista no primeiro mês e mais ~3 ao longo do período
+    movimentos = [(0, dias[rng.integers(0, 21)], f"Cotista {c:04d}", "Aporte (+)", float(rng.uniform(5e3, 5e4)), "CAIXA")
+                  for c in range(cotistas)]
+    movimentos += [(0, dias[rng.integers(21, len(dias))], f"Cotista {c:04d}", "Aporte (+)", float(rng.uniform(1e3, 1e4)), "CAIXA")
+                   for c in rng.integers(0, cotistas, cotistas * 3)]
+    entradas = pd.Series([m[4] for m in movimentos]).groupby([m[1] for m in movimentos]).sum()
+
+    # Ordens em dias sorteados, só o que o caixa e a posição permitem (o lote é validado de novo em aplicar_lote)
+    caixa, qtd, lista = 0.0, np.zeros(tickers), []
+    dia_ordem = np.sort(rng.integers(21, len(dias), trades))
+    entradas = entradas.reindex(dias, fill_value=0.0).cumsum().to_numpy()
+    ja_entrou = 0.0
+    for d in dia_ordem:
+        caixa += entradas[d] - ja_entrou
+        ja_entrou = entradas[d]
+        t = int(rng.integers(0, tickers))
+        preco = round(float(precos[d, t]), 2)
+        if qtd[t] > 0 and rng.random() < 0.35:
+            n = float(max(1, int(qtd[t] * rng.uniform(0.1, 1.0))))
+            lado = "VENDA"
+            caixa += n * preco - 5.0
+        else:
+            n = float(int(min(caixa * 0.05, 2e4) / preco))
+            if n < 1: continue
+            lado = "COMPRA"
+            caixa -= n * preco + 5.0
+        qtd[t] += n if lado == "COMPRA" else -n
+        lista.append((0, dias[d], nomes[t], lado, n, preco, 5.0))
+
+    with db.transacao() as conn:
+        nucleo.aplicar_lote(conn, movimentos, lista)
+        nucleo.registrar_precos(conn, [(dias[i], nomes[j], round(float(precos[i, j]), 2))
+                                       for i in range(len(dias)) for j in range(tickers)])
+        nucleo.marcar_a_mercado(conn, [(nomes[j], round(float(precos[-1, j]), 2)) for j in range(tickers)], dias[-1])
+    # Um snapshot de cota por dia útil
+    recalculo.regenerar_historico_cota(db)
+    with db.transacao() as conn: conn.execute("ANALYZE")
+    return len(movimentos), len(lista), len(dias)
+
+def _mediana_ms(func, repeticoes=REPETICOES):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(tempos))
+
+def casos_suite(db):
+    # Operações das telas, sem Tk (painel.py / nucleo.py / paginacao.py)
+    import lupa, nucleo, painel, recalculo, tir
+    from paginacao import Paginador
+    conn = db.conexao()
+    meio = conn.execute("SELECT Data FROM historico_cota ORDER BY Data LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM historico_cota)").fetchone()[0]
+
+    def sumario():
+        tir._cache.clear()  # como depois de uma escrita: TIR recalculada
+        painel.sumario(db, 800)
+
+    def snapshot(data):
+        with db.transacao() as c: nucleo.registrar_cotas(c, {data: nucleo.valor_cota(c)})
+
+    def editor():
+        pag = Paginador(db, "trades", {"ticker": "T001"})
+        pag.primeira()
+        for _ in range(4): pag.proxima()
+
+    def digitar():
+        # "T001" tecla a tecla na mesa: uma conferência de versão e quatro buscas no índice em memória
+        indice = lupa.indice(conn)
+        for n in range(1, 5): indice.buscar("T001"[:n])
+
+    return {
+        "cota": lambda: nucleo.valor_cota(conn),
+        "sumario": sumario,
+        "snapshot": lambda: snapshot(nucleo.hoje()),
+        "snapshot_retroativo": lambda: snapshot(meio),
+        "editor": editor,
+        "grafico": lambda: painel.serie_grafico(conn, 800),
+        "serie_cota": lambda: recalculo.serie_cota(conn),
+        "lupa": digitar,
+    }
+
+def bench_suite(escala, caminho=None, base=None, salvar=False):
+    import json, os, tempfile
+    import nucleo
+    cotistas, trades, anos, tickers = ESCALAS[escala]
+    caminho = caminho or os.path.join(tempfile.mkdtemp(), f"{escala}.db")
+    novo = not os.path.exists(caminho)
+    db = Banco(caminho)
+    nucleo.preparar_banco(db)
+    if novo:
+        (n_mov, n_trades, n_dias), t = cronometrar(gerar_carteira, db, cotistas, trades, anos, tickers)
+        print(f"carteira sintética '{escala}': {n_mov:,} aportes, {n_trades:,} trades, {n_dias:,} dias úteis x {tickers} ativos ({t:.1f} s)")
+
+    medidas = {nome: _mediana_ms(func) for nome, func in casos_suite(db).items()}
+    db.fechar()
+
+    anteriores = {}
+    if base and os.path.exists(base):
+        with open(base, encoding="utf-8") as f: anteriores = json.load(f).get(escala, {})
+    falhas = []
+    print(f"suite  escala={escala}  (mediana de {REPETICOES}, ms)")
+    for nome, ms in medidas.items():
+        teto = LIMITES_MS[escala][nome]
+        ref = anteriores.get(nome)
+        if ref is not None: teto = min(teto, max(ref * (1 + TOLERANCIA), ref + PISO_MS))
+        status = "ok" if ms <= teto else "REGRESSÃO"
+        if ms > teto: falhas.append(nome)
+        print(f"  {nome:<20} {ms:10.2f}   limite {teto:10.2f}" + (f"   base {ref:.2f}" if ref is not None else "") + f"   {status}")
+
+    if base and salvar:
+        dados = {}
+        if os.path.exists(base):
+            with open(base, encoding="utf-8") as f: dados = json.load(f)
+        dados[escala] = medidas
+        with open(base, "w", encoding="utf-8") as f: json.dump(dados, f, indent=2)
+        print(f"base salva em {base}")
+    return falhas
+
+# ==============================================================================
+# 🧾 BOLETA: N ORDENS UMA A UMA x UMA TRANSAÇÃO
+# ==============================================================================
+def bench_boleta(ordens, escala="pequena"):
+    # Rebalanceamento na carteira sintética: vende parte de cada posição e compra
+    # outros ativos com o caixa; as duas cópias do banco têm que terminar iguais
+    import os, shutil, tempfile
+    import nucleo
+    pasta = tempfile.mkdtemp()
+    arquivos = [os.path.join(pasta, f"{n}.db") for n in ("unitaria", "boleta")]
+    db = Banco(arquivos[0])
+    nucleo.preparar_banco(db)
+    gerar_carteira(db, *ESCALAS[escala])
+    db.fechar()
+    shutil.copy(arquivos[0], arquivos[1])
+
+    unitaria, boleta = Banco(arquivos[0]), Banco(arquivos[1])
+    conn = unitaria.conexao()
+    posicoes = conn.execute("SELECT Ticker, Qtd, Preco_Atual FROM ativos WHERE Ticker != 'CAIXA' AND Qtd > 1 ORDER BY Ticker").fetchall()
+    hoje, lista = nucleo.hoje(), []
+    for i, (ticker, qtd, preco) in enumerate(posicoes * (ordens // max(len(posicoes), 1) + 1)):
+        if len(lista) >= ordens: break
+        lado = "VENDA" if i % 2 == 0 else "COMPRA"
+        lista.append((i + 1, hoje, ticker, lado, float(max(1, int(qtd * 0.02))), round(preco, 2), 5.0))
+    lista = [o for o in lista if nucleo.projetar_boleta(conn, lista)[o[0]][2] is None]
+
+    t0 = time.perf_counter()
+    for _, data, ticker, lado, qtd, preco, taxas in lista:
+        with unitaria.transacao() as c: nucleo.executar_ordem(c, data, lado, ticker, qtd, preco, taxas)
+    t_unitaria = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    with boleta.transacao() as c: nucleo.aplicar_lote(c, trades=lista, enquadrar=True)
+    t_boleta = (time.perf_counter() - t0) * 1000
+
+    consulta = "SELECT Ticker, ROUND(Qtd, 6), ROUND(Preco_Medio, 6) FROM ativos ORDER BY Ticker"
+    iguais = unitaria.consultar(consulta) == boleta.consultar(consulta)
+    print(f"boleta  {len(lista)} ordens  uma a uma: {t_unitaria:.1f} ms ({len(lista)} commits)  "
+          f"boleta: {t_boleta:.1f} ms (1 commit)  {t_unitaria / t_boleta:.1f}x  estado final igual: {iguais}")
+    unitaria.fechar()
+    boleta.fechar()
+    shutil.rmtree(pasta, ignore_errors=True)
+    return iguais
+
+# ==============================================================================
+# 🧾 EXTRATOS: LOTE MENSAL NUM PROCESSO x NO POOL
+# ==============================================================================
+def bench_extratos(escala, formatos, processos=None):
+    # Mesmo lote (mês anterior ao último snapshot) montado num processo só e no
+    # pool; os CSVs das duas rodadas têm que sair idênticos byte a byte
+    import filecmp, os, shutil, tempfile
+    from datetime import date
+    import extratos, nucleo
+    pasta = tempfile.mkdtemp()
+    db = Banco(os.path.join(pasta, "extratos.db"))
+    nucleo.preparar_banco(db)
+    gerar_carteira(db, *ESCALAS[escala])
+    conn = db.conexao()
+    ultima = conn.execute("SELECT MAX(Data) FROM historico_cota").fetchone()[0]
+    ini, fim = extratos.mes_fechado(date.fromisoformat(ultima))
+    tempos = {}
+    for nome, n in (("serial", 1), ("pool", processos or os.cpu_count() or 1)):
+        t0 = time.perf_counter()
+        total, _ = extratos.gerar(conn, os.path.join(pasta, nome), ini, fim, formatos, processos=n)
+        tempos[nome] = (time.perf_counter() - t0) * 1000, n
+    csvs = [f for f in os.listdir(os.path.join(pasta, "serial")) if f.endswith(".csv")]
+    iguais = all(filecmp.cmp(os.path.join(pasta, "serial", f), os.path.join(pasta, "pool", f), shallow=False) for f in csvs)
+    (t_serial, _), (t_pool, n) = tempos["serial"], tempos["pool"]
+    print(f"extratos  {total} cotistas  {ini} a {fim}  {'+'.join(formatos)}  1 processo: {t_serial:.0f} ms  "
+          f"{n} processo(s): {t_pool:.0f} ms  {t_serial / t_pool:.1f}x  ({t_serial / max(total, 1):.1f} ms/extrato)  arquivos iguais: {iguais}")
+    db.fechar()
+    shutil.rmtree(pasta, ignore_errors=True)
+    return iguais
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do sistema de cotas")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("replay", help="Motor vetorizado x loop iterrows")
+    p.add_argument("--linhas", type=int, default=1_000_000)
+    p.add_argument("--chaves", type=int, default=500)
+    p = sub.add_parser("tir", help="XIRR em lote x scipy brentq grupo a grupo")
+    p.add_argument("--grupos", type=int, default=2_000)
+    p.add_argument("--fluxos", type=int, default=24)
+    p = sub.add_parser("dre", help="Relatório mensal (DRE) do histórico inteiro em xlsx")
+    p.add_argument("--linhas", type=int, default=200_000)
+    p = sub.add_parser("planos", help="Confere EXPLAIN QUERY PLAN das consultas críticas")
+    p.add_argument("arquivo", nargs="?", default=":memory:")
+    p = sub.add_parser("suite", help="Operações das telas numa carteira sintética, com limites de regressão")
+    p.add_argument("--escala", choices=list(ESCALAS), default="pequena")
+    p.add_argument("--db", help="reaproveita (ou cria) a carteira sintética neste arquivo")
+    p.add_argument("--base", help="JSON com medições anteriores para comparar")
+    p.add_argument("--salvar", action="store_true", help="grava as medições desta rodada em --base")
+    p = sub.add_parser("boleta", help="N ordens uma a uma x a mesma boleta numa transação")
+    p.add_argument("--ordens", type=int, default=40)
+    p.add_argument("--escala", choices=list(ESCALAS), default="pequena")
+    p = sub.add_parser("extratos", help="Extratos mensais de todos os cotistas: um processo x pool")
+    p.add_argument("--escala", choices=list(ESCALAS), default="media")
+    p.add_argument("--formatos", default="xlsx,csv")
+    p.add_argument("--processos", type=int)
+    args = parser.parse_args()
+
+    if args.cmd == "replay":
+        erro = bench_replay(args.linhas, args.chaves)
+        if erro > 1e-6: raise SystemExit("Divergência entre motor vetorizado e loop de referência")
+    elif args.cmd == "tir":
+        if bench_tir(args.grupos, args.fluxos) > 1e-6: raise SystemExit("Divergência entre XIRR em lote e brentq")
+    elif args.cmd == "dre":
+        bench_dre(args.linhas)
+    elif args.cmd == "planos":
+        if checar_planos(args.arquivo): raise SystemExit(1)
+    elif args.cmd == "suite":
+        falhas = bench_suite(args.escala, args.db, args.base, args.salvar)
+        if falhas: raise SystemExit(f"Regressão de desempenho: {', '.join(falhas)}")
+    elif args.cmd == "boleta":
+        if not bench_boleta(args.ordens, args.escala): raise SystemExit("Boleta e ordens unitárias terminaram diferentes")
+    elif args.cmd == "extratos":
+        if not bench_extratos(args.escala, tuple(args.formatos.split(",")), args.processos):
+            raise SystemExit("Extratos do pool diferentes dos gerados num processo")
+
+if __name__ == "__main__":
+    main()
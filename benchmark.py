@@ -0,0 +1,147 @@
+import json
+from datetime import date, datetime, timedelta
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+# ==============================================================================
+# 📡 BENCHMARK (CDI - SGS 12) COM CACHE LOCAL
+# ==============================================================================
+# A série fica em benchmark_series e só as datas que faltam são buscadas.
+# Fator = produto de (1 + Valor/100) até a Data; o acumulado "em D" usa o Fator
+# da última data < D (a taxa rende até o dia útil seguinte).
+CDI = 12
+URL_SGS = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{codigo}/dados"
+TIMEOUT = 15
+ANOS_POR_CONSULTA = 10  # limite da API do SGS para séries diárias
+MARGEM = 3              # dias depois do último dia útil baixado que o cache ainda cobre (sexta -> segunda)
+
+
+def _data_br(iso):
+    return datetime.strptime(iso, "%Y-%m-%d").strftime("%d/%m/%Y")
+
+def _data_iso_sgs(s):
+    return datetime.strptime(s, "%d/%m/%Y").strftime("%Y-%m-%d")
+
+def _dia(iso, n):
+    return (date.fromisoformat(iso) + timedelta(days=n)).isoformat()
+
+def _tem_dia_util(ini, fim):
+    # Evita ir à API num intervalo que só tem sábado/domingo
+    d, ultimo = date.fromisoformat(ini), date.fromisoformat(fim)
+    while d <= ultimo:
+        if d.weekday() < 5: return True
+        d += timedelta(days=1)
+    return False
+
+# --- FONTES ---
+def buscar_sgs(codigo, ini, fim):
+    # [(Data ISO, Valor)] de [ini, fim], em blocos de ANOS_POR_CONSULTA anos
+    linhas = []
+    while ini <= fim:
+        ate = min(fim, _dia(ini, 365 * ANOS_POR_CONSULTA - 1))
+        url = URL_SGS.format(codigo=codigo) + "?" + urlencode(
+            {"formato": "json", "dataInicial": _data_br(ini), "dataFinal": _data_br(ate)})
+        try:
+            with urlopen(Request(url, headers={"User-Agent": "Mozilla/5.0"}), timeout=TIMEOUT) as resp:
+                dados = json.loads(resp.read())
+        except HTTPError as e:
+            if e.code != 404: raise  # 404 = nenhum valor no intervalo
+            dados = []
+        linhas += [(_data_iso_sgs(d["data"]), float(d["valor"])) for d in dados]
+        ini = _dia(ate, 1)
+    return linhas
+
+def buscar_arquivo(caminho):
+    # Fonte a partir de arquivo local (fixture / download manual); ignora o código da série
+    def buscar(codigo, ini, fim):
+        if caminho.lower().endswith(".json"):
+            with open(caminho, encoding="utf-8") as f:
+                dados = [(_data_iso_sgs(d["data"]) if "/" in d["data"] else d["data"], float(d["valor"])) for d in json.load(f)]
+        else:
+            import importacao
+            dados = [(importacao.data_iso(c.get("data")), importacao.numero(c.get("valor"))) for _, c in importacao.ler_linhas(caminho)]
+        return [(d, v) for d, v in dados if ini <= d <= fim]
+    return buscar
+
+fonte = buscar_sgs
+
+# --- CACHE ---
+def limites(conn, serie=CDI):
+    return conn.execute("SELECT MIN(Data), MAX(Data) FROM benchmark_series WHERE Serie = ?", (serie,)).fetchone()
+
+def faltando(conn, ini, fim, serie=CDI):
+    # Intervalos de [ini, fim] que ainda não estão no cache (antes do primeiro e depois do último dia gravado)
+    primeira, ultima = limites(conn, serie)
+    if primeira is None: intervalos = [(ini, fim)]
+    else: intervalos = [(ini, min(fim, _dia(primeira, -1))), (max(ini, _dia(ultima, 1)), fim)]
+    return [(a, b) for a, b in intervalos if a <= b and _tem_dia_util(a, b)]
+
+def gravar(conn, linhas, serie=CDI):
+    # Insere as datas novas e recalcula o Fator a partir da primeira delas
+    if not linhas: return 0
+    n = conn.executemany("INSERT OR IGNORE INTO benchmark_series (Serie, Data, Valor) VALUES (?, ?, ?)",
+                         [(serie, d, v) for d, v in linhas]).rowcount
+    inicio = min(d for d, _ in linhas)
+    anterior = conn.execute("SELECT Fator FROM benchmark_series WHERE Serie = ? AND Data < ? ORDER BY Data DESC LIMIT 1",
+                            (serie, inicio)).fetchone()
+    fator = anterior[0] if anterior else 1.0
+    novos = []
+    for data, valor in conn.execute("SELECT Data, Valor FROM benchmark_series WHERE Serie = ? AND Data >= ? ORDER BY Data",
+                                    (serie, inicio)).fetchall():
+        fator *= 1 + valor / 100
+        novos.append((fator, serie, data))
+    conn.executemany("UPDATE benchmark_series SET Fator = ? WHERE Serie = ? AND Data = ?", novos)
+    return n
+
+def sincronizar(db, ini=None, fim=None, serie=CDI, buscar=None):
+    # Baixa só o que falta para cobrir [ini, fim] (padrão: do primeiro snapshot da cota até hoje).
+    # A rede fica fora da transação; sem conexão levanta OSError e o cache continua valendo.
+    conn = db.conexao()
+    ini = ini or conn.execute("SELECT MIN(Data) FROM historico_cota").fetchone()[0]
+    fim = fim or date.today().isoformat()
+    if ini is None: return 0
+    buscar = buscar or fonte
+    linhas = []
+    for a, b in faltando(conn, ini, fim, serie): linhas += buscar(serie, a, b)
+    if not linhas: return 0
+    import metricas
+    with db.transacao() as c:
+        n = gravar(c, linhas, serie)
+        # Sharpe usa o CDI como livre de risco: retornos em excesso mudam
+        if n and serie == CDI: metricas.reconstruir(c)
+    return n
+
+# --- CONSULTAS ---
+def fator_antes(conn, data, serie=CDI):
+    # CDI acumulado até a abertura de `data`; None se a série não tem nada antes dela
+    linha = conn.execute("SELECT Fator FROM benchmark_series WHERE Serie = ? AND Data < ? ORDER BY Data DESC LIMIT 1",
+                         (serie, data)).fetchone()
+    return linha[0] if linha else None
+
+def coberto_ate(conn, serie=CDI):
+    # Última data cujo acumulado o cache conhece (último dia baixado + MARGEM); None com a série vazia
+    ultima = limites(conn, serie)[1]
+    return ultima and _dia(ultima, MARGEM)
+
+def retorno(conn, ini, fim, serie=CDI):
+    # Retorno acumulado da série entre ini e fim; None se o cache não cobre fim
+    # (o Fator antes de fim seria o do último dia baixado, e o período descoberto contaria como zero)
+    limite = coberto_ate(conn, serie)
+    if limite is None or fim > limite: return None
+    f_fim = fator_antes(conn, fim, serie)
+    if f_fim is None: return None
+    return f_fim / (fator_antes(conn, ini, serie) or 1.0) - 1
+
+def comparativo(conn, ini=None, serie=CDI):
+    # [(Data, Valor_Cota, Fator)] de historico_cota com o CDI acumulado na mesma data (uma busca no índice por
+    # linha); Fator None onde o cache não cobre (série vazia ou datas depois do último dia útil baixado + fim de semana)
+    limite = coberto_ate(conn, serie)
+    if limite is None: return [(d, c, None) for d, c in conn.execute(
+        "SELECT Data, Valor_Cota FROM historico_cota WHERE Data >= ? ORDER BY Data", (ini or "",))]
+    return conn.execute('''
+        SELECT h.Data, h.Valor_Cota,
+               CASE WHEN h.Data <= ? THEN COALESCE((SELECT b.Fator FROM benchmark_series b
+                    WHERE b.Serie = ? AND b.Data < h.Data ORDER BY b.Data DESC LIMIT 1), 1.0) END
+        FROM historico_cota h WHERE h.Data >= ? ORDER BY h.Data
+    ''', (limite, serie, ini or "")).fetchall()
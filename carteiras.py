@@ -0,0 +1,115 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from urllib.request import pathname2url
+
+import nucleo
+from banco import Banco
+
+# ==============================================================================
+# 🏦 CARTEIRAS (um fundo por arquivo .db)
+# ==============================================================================
+# carteiras.json guarda nome -> arquivo e a carteira ativa. O consolidado lê
+# cada arquivo num processo do pool ("spawn": não herda o estado do Tk).
+ARQ_REGISTRO = "carteiras.json"
+NOME_PADRAO = "Principal"
+
+
+class Registro:
+    def __init__(self, arquivo=ARQ_REGISTRO, padrao=None):
+        self.arquivo = arquivo
+        self.carteiras = {}  # {nome: caminho do .db}
+        self.ativa = None
+        self._bancos = {}
+        if os.path.exists(arquivo):
+            with open(arquivo, encoding="utf-8") as f:
+                dados = json.load(f)
+            self.carteiras = dict(dados.get("carteiras", {}))
+            self.ativa = dados.get("ativa")
+        if not self.carteiras and padrao: self.carteiras[NOME_PADRAO] = padrao
+        if self.ativa not in self.carteiras: self.ativa = next(iter(self.carteiras), None)
+
+    def salvar(self):
+        with open(self.arquivo, "w", encoding="utf-8") as f:
+            json.dump({"ativa": self.ativa, "carteiras": self.carteiras}, f, ensure_ascii=False, indent=2)
+
+    def nomes(self):
+        return list(self.carteiras)
+
+    def banco(self, nome=None):
+        nome = nome or self.ativa
+        if nome not in self.carteiras: raise ValueError(f"Carteira '{nome}' não cadastrada")
+        if nome not in self._bancos:
+            self._bancos[nome] = Banco(self.carteiras[nome])
+        return self._bancos[nome]
+
+    def adicionar(self, nome, caminho):
+        # Cadastra (criando o arquivo se preciso) e já migra, para o consolidado só ler
+        nome = (nome or "").strip()
+        if not nome: raise ValueError("Carteira sem nome")
+        if nome in self.carteiras: raise ValueError(f"Já existe uma carteira '{nome}'")
+        self.carteiras[nome] = caminho
+        try: nucleo.preparar_banco(self.banco(nome))
+        except Exception:
+            self.fechar(nome)
+            del self.carteiras[nome]
+            raise
+        self.salvar()
+
+    def remover(self, nome):
+        # Só tira do registro; o arquivo .db continua onde está
+        if nome == self.ativa: raise ValueError("Não é possível remover a carteira ativa")
+        self.fechar(nome)
+        self.carteiras.pop(nome, None)
+        self.salvar()
+
+    def ativar(self, nome):
+        if nome not in self.carteiras: raise ValueError(f"Carteira '{nome}' não cadastrada")
+        self.ativa = nome
+        self.salvar()
+        return self.banco(nome)
+
+    def fechar(self, nome=None):
+        for n in ([nome] if nome else list(self._bancos)):
+            banco = self._bancos.pop(n, None)
+            if banco: banco.fechar()
+
+# --- CONSOLIDADO ---
+def resumo(caminho):
+    # Roda no processo do pool: um arquivo, só leitura (mode=ro: sem Banco, que trocaria o journal para WAL)
+    if not os.path.exists(caminho): return {"erro": "arquivo não encontrado"}
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(caminho))}?mode=ro", uri=True)
+        pl, cotas = nucleo.patrimonio_liquido(conn), nucleo.total_cotas(conn)
+        caixa = conn.execute("SELECT Qtd FROM ativos WHERE Ticker = 'CAIXA'").fetchone()
+        ativos = conn.execute("SELECT Ticker, COALESCE(Tipo, 'Outros'), Qtd * Preco_Atual FROM ativos WHERE Qtd != 0").fetchall()
+        return {"pl": pl, "cotas": cotas, "cota": nucleo.cota_de(pl, cotas), "caixa": (caixa[0] if caixa else None) or 0.0, "ativos": ativos}
+    except Exception as e:
+        return {"erro": str(e)}
+    finally:
+        if conn is not None: conn.close()
+
+def consolidar(carteiras, processos=None):
+    # carteiras: {nome: caminho} -> ({nome: resumo}, {"pl", "por_tipo", "por_ticker"}) com % do PL somado
+    nomes, caminhos = list(carteiras), list(carteiras.values())
+    if len(caminhos) > 1:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(len(caminhos), processos or os.cpu_count() or 1), mp_context=contexto) as pool:
+            resumos = list(pool.map(resumo, caminhos))
+    else:
+        resumos = [resumo(c) for c in caminhos]
+
+    por_carteira = dict(zip(nomes, resumos))
+    por_tipo, por_ticker = {}, {}
+    for r in resumos:
+        for ticker, tipo, valor in r.get("ativos", ()):
+            por_tipo[tipo] = por_tipo.get(tipo, 0.0) + (valor or 0.0)
+            por_ticker[ticker] = por_ticker.get(ticker, 0.0) + (valor or 0.0)
+    pl = sum(r.get("pl", 0.0) for r in resumos)
+    fatia = lambda d: sorted(((k, v, v / pl * 100 if pl else 0.0) for k, v in d.items()), key=lambda x: -x[1])
+    for r in resumos:
+        if "pl" in r: r["participacao"] = r["pl"] / pl * 100 if pl else 0.0
+    return por_carteira, {"pl": pl, "por_tipo": fatia(por_tipo), "por_ticker": fatia(por_ticker)}
@@ -0,0 +1,252 @@
+import argparse
+import os
+import sys
+
+import enquadramento
+import importacao
+import metricas
+import nucleo
+from banco import Banco
+
+# ==============================================================================
+# 💻 LINHA DE COMANDO (sem interface gráfica)
+# ==============================================================================
+# Uso:  python cli.py importar --movimentos folha.csv --trades notas.xlsx
+#       python cli.py importar --trades notas.csv --validar   (só confere o arquivo)
+#       python cli.py precos fechamento.xlsx --data 2024-03-28
+#       python cli.py historico --de 2024-01-01          (regrava historico_cota)
+#       python cli.py estornar 1234 [--data 2024-03-28]  (ordem inversa do trade 1234; o livro não é editado)
+#       python cli.py dre --de 2024-01-01 --ate 2024-12-31 [--mensal] [--xlsx dre.xlsx]
+#       python cli.py tir
+#       python cli.py regra "Art. 7 - Renda Fixa" --limite 80 --tickers TIT1,TIT2   (--remover apaga)
+#       python cli.py enquadramento [--auditar --de 2024-01-01]
+#       python cli.py consolidado [a.db b.db ...]   (padrão: carteiras do registro carteiras.json)
+#       python cli.py cdi [--arquivo cdi.json]      (baixa só as datas que faltam no cache)
+#       python cli.py extratos pasta/ [--de 2024-05-01 --ate 2024-05-31] [--formatos xlsx,pdf]   (padrão: mês anterior)
+#       python cli.py posicao 2023-06-30 [--ticker PETR4]   (carteira registrada naquela data)
+#       python cli.py status
+DB_FILE = 'controle_cotas.db'
+
+
+def importar(db, arq_movimentos=None, arq_trades=None, so_validar=False):
+    movimentos = importacao.validar_movimentos(arq_movimentos) if arq_movimentos else []
+    trades = importacao.validar_trades(arq_trades) if arq_trades else []
+    print(f"validados: {len(movimentos)} movimento(s), {len(trades)} trade(s)")
+    if so_validar: return
+
+    with db.transacao() as conn:
+        n_mov, n_trades, datas = nucleo.aplicar_lote(conn, movimentos, trades)
+    print(f"gravados: {n_mov} movimento(s), {n_trades} trade(s); cota registrada em {len(datas)} data(s)")
+
+def precos(db, arquivo, data):
+    linhas = importacao.validar_precos(arquivo)
+    with db.transacao() as conn:
+        n, ignorados = nucleo.marcar_a_mercado(conn, [(t, p) for _, t, p in linhas], data)
+        nucleo.registrar_cotas(conn, {data: nucleo.valor_cota(conn)})
+        cota = conn.execute("SELECT Valor_Cota FROM historico_cota WHERE Data = ?", (data,)).fetchone()[0]
+    print(f"marcados: {n} ativo(s) em {data}; cota R$ {cota:,.6f}")
+    if ignorados: print(f"fora da carteira (ignorados): {', '.join(ignorados)}")
+
+def historico(db, ini=None, fim=None):
+    import recalculo
+    n = recalculo.regenerar_historico_cota(db, ini, fim)
+    print(f"historico_cota: {n} data(s) regravada(s)")
+
+def estornar(db, id_trade, data=None):
+    with db.transacao() as conn:
+        nucleo.estornar_trade(conn, id_trade, data)
+    print(f"trade {id_trade} estornado" + (f" em {data}" if data else ""))
+
+def apurar_dre(db, ini, fim, mensal=False, xlsx=None):
+    import dre
+    conn = db.conexao()
+    periodos = dre.meses(conn, ini, fim) if mensal else [(ini or dre.meses(conn)[0][0], fim or nucleo.hoje())]
+    if xlsx:
+        n = dre.exportar_xlsx(conn, xlsx, periodos)
+        print(f"{n} linha(s) em {xlsx} ({len(periodos)} período(s))")
+        return
+    lista = dre.tickers(conn)
+    for ini, fim in periodos:
+        print(f"{ini} a {fim}")
+        for _, _, ticker, si, apl, resg, sf, res, rent in dre.apurar(conn, ini, fim, lista):
+            print(f"  {ticker:<10} SI {si:>14,.2f}  Apl {apl:>14,.2f}  Resg {resg:>14,.2f}  SF {sf:>14,.2f}  Res {res:>12,.2f}  {rent:7.2f}%")
+
+def tir(db):
+    import tir as motor
+    tirs = motor.tirs(db)
+    def linha(nome, taxa): print(f"  {nome:<20} {'-' if taxa != taxa else f'{taxa * 100:8.2f}%'}")
+    print("TIR a.a. (XIRR)")
+    linha("CARTEIRA", tirs["carteira"])
+    for grupo in ("ativos", "cotistas"):
+        print(f"{grupo}:")
+        for nome, taxa in sorted(tirs[grupo].items()): linha(nome, taxa)
+
+def regra(db, nome, limite=None, tickers="", remover=False):
+    with db.transacao() as conn:
+        if remover:
+            print(f"{enquadramento.remover_regra(conn, nome)} regra(s) removida(s)")
+            return
+        if limite is None: raise ValueError("informe --limite")
+        enquadramento.salvar_regra(conn, nome, limite, [t.strip().upper() for t in tickers.split(",") if t.strip()])
+    print(f"regra '{nome}' gravada")
+
+def enquadrar(db, auditar=False, ini=None, fim=None):
+    conn = db.conexao()
+    for nome, limite, valor, pct, tickers in enquadramento.situacao(conn):
+        print(f"  {'!!' if pct > limite else 'ok'} {nome:<30} {pct:7.2f}% / {limite:6.2f}%  R$ {valor:>14,.2f}  [{tickers}]")
+    if not auditar: return
+    linhas = enquadramento.auditar(conn, ini, fim)
+    for data, nome, limite, pct in linhas: print(f"  {data}  {nome:<30} {pct:7.2f}% (limite {limite:.2f}%)")
+    print(f"auditoria: {len(linhas)} desenquadramento(s) em {len({l[0] for l in linhas})} data(s)")
+
+def consolidado(arquivos=None):
+    import carteiras
+    lista = {os.path.splitext(os.path.basename(a))[0]: a for a in arquivos} if arquivos else carteiras.Registro().carteiras
+    if not lista: raise ValueError("nenhuma carteira (informe os arquivos ou cadastre em carteiras.json)")
+    por_carteira, total = carteiras.consolidar(lista)
+    for nome, r in por_carteira.items():
+        if "erro" in r: print(f"  {nome:<20} erro: {r['erro']}")
+        else: print(f"  {nome:<20} PL R$ {r['pl']:>16,.2f}  cota {r['cota']:12.6f}  caixa R$ {r['caixa']:>14,.2f}  {r['participacao']:6.2f}%")
+    print(f"PL consolidado: R$ {total['pl']:,.2f}")
+    for titulo, chave in (("por classe", "por_tipo"), ("por ativo", "por_ticker")):
+        print(f"alocação {titulo}:")
+        for nome, valor, pct in total[chave]: print(f"  {nome:<20} R$ {valor:>16,.2f}  {pct:6.2f}%")
+
+def cdi(db, ini=None, fim=None, arquivo=None):
+    import benchmark
+    buscar = benchmark.buscar_arquivo(arquivo) if arquivo else None
+    try:
+        print(f"CDI: {benchmark.sincronizar(db, ini, fim, buscar=buscar)} data(s) nova(s) no cache")
+    except OSError as e:
+        print(f"CDI: sem conexão ({e}); usando o cache local", file=sys.stderr)
+    linhas = [l for l in benchmark.comparativo(db.conexao(), ini) if l[2] is not None]
+    if not linhas: return
+    (d0, c0, f0), (d1, c1, f1) = linhas[0], linhas[-1]
+    print(f"{d0} a {d1}:  cota {(c1 / c0 - 1) * 100:8.2f}%   CDI {(f1 / f0 - 1) * 100:8.2f}%")
+
+def extratos(db, pasta, ini=None, fim=None, formatos="xlsx", processos=None):
+    import extratos as ext
+    if not (ini and fim):
+        padrao = ext.mes_fechado()
+        ini, fim = ini or padrao[0], fim or padrao[1]
+    progresso = lambda feitos, total: print(f"\r  {feitos}/{total}", end="", file=sys.stderr, flush=True)
+    n, indice = ext.gerar(db.conexao(), pasta, ini, fim, [f.strip() for f in formatos.split(",") if f.strip()], processos, progresso)
+    if n: print(file=sys.stderr)
+    print(f"{n} extrato(s) de {ini} a {fim} em {pasta} (índice: {os.path.basename(indice)})")
+
+def posicao(db, data, ticker=None):
+    import posicoes
+    conn = db.conexao()
+    base, linhas = posicoes.carteira_em(conn, data, ticker)
+    if base is None: raise ValueError(f"nenhum snapshot até {data}")
+    print(f"snapshot de {base}" + (f" (último <= {data})" if base != data else ""))
+    for t, qtd, pm, preco, valor in linhas:
+        print(f"  {t:<10} {qtd:>14,.4f}  PM {pm or 0:>12,.4f}  preço {preco or 0:>12,.4f}  R$ {valor or 0:>16,.2f}")
+    if not ticker: print(f"PL: R$ {sum(l[4] or 0 for l in linhas):,.2f}")
+
+def status(db):
+    conn = db.conexao()
+    cota = nucleo.resumo_cota(conn)
+    print(f"PL:    R$ {cota['pl']:,.2f}")
+    print(f"Caixa: R$ {cota['caixa']:,.2f}")
+    print(f"Cotas: {cota['cotas']:,.6f}")
+    print(f"Cota:  R$ {cota['cota']:,.6f}")
+    risco = metricas.resumo(conn)
+    if risco:
+        print(f"Retorno total: {risco['retorno_total'] * 100:.2f}%  Vol a.a.: {risco['volatilidade_aa'] * 100:.2f}%  "
+              f"Sharpe: {risco['sharpe_aa']:.2f} (janela {risco['sharpe_janela_aa']:.2f})  DD máx.: {risco['max_drawdown'] * 100:.2f}%")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sistema de cotas - linha de comando")
+    parser.add_argument("--db", default=DB_FILE, help="arquivo do banco (padrão: %(default)s)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("importar", help="Importa trades e aportes/saques de CSV/XLSX numa única transação")
+    p.add_argument("--movimentos", help="arquivo com Data, Cotista, Tipo, Valor[, Ticker]")
+    p.add_argument("--trades", help="arquivo com Data, Ticker, Lado, Qtd, Preco[, Taxas]")
+    p.add_argument("--validar", action="store_true", help="só valida, não grava")
+    p = sub.add_parser("precos", help="Marcação a mercado a partir de arquivo Ticker/Preco (um executemany) + snapshot da cota")
+    p.add_argument("arquivo")
+    p.add_argument("--data", default=nucleo.hoje(), help="data da marcação (padrão: hoje)")
+    p = sub.add_parser("historico", help="Regrava historico_cota pelo motor de posições x preços")
+    p.add_argument("--de", help="data inicial (padrão: início)")
+    p.add_argument("--ate", help="data final (padrão: última)")
+    p = sub.add_parser("estornar", help="Lança a ordem inversa de um trade (correção do livro append-only)")
+    p.add_argument("id", type=int, help="ID do trade")
+    p.add_argument("--data", help="data do estorno (padrão: a do trade)")
+    p = sub.add_parser("dre", help="Apuração de rendimento por período (Saldo Final + Resgates - Aplicações - Saldo Inicial)")
+    p.add_argument("--de", help="início (padrão: primeiro trade)")
+    p.add_argument("--ate", help="fim (padrão: hoje)")
+    p.add_argument("--mensal", action="store_true", help="um período por mês")
+    p.add_argument("--xlsx", help="exporta para planilha em vez de imprimir")
+    sub.add_parser("tir", help="TIR (XIRR) da carteira, de cada ativo e de cada cotista")
+    p = sub.add_parser("regra", help="Cria/atualiza (ou remove) uma regra de enquadramento")
+    p.add_argument("nome")
+    p.add_argument("--limite", type=float, help="máximo em %% do PL")
+    p.add_argument("--tickers", default="", help="ativos vinculados, separados por vírgula")
+    p.add_argument("--remover", action="store_true")
+    p = sub.add_parser("enquadramento", help="Exposição atual por regra e auditoria do histórico")
+    p.add_argument("--auditar", action="store_true", help="confere todas as datas de historico_cota")
+    p.add_argument("--de", help="início da auditoria")
+    p.add_argument("--ate", help="fim da auditoria")
+    p = sub.add_parser("consolidado", help="PL, cota e alocação somados de várias carteiras (um processo por arquivo)")
+    p.add_argument("arquivos", nargs="*", help="arquivos .db (padrão: registro carteiras.json)")
+    p = sub.add_parser("cdi", help="Atualiza o cache local do CDI (SGS 12) e compara com a cota")
+    p.add_argument("--de", help="início (padrão: primeiro snapshot da cota)")
+    p.add_argument("--ate", help="fim (padrão: hoje)")
+    p.add_argument("--arquivo", help="JSON do SGS / CSV / XLSX com Data, Valor em vez da API")
+    p = sub.add_parser("extratos", help="Extrato de cada cotista no período (XLSX/CSV/PDF), em paralelo")
+    p.add_argument("pasta")
+    p.add_argument("--de", help="início (padrão: dia 1 do mês anterior)")
+    p.add_argument("--ate", help="fim (padrão: último dia do mês anterior)")
+    p.add_argument("--formatos", default="xlsx", help="xlsx, csv e/ou pdf separados por vírgula")
+    p.add_argument("--processos", type=int, help="processos do pool (padrão: núcleos da máquina)")
+    p = sub.add_parser("posicao", help="Carteira (ou ativos com o prefixo --ticker) no último snapshot até a data")
+    p.add_argument("data")
+    p.add_argument("--ticker", help="prefixo do ticker")
+    sub.add_parser("status", help="PL, caixa e valor da cota")
+    args = parser.parse_args(argv)
+    if args.cmd == "consolidado":
+        try: consolidado(args.arquivos)
+        except (ValueError, OSError) as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    db = Banco(args.db)
+    try:
+        nucleo.preparar_banco(db)
+        if args.cmd == "importar":
+            if not (args.movimentos or args.trades): parser.error("informe --movimentos e/ou --trades")
+            importar(db, args.movimentos, args.trades, args.validar)
+        elif args.cmd == "precos":
+            precos(db, args.arquivo, importacao.data_iso(args.data))
+        elif args.cmd == "historico":
+            historico(db, args.de and importacao.data_iso(args.de), args.ate and importacao.data_iso(args.ate))
+        elif args.cmd == "estornar":
+            estornar(db, args.id, args.data and importacao.data_iso(args.data))
+        elif args.cmd == "dre":
+            apurar_dre(db, args.de and importacao.data_iso(args.de), args.ate and importacao.data_iso(args.ate), args.mensal, args.xlsx)
+        elif args.cmd == "tir":
+            tir(db)
+        elif args.cmd == "regra":
+            regra(db, args.nome, args.limite, args.tickers, args.remover)
+        elif args.cmd == "enquadramento":
+            enquadrar(db, args.auditar, args.de and importacao.data_iso(args.de), args.ate and importacao.data_iso(args.ate))
+        elif args.cmd == "cdi":
+            cdi(db, args.de and importacao.data_iso(args.de), args.ate and importacao.data_iso(args.ate), args.arquivo)
+        elif args.cmd == "extratos":
+            extratos(db, args.pasta, args.de and importacao.data_iso(args.de), args.ate and importacao.data_iso(args.ate),
+                     args.formatos, args.processos)
+        elif args.cmd == "posicao":
+            posicao(db, importacao.data_iso(args.data), args.ticker and args.ticker.strip().upper())
+        elif args.cmd == "status":
+            status(db)
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.fechar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
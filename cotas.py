@@ -1,17 +1,25 @@
+import time
+T_INICIO = time.perf_counter()  # antes de qualquer import: mede o tempo até a tela interativa
+
 import customtkinter as ctk
-import pandas as pd
-import sqlite3
 import sys
 import os
-import time
 import json
 import webbrowser
 from datetime import datetime
 from tkinter import messagebox, ttk
 from urllib.request import urlopen, Request
-from PIL import Image, ImageTk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from agendador import Aba, Agendador
+from paginacao import Paginador
+import benchmark
+import carteiras
+import diagnostico
+import enquadramento
+import importacao
+import lupa
+import nucleo
+import painel
+import posicoes
 
 # ==============================================================================
 # ⚙️ CONFIGURAÇÕES
@@ -20,6 +28,10 @@ DB_FILE = 'controle_cotas.db'
 GITHUB_USER = "fellipesillvaoff"
 GITHUB_REPO = "carteira"
 VERSION = "1.0.0"
+SEM_FILTRO = "(sem filtro)"
+ULTIMOS_TRADES = 30
+EDITAVEIS = ("cotistas_mov",)
+ARQ_TEMPOS = "tempos_inicializacao.jsonl"
 
 def obter_caminho_externo(arquivo):
     if getattr(sys, 'frozen', False):
@@ -28,140 +40,180 @@ def obter_caminho_externo(arquivo):
         pasta_base = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(pasta_base, arquivo)
 
+# `db` é sempre o da carteira ativa
+registro = carteiras.Registro(obter_caminho_externo(carteiras.ARQ_REGISTRO), padrao=DB_FILE)
+db = registro.banco()
+
+# --- TEMPOS DE INICIALIZAÇÃO ---
+FASES_INICIO = []
+
+def marcar_fase(nome):
+    ms = round((time.perf_counter() - T_INICIO) * 1000, 1)
+    FASES_INICIO.append((nome, ms))
+    return ms
+
+def salvar_fases():
+    registro = {"versao": VERSION, "data": datetime.now().isoformat(timespec="seconds"), "fases_ms": dict(FASES_INICIO)}
+    try:
+        with open(obter_caminho_externo(ARQ_TEMPOS), "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except OSError: pass
+
+marcar_fase("imports")
+
 # ==============================================================================
 # 🗄️ BANCO DE DADOS
 # ==============================================================================
+_db_iniciado = False
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    # 1. Movimentação de Cotistas
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS cotistas_mov (
-            ID INTEGER PRIMARY KEY AUTOINCREMENT,
-            Data TEXT,
-            Cotista TEXT,
-            Tipo TEXT, 
-            Valor REAL,
-            Cota_Ref REAL,
-            Qtd_Cotas REAL,
-            Ticker_Ref TEXT
-        )
-    ''')
-
-    # 2. Carteira de Ativos
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS ativos (
-            Ticker TEXT PRIMARY KEY,
-            Qtd REAL,
-            Preco_Medio REAL,
-            Preco_Atual REAL,
-            Stop_Loss REAL,
-            Tipo TEXT 
-        )
-    ''')
-    
-    # Garante que CAIXA exista sempre que iniciar
-    c.execute("INSERT OR IGNORE INTO ativos (Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo) VALUES ('CAIXA', 0, 1, 1, 0, 'Caixa')")
-    
-    # 3. Histórico de Cota
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS historico_cota (
-            Data TEXT,
-            Valor_Cota REAL
-        )
-    ''')
-
-    # Migração para garantir compatibilidade
-    try: c.execute("ALTER TABLE cotistas_mov ADD COLUMN Ticker_Ref TEXT")
-    except: pass
-
-    conn.commit()
-    conn.close()
+    global _db_iniciado
+    if _db_iniciado: return
+
+    nucleo.preparar_banco(db)
+    _db_iniciado = True
 
 # --- CÁLCULOS FINANCEIROS ---
 def get_patrimonio_liquido():
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        df = pd.read_sql_query("SELECT * FROM ativos", conn)
-        if df.empty: return 0.0
-        df['Valor_Total'] = df['Qtd'] * df['Preco_Atual']
-        return df['Valor_Total'].sum()
+    try: return nucleo.resumo_cota(db.conexao())["pl"]
     except: return 0.0
-    finally: conn.close()
 
 def get_total_cotas():
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        res = conn.execute("SELECT SUM(Qtd_Cotas) FROM cotistas_mov").fetchone()[0]
-        return res if res else 0.0
+    try: return nucleo.resumo_cota(db.conexao())["cotas"]
     except: return 0.0
-    finally: conn.close()
 
 def calcular_valor_cota():
-    pl = get_patrimonio_liquido()
-    total_cotas = get_total_cotas()
-    if total_cotas <= 0: return 1.0
-    return pl / total_cotas
+    return nucleo.cota_de(get_patrimonio_liquido(), get_total_cotas())
 
 def registrar_historico_cota(data_ref=None):
-    if not data_ref:
-        data_ref = datetime.today().strftime('%Y-%m-%d')
-    
-    cota = calcular_valor_cota()
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute("DELETE FROM historico_cota WHERE Data = ?", (data_ref,))
-    conn.execute("INSERT INTO historico_cota VALUES (?, ?)", (data_ref, cota))
-    conn.commit()
-    conn.close()
+    with db.transacao() as conn:
+        nucleo.registrar_cotas(conn, {data_ref or nucleo.hoje(): nucleo.valor_cota(conn)})
+
+def formatar_taxa(taxa):
+    # TIR sem solução (ex.: só aportes no mesmo dia) aparece como "-"
+    return "-" if taxa is None or taxa != taxa else f"{taxa * 100:.2f}%"
 
 # ==============================================================================
 # 🛠️ POP-UP: MARK-TO-MARKET (Atualização de Preços)
 # ==============================================================================
 class JanelaAtualizacaoAtivos(ctk.CTkToplevel):
-    def __init__(self, parent, callback_confirmar):
+    # Amarelo = alterado nesta janela; laranja = sem marcação desde a data de referência
+    COLUNAS = ("Ticker", "Qtd", "Anterior", "Novo", "Var %", "Marcado em")
+
+    def __init__(self, parent, callback_confirmar, data_ref=None):
         super().__init__(parent)
         self.title("Mark-to-Market (Atualizar Preços)")
-        self.geometry("500x500")
+        self.geometry("640x560")
         self.callback = callback_confirmar
+        self.data_ref = data_ref or nucleo.hoje()
         self.attributes("-topmost", True)
         
         ctk.CTkLabel(self, text="⚠️ ATUALIZE OS ATIVOS ANTES DA MOVIMENTAÇÃO", text_color="orange", font=("Arial", 12, "bold")).pack(pady=10)
         
-        self.scroll = ctk.CTkScrollableFrame(self)
-        self.scroll.pack(fill="both", expand=True, padx=10, pady=5)
+        barra = ctk.CTkFrame(self, fg_color="transparent")
+        barra.pack(fill="x", padx=10)
+        ctk.CTkButton(barra, text="📂 Importar Arquivo de Preços", command=self.importar_arquivo).pack(side="left")
+        ctk.CTkLabel(barra, text="Preço:").pack(side="left", padx=(15, 5))
+        self.entry_preco = ctk.CTkEntry(barra, width=110, placeholder_text="Enter = próximo")
+        self.entry_preco.pack(side="left")
+        self.entry_preco.bind("<Return>", self.aplicar_preco)
+        self.lbl_resumo = ctk.CTkLabel(self, text="", text_color="gray")
+        self.lbl_resumo.pack(fill="x", padx=10)
+
+        frame_tree = ctk.CTkFrame(self, fg_color="transparent")
+        frame_tree.pack(fill="both", expand=True, padx=10, pady=5)
+        scroll = ttk.Scrollbar(frame_tree, orient="vertical")
+        scroll.pack(side="right", fill="y")
+        self.tree = ttk.Treeview(frame_tree, columns=self.COLUNAS, show="headings", yscrollcommand=scroll.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scroll.configure(command=self.tree.yview)
+        for c in self.COLUNAS:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=90, anchor="center")
+        self.tree.tag_configure("alterado", background="#5c5200")
+        self.tree.tag_configure("defasado", foreground="orange")
+        self.tree.bind("<<TreeviewSelect>>", self.ao_selecionar)
         
-        self.entradas = {}
-        conn = sqlite3.connect(DB_FILE)
-        ativos = conn.execute("SELECT Ticker, Preco_Atual FROM ativos WHERE Ticker != 'CAIXA' AND Qtd > 0").fetchall()
-        conn.close()
+        self.precos = {}  # {Ticker: [Qtd, Anterior, Novo, Data_Preco]}
+        ativos = db.consultar("SELECT Ticker, Qtd, Preco_Atual, Data_Preco FROM ativos WHERE Ticker != 'CAIXA' AND Qtd > 0 ORDER BY Ticker")
+        for ticker, qtd, preco, data_preco in ativos:
+            self.precos[ticker] = [qtd, preco or 0.0, preco or 0.0, data_preco]
+            self.tree.insert("", "end", iid=ticker, values=self.linha(ticker), tags=self.tags(ticker))
         
         if not ativos:
-            ctk.CTkLabel(self.scroll, text="Apenas CAIXA na carteira. Pode prosseguir.").pack(pady=20)
-        
-        for ticker, preco in ativos:
-            row = ctk.CTkFrame(self.scroll, fg_color="transparent")
-            row.pack(fill="x", pady=2)
-            ctk.CTkLabel(row, text=ticker, width=80, anchor="w").pack(side="left")
-            ent = ctk.CTkEntry(row)
-            ent.insert(0, str(preco))
-            ent.pack(side="right", fill="x", expand=True)
-            self.entradas[ticker] = ent
+            self.lbl_resumo.configure(text="Apenas CAIXA na carteira. Pode prosseguir.")
+        else:
+            self.resumir()
+            primeiro = self.tree.get_children()[0]
+            self.tree.selection_set(primeiro)
+            self.tree.focus(primeiro)
 
         ctk.CTkButton(self, text="CONFIRMAR E PROCESSAR", command=self.salvar, fg_color="green").pack(pady=10, padx=20)
 
+    def linha(self, ticker):
+        qtd, anterior, novo, data_preco = self.precos[ticker]
+        var = (novo / anterior - 1) * 100 if anterior else 0.0
+        return (ticker, f"{qtd:g}", f"{anterior:,.4f}", f"{novo:,.4f}", f"{var:+.2f}%", data_preco or "-")
+
+    def tags(self, ticker):
+        _, anterior, novo, data_preco = self.precos[ticker]
+        if abs(novo - anterior) > 1e-12: return ("alterado",)
+        if not data_preco or data_preco < self.data_ref: return ("defasado",)
+        return ()
+
+    def redesenhar(self, ticker):
+        self.tree.item(ticker, values=self.linha(ticker), tags=self.tags(ticker))
+
+    def resumir(self, extra=""):
+        alterados = sum(1 for t in self.precos if self.tags(t) == ("alterado",))
+        defasados = sum(1 for t in self.precos if self.tags(t) == ("defasado",))
+        self.lbl_resumo.configure(text=f"{len(self.precos)} ativos | {alterados} alterados | {defasados} sem marcação desde {self.data_ref}{extra}")
+
+    def ao_selecionar(self, _=None):
+        sel = self.tree.selection()
+        if not sel: return
+        self.entry_preco.delete(0, "end")
+        self.entry_preco.insert(0, str(self.precos[sel[0]][2]))
+        self.entry_preco.focus_set()
+        self.entry_preco.select_range(0, "end")
+
+    def aplicar_preco(self, _=None):
+        sel = self.tree.selection()
+        if not sel: return
+        try: preco = importacao.numero(self.entry_preco.get())
+        except ValueError: return messagebox.showerror("Erro", "Preço inválido.", parent=self)
+        if preco <= 0: return messagebox.showerror("Erro", "Preço inválido.", parent=self)
+        self.precos[sel[0]][2] = preco
+        self.redesenhar(sel[0])
+        self.resumir()
+        proximo = self.tree.next(sel[0])
+        if proximo:
+            self.tree.selection_set(proximo)
+            self.tree.see(proximo)
+
+    def importar_arquivo(self):
+        from tkinter import filedialog
+        caminho = filedialog.askopenfilename(parent=self, title="Arquivo de preços (Ticker, Preco)",
+                                             filetypes=[("Planilhas", "*.csv *.xlsx"), ("Todos", "*.*")])
+        if not caminho: return
+        try: linhas = importacao.validar_precos(caminho)
+        except (ValueError, OSError) as e: return messagebox.showerror("Erro", str(e), parent=self)
+        fora = []
+        for _, ticker, preco in linhas:
+            if ticker not in self.precos: fora.append(ticker); continue
+            self.precos[ticker][2] = preco
+            self.redesenhar(ticker)
+        self.resumir(f" | {len(linhas) - len(fora)} preços do arquivo" + (f" | fora da carteira: {', '.join(fora[:5])}" if fora else ""))
+        self.ao_selecionar()
+
     def salvar(self):
         try:
-            conn = sqlite3.connect(DB_FILE)
-            for ticker, entry in self.entradas.items():
-                novo = float(entry.get().replace(",", "."))
-                conn.execute("UPDATE ativos SET Preco_Atual = ? WHERE Ticker = ?", (novo, ticker))
-            conn.commit()
-            conn.close()
-            self.callback()
-            self.destroy()
-        except ValueError:
-            messagebox.showerror("Erro", "Preços inválidos.")
+            with db.transacao() as conn:
+                nucleo.marcar_a_mercado(conn, [(t, p[2]) for t, p in self.precos.items()], self.data_ref)
+        except Exception as e:
+            return messagebox.showerror("Erro", f"Preços não gravados: {e}", parent=self)
+        self.callback()
+        self.destroy()
 
 # ==============================================================================
 # 🚀 TELA DE CARREGAMENTO (SPLASH)
@@ -194,9 +246,11 @@ class SplashWithLog(ctk.CTk):
         self.log_box.pack(pady=10, padx=20, fill="x")
         
         self.gif_frames = []
+        self.gif = None
+        self.total_frames = 0
         self.current_frame = 0
         self.carregar_gif("loading.gif")
-        self.after(500, self.iniciar)
+        self.after(10, self.iniciar)
 
     def log(self, msg):
         if not self.running: return
@@ -208,30 +262,35 @@ class SplashWithLog(ctk.CTk):
         path = obter_caminho_externo(filename)
         if os.path.exists(path):
             try:
-                pil_image = Image.open(path)
-                for _ in range(pil_image.n_frames):
-                    pil_image.seek(len(self.gif_frames))
-                    frame = pil_image.convert("RGBA")
-                    ctk_img = ctk.CTkImage(light_image=frame, dark_image=frame, size=(440, 400))
-                    self.gif_frames.append(ctk_img)
+                from PIL import Image
+                self.gif = Image.open(path)
+                self.total_frames = getattr(self.gif, "n_frames", 1)
                 self.animate()
             except: self.log("Erro no GIF")
 
+    def decodificar_proximo(self):
+        if self.gif is None or len(self.gif_frames) >= self.total_frames: return
+        self.gif.seek(len(self.gif_frames))
+        frame = self.gif.convert("RGBA")
+        self.gif_frames.append(ctk.CTkImage(light_image=frame, dark_image=frame, size=(440, 400)))
+
     def animate(self):
         if not self.running or not self.winfo_exists(): return
+        try: self.decodificar_proximo()
+        except: self.gif = None
         if self.gif_frames:
-            self.lbl_gif.configure(image=self.gif_frames[self.current_frame])
-            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
+            self.lbl_gif.configure(image=self.gif_frames[self.current_frame % len(self.gif_frames)])
+            self.current_frame = (self.current_frame + 1) % max(self.total_frames, 1)
             self.after(100, self.animate)
 
     def iniciar(self):
         if not self.running: return
         try:
+            self.log(f"Interface pronta ({marcar_fase('splash')} ms)")
             self.log("Conectando Banco de Dados...")
             init_db()
-            time.sleep(0.5)
-            self.log("Sistema Pronto.")
-            self.after(1000, self.abrir_app)
+            self.log(f"Sistema Pronto ({marcar_fase('init_db')} ms).")
+            self.after_idle(self.abrir_app)
         except Exception as e:
             self.log(f"Erro Fatal: {e}")
 
@@ -244,7 +303,7 @@ class SplashWithLog(ctk.CTk):
 # ==============================================================================
 # 🏠 ABA 1: SUMÁRIO
 # ==============================================================================
-class FrameSumario(ctk.CTkFrame):
+class FrameSumario(Aba, ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master)
         
@@ -253,19 +312,30 @@ class FrameSumario(ctk.CTkFrame):
         self.card_pl = self.criar_card(self.frame_top, "Patrimônio Líquido", "R$ 0.00", 0)
         self.card_cota = self.criar_card(self.frame_top, "Valor Cota", "R$ 1.00", 1)
         self.card_caixa = self.criar_card(self.frame_top, "Caixa Livre", "R$ 0.00", 2)
+        self.card_tir = self.criar_card(self.frame_top, "TIR Carteira (a.a.)", "-", 3)
+
+        # Métricas de risco
+        self.frame_risco = ctk.CTkFrame(self, fg_color="transparent")
+        self.frame_risco.pack(fill="x", padx=10, pady=(0, 10))
+        self.card_roi = self.criar_card(self.frame_risco, "Retorno Total", "-", 0)
+        self.card_vol = self.criar_card(self.frame_risco, "Volatilidade (a.a.)", "-", 1)
+        self.card_sharpe = self.criar_card(self.frame_risco, "Sharpe (janela)", "-", 2)
+        self.card_dd = self.criar_card(self.frame_risco, "Drawdown Máx.", "-", 3)
 
         self.frame_mid = ctk.CTkFrame(self, fg_color="transparent")
         self.frame_mid.pack(fill="both", expand=True, padx=10)
         
         self.frame_graph = ctk.CTkFrame(self.frame_mid)
         self.frame_graph.pack(side="left", fill="both", expand=True, padx=5)
+        self.btn_cdi = ctk.CTkButton(self.frame_graph, text="📡 Atualizar CDI", width=140, fg_color="#555", command=self.atualizar_cdi)
+        self.btn_cdi.pack(anchor="ne", padx=5, pady=5)
         
         self.frame_list = ctk.CTkFrame(self.frame_mid, width=300)
         self.frame_list.pack(side="right", fill="both", padx=5)
         
         ctk.CTkLabel(self.frame_list, text="Posição dos Cotistas", font=("Arial", 14, "bold")).pack(pady=5)
         
-        cols = ("Nome", "Cotas", "PM", "Rentab")
+        cols = ("Nome", "Cotas", "PM", "Rentab", "TIR a.a.")
         self.tree = ttk.Treeview(self.frame_list, columns=cols, show="headings", height=15)
         for c in cols: 
             self.tree.heading(c, text=c)
@@ -273,6 +343,10 @@ class FrameSumario(ctk.CTkFrame):
         self.tree.column("Nome", width=100)
         self.tree.pack(fill="both", expand=True)
 
+        self.fig = None
+        self.largura_px = 500
+        self.frame_graph.bind("<Configure>", lambda e: setattr(self, "largura_px", max(e.width, 50)), add="+")
+
     def criar_card(self, parent, t, v, c):
         f = ctk.CTkFrame(parent, fg_color="#333333")
         f.grid(row=0, column=c, sticky="ew", padx=5)
@@ -282,77 +356,88 @@ class FrameSumario(ctk.CTkFrame):
         lbl.pack(pady=5)
         return lbl
 
-    def atualizar(self):
-        pl = get_patrimonio_liquido()
-        cota = calcular_valor_cota()
-        
-        # --- CORREÇÃO DO ERRO ---
-        # Busca segura do CAIXA (Se não existir, retorna 0 em vez de crashar)
-        conn = sqlite3.connect(DB_FILE)
-        res = conn.execute("SELECT Qtd FROM ativos WHERE Ticker='CAIXA'").fetchone()
-        conn.close()
-        
-        caixa_val = res[0] if res else 0.0
-        # ------------------------
-        
+    def carregar(self):
+        # O import do backend aquece o matplotlib fora da thread do Tk
+        import matplotlib.backends.backend_tkagg
+        return painel.sumario(db, self.largura_px)
+
+    def exibir(self, dados):
+        pl, cota, caixa_val, cotistas, historico, tirs, risco = dados
         self.card_pl.configure(text=f"R$ {pl:,.2f}")
         self.card_cota.configure(text=f"R$ {cota:.6f}")
         self.card_caixa.configure(text=f"R$ {caixa_val:,.2f}")
+        self.card_tir.configure(text=formatar_taxa(tirs["carteira"]))
+        risco = risco or {}
+        self.card_roi.configure(text=formatar_taxa(risco.get("retorno_total")))
+        self.card_vol.configure(text=formatar_taxa(risco.get("volatilidade_aa")))
+        sharpe = risco.get("sharpe_janela_aa")
+        self.card_sharpe.configure(text="-" if sharpe is None or sharpe != sharpe else f"{sharpe:.2f}")
+        self.card_dd.configure(text=formatar_taxa(risco.get("max_drawdown")))
+        self.btn_cdi.configure(state="normal")
 
         # Tabela
         for i in self.tree.get_children(): self.tree.delete(i)
         
-        conn = sqlite3.connect(DB_FILE)
-        df = pd.read_sql_query("SELECT * FROM cotistas_mov ORDER BY Data ASC, ID ASC", conn)
-        conn.close()
-        
-        posicoes = {}
-        for _, row in df.iterrows():
-            nome = row['Cotista']
-            qtd = row['Qtd_Cotas']
-            ref = row['Cota_Ref']
-            if nome not in posicoes: posicoes[nome] = {'Qtd': 0.0, 'PM': 0.0}
-            
-            p = posicoes[nome]
-            if qtd > 0: # Compra
-                total_atual = p['Qtd'] * p['PM']
-                novo_total = qtd * ref
-                p['Qtd'] += qtd
-                if p['Qtd'] > 0: p['PM'] = (total_atual + novo_total) / p['Qtd']
-            else: # Venda
-                p['Qtd'] += qtd
-                if p['Qtd'] <= 0: p['Qtd'], p['PM'] = 0, 0
-
-        for nome, p in posicoes.items():
-            if p['Qtd'] > 0.001:
-                rent = ((cota - p['PM']) / p['PM']) * 100 if p['PM'] > 0 else 0
-                self.tree.insert("", "end", values=(nome, f"{p['Qtd']:.4f}", f"R$ {p['PM']:.4f}", f"{rent:.2f}%"))
-
-        self.plotar_grafico()
-
-    def plotar_grafico(self):
-        for w in self.frame_graph.winfo_children(): w.destroy()
-        conn = sqlite3.connect(DB_FILE)
-        df = pd.read_sql_query("SELECT * FROM historico_cota ORDER BY Data", conn)
-        conn.close()
-        
-        fig = Figure(figsize=(5,4), dpi=100, facecolor="#2b2b2b")
-        ax = fig.add_subplot(111)
-        ax.set_facecolor("#2b2b2b")
-        if not df.empty:
-            ax.plot(pd.to_datetime(df['Data']), df['Valor_Cota'], color='#00ff00')
-            ax.fill_between(pd.to_datetime(df['Data']), df['Valor_Cota'], alpha=0.1, color='#00ff00')
-        ax.set_title("Evolução da Cota", color="white")
-        ax.tick_params(colors='white')
-        
-        canvas = FigureCanvasTkAgg(fig, master=self.frame_graph)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        for nome, qtd, pm in cotistas:
+            rent = painel.rentabilidade_cotista(cota, pm)
+            self.tree.insert("", "end", values=(nome, f"{qtd:.4f}", f"R$ {pm:.4f}", f"{rent:.2f}%", formatar_taxa(tirs["cotistas"].get(nome))))
+
+        self.plotar_grafico(historico)
+
+    # --- CDI ---
+    def atualizar_cdi(self):
+        self.btn_cdi.configure(state="disabled")
+        def calcular():
+            try: n, erro = benchmark.sincronizar(db), None
+            except OSError as e: n, erro = 0, e
+            return n, erro, self.carregar()
+        self.master.agendador.agendar("Sumario", calcular, self.cdi_atualizado, self.master.falha_atualizacao)
+
+    def cdi_atualizado(self, dados):
+        n, erro, dados = dados
+        self.exibir(dados)
+        if erro: messagebox.showwarning("CDI", f"Sem conexão com o Banco Central ({erro}).\nO gráfico usa o CDI já baixado.")
+
+    # --- GRÁFICO ---
+    def criar_grafico(self):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.fig = Figure(figsize=(5,4), dpi=100, facecolor="#2b2b2b")
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_facecolor("#2b2b2b")
+        self.ax.xaxis_date()
+        self.ax.set_title("Evolução da Cota", color="white")
+        self.ax.tick_params(colors='white')
+        self.linha, = self.ax.plot([], [], color='#00ff00', label="Cota")
+        self.linha_cdi, = self.ax.plot([], [], color='#ffaa00', linestyle="--", label="CDI")
+        self.area = None
+        self.ax.legend(loc="upper left", facecolor="#2b2b2b", labelcolor="white", frameon=False)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame_graph)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    @diagnostico.cronometrado(".plotar_grafico")
+    def plotar_grafico(self, serie):
+        if self.fig is None: self.criar_grafico()
+        if self.area is not None: self.area.remove()
+        self.area = None
+        if serie is None:
+            self.linha.set_data([], [])
+            self.linha_cdi.set_data([], [])
+        else:
+            (x, y), cdi = serie
+            self.linha.set_data(x, y)
+            self.linha_cdi.set_data(*(cdi if cdi is not None else ([], [])))
+            self.area = self.ax.fill_between(x, y, alpha=0.1, color='#00ff00')
+            self.ax.relim()
+            self.ax.autoscale_view()
+        self.canvas.draw_idle()
 
 # ==============================================================================
 # 👥 ABA 2: APORTES E SAQUES (COM DATA E CHECK DE ATIVOS)
 # ==============================================================================
-class FrameCotistas(ctk.CTkFrame):
+class FrameCotistas(Aba, ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master)
         
@@ -390,55 +475,39 @@ class FrameCotistas(ctk.CTkFrame):
         try:
             if not self.entry_nome.get(): return messagebox.showwarning("Erro", "Nome obrigatório")
             float(self.entry_valor.get().replace(",", "."))
-            JanelaAtualizacaoAtivos(self, self.efetivar)
-        except ValueError:
-            messagebox.showerror("Erro", "Valor inválido")
+            data = importacao.data_iso(self.entry_data.get())
+            JanelaAtualizacaoAtivos(self, self.efetivar, data)
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e) if "data" in str(e) else "Valor inválido")
 
+    @diagnostico.cronometrado(".efetivar")
     def efetivar(self):
         try:
-            data = self.entry_data.get()
+            data = importacao.data_iso(self.entry_data.get())
             nome = self.entry_nome.get()
             valor = float(self.entry_valor.get().replace(",", "."))
             tipo = self.cb_tipo.get()
             ticker = self.entry_ativo.get().upper()
             
-            cota = calcular_valor_cota()
-            if cota == 0: cota = 1.0
-            
-            qtd = valor / cota
-            fator = 1 if "Aporte" in tipo else -1
-            qtd_cotas = qtd * fator
-            
-            conn = sqlite3.connect(DB_FILE)
-            conn.execute("INSERT INTO cotistas_mov (Data, Cotista, Tipo, Valor, Cota_Ref, Qtd_Cotas, Ticker_Ref) VALUES (?,?,?,?,?,?,?)",
-                         (data, nome, tipo, valor, cota, qtd_cotas, ticker))
-            
-            # --- CORREÇÃO ---
-            # Garante que o ativo CAIXA existe antes de atualizar
-            conn.execute("INSERT OR IGNORE INTO ativos (Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo) VALUES ('CAIXA', 0, 1, 1, 0, 'Caixa')")
-            conn.execute(f"UPDATE ativos SET Qtd = Qtd + ? WHERE Ticker = 'CAIXA'", (valor * fator,))
-            # ----------------
-            
-            conn.commit()
-            conn.close()
-            registrar_historico_cota(data)
+            with db.transacao() as conn:
+                nucleo.registrar_movimento(conn, data, nome, tipo, valor, ticker)
             messagebox.showinfo("Sucesso", "Registrado!")
             self.atualizar()
             
         except Exception as e: messagebox.showerror("Erro", str(e))
 
-    def atualizar(self):
+    def carregar(self):
+        return db.dataframe("SELECT * FROM cotistas_mov ORDER BY ID DESC LIMIT 20")
+
+    def exibir(self, df):
         for i in self.tree.get_children(): self.tree.delete(i)
-        conn = sqlite3.connect(DB_FILE)
-        df = pd.read_sql_query("SELECT * FROM cotistas_mov ORDER BY ID DESC LIMIT 20", conn)
-        conn.close()
         for _, row in df.iterrows():
             self.tree.insert("", "end", values=(row['Data'], row['Cotista'], row['Tipo'], f"R$ {row['Valor']:,.2f}", f"{row['Qtd_Cotas']:.4f}"))
 
 # ==============================================================================
 # 📈 ABA 3: TRADING (COM DATA)
 # ==============================================================================
-class FrameTrading(ctk.CTkFrame):
+class FrameTrading(Aba, ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master)
         ctk.CTkLabel(self, text="Mesa de Operações", font=("Arial", 18, "bold")).pack(pady=20)
@@ -462,72 +531,381 @@ class FrameTrading(ctk.CTkFrame):
         self.entry_preco = ctk.CTkEntry(self.form, placeholder_text="Preço")
         self.entry_preco.grid(row=0, column=4, padx=5)
         
-        ctk.CTkButton(self.form, text="ENVIAR", command=self.enviar).grid(row=0, column=5, padx=10)
+        self.entry_taxas = ctk.CTkEntry(self.form, placeholder_text="Taxas (R$)")
+        self.entry_taxas.grid(row=0, column=5, padx=5)
+        
+        ctk.CTkButton(self.form, text="ENVIAR", command=self.enviar).grid(row=0, column=6, padx=10)
+        ctk.CTkButton(self.form, text="➕ Boleta", command=self.adicionar_boleta, width=90).grid(row=0, column=7, padx=5)
         
+        # Lupa: sugestões por prefixo enquanto digita o ticker
+        self.lupa = lupa.IndiceTickers([])
+        self.entry_ticker.bind("<KeyRelease>", self.sugerir)
+        self.entry_ticker.bind("<Down>", self.ir_para_sugestoes)
+        cols = ("Ticker", "Qtd", "PM", "Preço", "Data Preço", "P&L (R$)", "P&L %")
+        self.tree_lupa = ttk.Treeview(self, columns=cols, show="headings", height=5)
+        for c in cols:
+            self.tree_lupa.heading(c, text=c)
+            self.tree_lupa.column(c, width=100, anchor="center")
+        self.tree_lupa.tag_configure("ganho", foreground="#00ff00")
+        self.tree_lupa.tag_configure("perda", foreground="#ff5555")
+        self.tree_lupa.bind("<<TreeviewSelect>>", self.escolher_sugestao)
+        self.tree_lupa.bind("<Double-1>", lambda e: self.escolher_sugestao(e, preco=True))
+        self.tree_lupa.bind("<Return>", lambda e: self.escolher_sugestao(e, preco=True))
+        self.tree_lupa.pack(fill="x", padx=10)
+
         self.lbl_caixa = ctk.CTkLabel(self, text="Caixa: R$ 0.00", text_color="#00ff00")
         self.lbl_caixa.pack(pady=10)
 
+        # Boleta: ordens enfileiradas e executadas juntas
+        self.boleta = []  # [(linha, Data, Ticker, Lado, Qtd, Preco, Taxas)]
+        self.proxima_linha = 1
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        ctk.CTkLabel(barra, text="Boleta", font=("Arial", 14, "bold")).pack(side="left", padx=5)
+        self.btn_executar = ctk.CTkButton(barra, text="✅ Executar Boleta (0)", command=self.executar_boleta, state="disabled")
+        self.btn_executar.pack(side="right", padx=5)
+        ctk.CTkButton(barra, text="🧹 Limpar", command=self.limpar_boleta, width=90).pack(side="right", padx=5)
+        ctk.CTkButton(barra, text="🗑️ Remover", command=self.remover_boleta, width=90, fg_color="red").pack(side="right", padx=5)
+        self.lbl_boleta = ctk.CTkLabel(barra, text="")
+        self.lbl_boleta.pack(side="left", padx=10)
+
+        cols = ("#", "Data", "Op", "Ticker", "Qtd", "Preço", "Taxas", "Caixa Projetado", "Posição Projetada", "Situação")
+        self.tree_boleta = ttk.Treeview(self, columns=cols, show="headings", height=12)
+        for c in cols:
+            self.tree_boleta.heading(c, text=c)
+            self.tree_boleta.column(c, width=100, anchor="center")
+        self.tree_boleta.column("#", width=40)
+        self.tree_boleta.column("Situação", width=200, anchor="w")
+        self.tree_boleta.tag_configure("erro", foreground="#ff5555")
+        self.tree_boleta.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Últimos trades: correção só por estorno
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        ctk.CTkLabel(barra, text="Últimos Trades", font=("Arial", 14, "bold")).pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="↩️ Estornar Selecionado", command=self.estornar, fg_color="red").pack(side="right", padx=5)
+        cols = ("ID", "Data", "Ticker", "Lado", "Qtd", "Preço", "Taxas")
+        self.tree_trades = ttk.Treeview(self, columns=cols, show="headings", height=6)
+        for c in cols:
+            self.tree_trades.heading(c, text=c)
+            self.tree_trades.column(c, width=100, anchor="center")
+        self.tree_trades.pack(fill="x", padx=10, pady=(5, 10))
+
+    @diagnostico.cronometrado(".enviar")
     def enviar(self):
         try:
-            op = self.cb_op.get()
-            ticker = self.entry_ticker.get().upper()
-            qtd = int(self.entry_qtd.get())
-            preco = float(self.entry_preco.get().replace(",", "."))
-            total = qtd * preco
+            data, ticker, op, qtd, preco, taxas = self.ler_ordem()
             
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            # --- CORREÇÃO ---
-            # Busca segura de Caixa
-            res = cursor.execute("SELECT Qtd FROM ativos WHERE Ticker='CAIXA'").fetchone()
-            caixa = res[0] if res else 0.0
-            # ----------------
-            
-            if op == "COMPRA":
-                if caixa < total: return messagebox.showerror("Erro", "Sem Caixa")
-                cursor.execute("UPDATE ativos SET Qtd = Qtd - ? WHERE Ticker='CAIXA'", (total,))
-                
-                existe = cursor.execute("SELECT Qtd, Preco_Medio FROM ativos WHERE Ticker=?", (ticker,)).fetchone()
-                if existe:
-                    nova_qtd = existe[0] + qtd
-                    novo_pm = ((existe[0] * existe[1]) + total) / nova_qtd
-                    cursor.execute("UPDATE ativos SET Qtd=?, Preco_Medio=?, Preco_Atual=? WHERE Ticker=?", (nova_qtd, novo_pm, preco, ticker))
-                else:
-                    cursor.execute("INSERT INTO ativos VALUES (?, ?, ?, ?, 0, 'Ação')", (ticker, qtd, preco, preco))
-                    
-            elif op == "VENDA":
-                existe = cursor.execute("SELECT Qtd FROM ativos WHERE Ticker=?", (ticker,)).fetchone()
-                if not existe or existe[0] < qtd: return messagebox.showerror("Erro", "Sem Ativos")
-                
-                # Garante que caixa exista
-                cursor.execute("INSERT OR IGNORE INTO ativos (Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo) VALUES ('CAIXA', 0, 1, 1, 0, 'Caixa')")
-                cursor.execute("UPDATE ativos SET Qtd = Qtd + ? WHERE Ticker='CAIXA'", (total,))
-                
-                nova_qtd = existe[0] - qtd
-                if nova_qtd == 0: cursor.execute("DELETE FROM ativos WHERE Ticker=?", (ticker,))
-                else: cursor.execute("UPDATE ativos SET Qtd=? WHERE Ticker=?", (nova_qtd, ticker))
-
-            conn.commit()
-            conn.close()
-            registrar_historico_cota(self.entry_data.get())
+            try:
+                with db.transacao() as conn:
+                    nucleo.executar_ordem(conn, data, op, ticker, qtd, preco, taxas)
+            except nucleo.ErroEnquadramento as e:
+                if not messagebox.askyesno("Enquadramento", f"{e}\n\nExecutar mesmo assim?"): return
+                with db.transacao() as conn:
+                    nucleo.executar_ordem(conn, data, op, ticker, qtd, preco, taxas, enquadrar=False)
             messagebox.showinfo("Sucesso", "Ordem Executada")
             self.atualizar()
             
+        except nucleo.ErroOperacao as e: messagebox.showerror("Erro", str(e))
         except ValueError: messagebox.showerror("Erro", "Dados inválidos")
 
-    def atualizar(self):
-        conn = sqlite3.connect(DB_FILE)
-        # Busca Segura
-        res = conn.execute("SELECT Qtd FROM ativos WHERE Ticker='CAIXA'").fetchone()
-        conn.close()
-        caixa_val = res[0] if res else 0.0
+    # --- LUPA ---
+    def sugerir(self, event=None):
+        if event is not None and event.keysym in ("Down", "Up", "Return", "Tab"): return
+        for i in self.tree_lupa.get_children(): self.tree_lupa.delete(i)
+        for ticker, qtd, pm, preco, data, pnl, pct in self.lupa.buscar(self.entry_ticker.get()):
+            self.tree_lupa.insert("", "end", iid=ticker, values=(ticker, f"{qtd:g}", f"R$ {pm:,.2f}", f"R$ {preco:,.2f}", data or "-",
+                                                                 f"R$ {pnl:,.2f}", f"{pct:.2f}%"),
+                                  tags=("ganho",) if pnl > 0 else ("perda",) if pnl < 0 else ())
+
+    def ir_para_sugestoes(self, event=None):
+        itens = self.tree_lupa.get_children()
+        if not itens: return
+        self.tree_lupa.focus_set()
+        self.tree_lupa.focus(itens[0])
+        self.tree_lupa.selection_set(itens[0])
+
+    def escolher_sugestao(self, event=None, preco=False):
+        sel = self.tree_lupa.selection()
+        if not sel: return
+        ticker = sel[0]
+        self.entry_ticker.delete(0, "end")
+        self.entry_ticker.insert(0, ticker)
+        if preco:
+            if not self.entry_preco.get().strip(): self.entry_preco.insert(0, f"{self.lupa.dados[ticker][2]:.2f}")
+            self.entry_qtd.focus_set()
+
+    # --- BOLETA ---
+    def ler_ordem(self):
+        op, ticker = self.cb_op.get(), self.entry_ticker.get().strip().upper()
+        qtd = int(self.entry_qtd.get())
+        preco = float(self.entry_preco.get().replace(",", "."))
+        taxas = float(self.entry_taxas.get().replace(",", ".") or 0)
+        return importacao.data_iso(self.entry_data.get()), ticker, op, qtd, preco, taxas
+
+    def adicionar_boleta(self):
+        try: data, ticker, op, qtd, preco, taxas = self.ler_ordem()
+        except ValueError: return messagebox.showerror("Erro", "Dados inválidos")
+        self.boleta.append((self.proxima_linha, data, ticker, op, qtd, preco, taxas))
+        self.proxima_linha += 1
+        for e in (self.entry_ticker, self.entry_qtd, self.entry_preco): e.delete(0, "end")
+        self.entry_ticker.focus_set()
+        self.recarregar()
+
+    def remover_boleta(self):
+        linhas = {int(self.tree_boleta.item(i)["values"][0]) for i in self.tree_boleta.selection()}
+        if not linhas: return messagebox.showinfo("Info", "Selecione ordens da boleta")
+        self.boleta = [o for o in self.boleta if o[0] not in linhas]
+        self.recarregar()
+
+    def limpar_boleta(self):
+        if self.boleta and not messagebox.askyesno("Confirmar", f"Descartar as {len(self.boleta)} ordens da boleta?"): return
+        self.boleta, self.proxima_linha = [], 1
+        self.recarregar()
+
+    @diagnostico.cronometrado(".executar_boleta")
+    def executar_boleta(self):
+        # Tudo ou nada
+        if not self.boleta: return
+        ordens = list(self.boleta)
+        try:
+            try:
+                with db.transacao() as conn:
+                    _, n, datas = nucleo.aplicar_lote(conn, trades=ordens, enquadrar=True)
+            except nucleo.ErroEnquadramento as e:
+                if not messagebox.askyesno("Enquadramento", f"{e}\n\nExecutar a boleta mesmo assim?"): return
+                with db.transacao() as conn:
+                    _, n, datas = nucleo.aplicar_lote(conn, trades=ordens, enquadrar=False)
+        except nucleo.ErroOperacao as e:
+            messagebox.showerror("Erro", f"Boleta não executada (nenhuma ordem gravada):\n{e}")
+            return self.recarregar()
+        self.boleta, self.proxima_linha = [], 1
+        messagebox.showinfo("Sucesso", f"{n} ordens executadas ({len(datas)} data(s)).")
+        self.recarregar()
+
+    def estornar(self):
+        sel = self.tree_trades.selection()
+        if not sel: return messagebox.showinfo("Info", "Selecione o trade a estornar")
+        id_trade, data, ticker, lado, qtd = self.tree_trades.item(sel[0])["values"][:5]
+        if not messagebox.askyesno("Confirmar", f"Lançar o estorno de {lado} {qtd} {ticker} ({data}, trade {id_trade})?"): return
+        try:
+            with db.transacao() as conn: nucleo.estornar_trade(conn, int(id_trade))
+        except nucleo.ErroOperacao as e: return messagebox.showerror("Erro", str(e))
+        messagebox.showinfo("Sucesso", f"Trade {id_trade} estornado")
+        self.atualizar()
+
+    def carregar(self):
+        ordens = list(self.boleta)
+        conn = db.conexao()
+        return (nucleo.resumo_cota(conn)["caixa"], ordens, (nucleo.projetar_boleta(conn, ordens) if ordens else {}),
+                lupa.indice(conn), conn.execute(f"SELECT ID, Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades ORDER BY ID DESC LIMIT {ULTIMOS_TRADES}").fetchall())
+
+    def exibir(self, dados):
+        caixa_val, ordens, projecao, indice, trades = dados
+        for i in self.tree_trades.get_children(): self.tree_trades.delete(i)
+        for id_trade, data, ticker, lado, qtd, preco, taxas in trades:
+            self.tree_trades.insert("", "end", values=(id_trade, data, ticker, lado, f"{qtd:g}", f"R$ {preco:,.2f}", f"R$ {taxas or 0:,.2f}"))
+        if indice is not self.lupa:
+            self.lupa = indice
+            self.sugerir()
         self.lbl_caixa.configure(text=f"Caixa Disponível: R$ {caixa_val:,.2f}")
+        for i in self.tree_boleta.get_children(): self.tree_boleta.delete(i)
+        erros = 0
+        for linha, data, ticker, op, qtd, preco, taxas in ordens:
+            caixa, posicao, erro = projecao[linha]
+            erros += erro is not None
+            self.tree_boleta.insert("", "end", values=(linha, data, op, ticker, qtd, f"R$ {preco:,.2f}", f"R$ {taxas:,.2f}",
+                                                       f"R$ {caixa:,.2f}", f"{posicao:g}", erro or "OK"),
+                                    tags=("erro",) if erro else ())
+        self.btn_executar.configure(text=f"✅ Executar Boleta ({len(ordens)})", state="normal" if ordens and not erros else "disabled")
+        self.lbl_boleta.configure(text=f"{erros} ordem(ns) com erro" if erros else "", text_color="#ff5555")
+
+# ==============================================================================
+# ⚖️ ABA: ENQUADRAMENTO (regras da política de investimentos)
+# ==============================================================================
+class FrameEnquadramento(Aba, ctk.CTkFrame):
+    def __init__(self, master):
+        super().__init__(master)
+        ctk.CTkLabel(self, text="Enquadramento (Limites da Política de Investimentos)", font=("Arial", 18, "bold")).pack(pady=10)
+
+        form = ctk.CTkFrame(self)
+        form.pack(fill="x", padx=10)
+        self.entry_nome = ctk.CTkEntry(form, placeholder_text="Regra (ex.: Art. 7 - Renda Fixa)", width=220)
+        self.entry_nome.pack(side="left", padx=5)
+        self.entry_limite = ctk.CTkEntry(form, placeholder_text="Máx. % do PL", width=100)
+        self.entry_limite.pack(side="left", padx=5)
+        self.entry_tickers = ctk.CTkEntry(form, placeholder_text="Tickers (separados por vírgula)", width=260)
+        self.entry_tickers.pack(side="left", padx=5)
+        ctk.CTkButton(form, text="💾 Salvar", command=self.salvar, width=90).pack(side="left", padx=5)
+        ctk.CTkButton(form, text="🗑️ Remover", command=self.remover, width=90, fg_color="red").pack(side="left", padx=5)
+
+        cols = ("Regra", "Limite", "Exposição", "% PL", "Ativos")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=10)
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=110, anchor="center")
+        self.tree.column("Regra", width=220, anchor="w")
+        self.tree.column("Ativos", width=260, anchor="w")
+        self.tree.tag_configure("estourada", foreground="#ff5555")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tree.bind("<<TreeviewSelect>>", self.ao_selecionar)
+
+        # Auditoria: todas as datas do histórico de cotas
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        ctk.CTkButton(barra, text="🔎 Auditar Histórico", command=self.auditar).pack(side="left", padx=5)
+        self.lbl_auditoria = ctk.CTkLabel(barra, text="")
+        self.lbl_auditoria.pack(side="left", padx=10)
+        cols = ("Data", "Regra", "Limite", "% PL")
+        self.tree_auditoria = ttk.Treeview(self, columns=cols, show="headings", height=8)
+        for c in cols:
+            self.tree_auditoria.heading(c, text=c)
+            self.tree_auditoria.column(c, width=140, anchor="center")
+        self.tree_auditoria.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def ao_selecionar(self, _):
+        sel = self.tree.selection()
+        if not sel: return
+        nome, limite, _, _, tickers = self.tree.item(sel[0])["values"]
+        for entrada, valor in ((self.entry_nome, nome), (self.entry_limite, str(limite).rstrip("%")), (self.entry_tickers, tickers)):
+            entrada.delete(0, "end")
+            entrada.insert(0, str(valor))
+
+    def salvar(self):
+        try:
+            nome = self.entry_nome.get().strip()
+            limite = float(self.entry_limite.get().replace(",", ".").rstrip("%"))
+            tickers = [t.strip().upper() for t in self.entry_tickers.get().split(",") if t.strip()]
+            with db.transacao() as conn:
+                enquadramento.salvar_regra(conn, nome, limite, tickers)
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        self.recarregar()
+
+    def remover(self):
+        nome = self.entry_nome.get().strip()
+        if not nome or not messagebox.askyesno("Confirmar", f"Remover a regra '{nome}'?"): return
+        with db.transacao() as conn:
+            enquadramento.remover_regra(conn, nome)
+        self.recarregar()
+
+    def auditar(self):
+        self.lbl_auditoria.configure(text="Auditando...")
+        self.master.agendador.agendar("Auditoria", lambda: enquadramento.auditar(db.conexao()), self.exibir_auditoria,
+                                      self.master.falha_atualizacao)
+
+    def exibir_auditoria(self, linhas):
+        for i in self.tree_auditoria.get_children(): self.tree_auditoria.delete(i)
+        for data, nome, limite, pct in linhas:
+            self.tree_auditoria.insert("", "end", values=(data, nome, f"{limite:.2f}%", f"{pct:.2f}%"))
+        datas = len({l[0] for l in linhas})
+        self.lbl_auditoria.configure(text=f"{len(linhas)} desenquadramento(s) em {datas} data(s)" if linhas else "Nenhum desenquadramento no histórico")
+
+    def carregar(self):
+        return enquadramento.situacao(db.conexao())
+
+    def exibir(self, linhas):
+        for i in self.tree.get_children(): self.tree.delete(i)
+        for nome, limite, valor, pct, tickers in linhas:
+            self.tree.insert("", "end", values=(nome, f"{limite:.2f}%", f"R$ {valor:,.2f}", f"{pct:.2f}%", tickers),
+                             tags=("estourada",) if pct > limite else ())
+
+# ==============================================================================
+# 📊 ABA: APURAÇÃO (DRE por período fechado)
+# ==============================================================================
+class FrameApuracao(Aba, ctk.CTkFrame):
+    def __init__(self, master):
+        super().__init__(master)
+        ctk.CTkLabel(self, text="Apuração de Rendimento (DRE por Período Fechado)", font=("Arial", 18, "bold")).pack(pady=10)
+
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        hoje = datetime.today()
+        self.entry_ini = ctk.CTkEntry(barra, placeholder_text="Início (YYYY-MM-DD)", width=150)
+        self.entry_ini.insert(0, hoje.replace(day=1).strftime('%Y-%m-%d'))
+        self.entry_ini.pack(side="left", padx=5)
+        self.entry_fim = ctk.CTkEntry(barra, placeholder_text="Fim", width=150)
+        self.entry_fim.insert(0, hoje.strftime('%Y-%m-%d'))
+        self.entry_fim.pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="📊 Apurar", command=self.apurar, width=100).pack(side="left", padx=10)
+        ctk.CTkButton(barra, text="📥 Exportar Período", command=lambda: self.exportar(False)).pack(side="right", padx=5)
+        ctk.CTkButton(barra, text="📅 Relatório Mensal (Histórico)", command=lambda: self.exportar(True)).pack(side="right", padx=5)
+        self.chk_pdf = ctk.CTkCheckBox(barra, text="PDF")
+        self.chk_pdf.pack(side="right", padx=5)
+        self.btn_extratos = ctk.CTkButton(barra, text="🧾 Extratos dos Cotistas", command=self.gerar_extratos)
+        self.btn_extratos.pack(side="right", padx=5)
+
+        cols = ("Ticker", "Saldo Inicial", "Aplicações", "Resgates", "Saldo Final", "Resultado", "Rentab. %")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=20)
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=120, anchor="center")
+        self.tree.tag_configure("total", font=("Arial", 10, "bold"))
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+        self.periodo = self.ler_periodo()  # lido na thread do Tk; carregar() só usa o atributo
+
+    def ler_periodo(self):
+        ini, fim = importacao.data_iso(self.entry_ini.get()), importacao.data_iso(self.entry_fim.get())
+        if ini > fim: raise ValueError("Início depois do fim")
+        return ini, fim
+
+    def apurar(self):
+        try: self.periodo = self.ler_periodo()
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        self.recarregar()
+
+    def carregar(self):
+        import dre
+        return dre.apurar(db.conexao(), *self.periodo)
+
+    def exibir(self, linhas):
+        for i in self.tree.get_children(): self.tree.delete(i)
+        for _, _, ticker, *valores, rent in linhas:
+            self.tree.insert("", "end", values=(ticker, *(f"R$ {v:,.2f}" for v in valores), f"{rent:.2f}%"),
+                             tags=("total",) if ticker == "TOTAL" else ())
+
+    def exportar(self, mensal):
+        from tkinter import filedialog
+        try: ini, fim = self.ler_periodo()
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        caminho = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")],
+                                               initialfile=f"DRE_{'mensal' if mensal else ini + '_' + fim}.xlsx")
+        if not caminho: return
+        try:
+            import dre
+            conn = db.conexao()
+            periodos = dre.meses(conn, fim=fim) if mensal else [(ini, fim)]
+            n = dre.exportar_xlsx(conn, caminho, periodos)
+            messagebox.showinfo("Sucesso", f"{n} linhas exportadas ({len(periodos)} período(s)).")
+        except Exception as e:
+            messagebox.showerror("Erro", str(e))
+
+    def gerar_extratos(self):
+        from tkinter import filedialog
+        try: ini, fim = self.ler_periodo()
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        pasta = filedialog.askdirectory(title="Pasta dos extratos")
+        if not pasta: return
+        formatos = ("xlsx", "csv", "pdf") if self.chk_pdf.get() else ("xlsx", "csv")
+        self.btn_extratos.configure(state="disabled", text="🧾 Gerando...")
+
+        def calcular():
+            import extratos
+            return extratos.gerar(db.conexao(), pasta, ini, fim, formatos)
+
+        def concluir(resultado):
+            self.btn_extratos.configure(state="normal", text="🧾 Extratos dos Cotistas")
+            n, indice = resultado
+            messagebox.showinfo("Sucesso", f"{n} extrato(s) de {ini} a {fim} gravados em {pasta}.\nÍndice: {os.path.basename(indice)}")
+
+        def falhar(erro):
+            self.btn_extratos.configure(state="normal", text="🧾 Extratos dos Cotistas")
+            messagebox.showerror("Erro", f"Falha ao gerar os extratos: {erro}")
+        self.master.agendador.agendar("Extratos", calcular, concluir, falhar)
 
 # ==============================================================================
 # 📝 ABA 4: EDITOR DE REGISTROS (NOVA)
 # ==============================================================================
-class FrameEditor(ctk.CTkFrame):
+class FrameEditor(Aba, ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master)
         
@@ -537,50 +915,125 @@ class FrameEditor(ctk.CTkFrame):
         self.frame_sel.pack(fill="x", padx=10)
         
         ctk.CTkLabel(self.frame_sel, text="Tabela:").pack(side="left", padx=5)
+        # trades se corrige por estorno na Mesa; ativos é só leitura
         self.cb_tabela = ctk.CTkComboBox(self.frame_sel, values=["cotistas_mov", "ativos"], command=self.carregar_dados)
         self.cb_tabela.pack(side="left", padx=5)
         self.cb_tabela.set("cotistas_mov")
         
-        ctk.CTkButton(self.frame_sel, text="🗑️ Excluir Selecionado", command=self.excluir, fg_color="red").pack(side="right", padx=10)
-        ctk.CTkButton(self.frame_sel, text="✏️ Salvar Edição", command=self.salvar_edicao).pack(side="right", padx=10)
+        self.btn_excluir = ctk.CTkButton(self.frame_sel, text="🗑️ Excluir Selecionado", command=self.excluir, fg_color="red")
+        self.btn_excluir.pack(side="right", padx=10)
+        self.btn_salvar = ctk.CTkButton(self.frame_sel, text="✏️ Salvar Edição", command=self.salvar_edicao)
+        self.btn_salvar.pack(side="right", padx=10)
+        ctk.CTkButton(self.frame_sel, text="🔄 Recalcular Saldos", command=self.recalcular_saldos).pack(side="right", padx=10)
+        ctk.CTkButton(self.frame_sel, text="📈 Regerar Cotas", command=self.regerar_cotas).pack(side="right", padx=10)
+
+        # Filtros e ordenação
+        self.frame_filtro = ctk.CTkFrame(self)
+        self.frame_filtro.pack(fill="x", padx=10, pady=(5, 0))
+        self.entry_data_ini = ctk.CTkEntry(self.frame_filtro, placeholder_text="Data de (YYYY-MM-DD)", width=150)
+        self.entry_data_ini.pack(side="left", padx=5)
+        self.entry_data_fim = ctk.CTkEntry(self.frame_filtro, placeholder_text="Data até", width=120)
+        self.entry_data_fim.pack(side="left", padx=5)
+        self.entry_ticker = ctk.CTkEntry(self.frame_filtro, placeholder_text="Ticker", width=90)
+        self.entry_ticker.pack(side="left", padx=5)
+        self.cb_coluna = ctk.CTkComboBox(self.frame_filtro, values=[SEM_FILTRO], width=130)
+        self.cb_coluna.pack(side="left", padx=5)
+        self.cb_coluna.set(SEM_FILTRO)
+        self.entry_valor = ctk.CTkEntry(self.frame_filtro, placeholder_text="começa com...", width=120)
+        self.entry_valor.pack(side="left", padx=5)
+        ctk.CTkLabel(self.frame_filtro, text="Ordenar:").pack(side="left", padx=(15, 5))
+        self.cb_ordem = ctk.CTkComboBox(self.frame_filtro, values=["ID"], width=120)
+        self.cb_ordem.pack(side="left", padx=5)
+        self.chk_desc = ctk.CTkCheckBox(self.frame_filtro, text="Desc")
+        self.chk_desc.pack(side="left", padx=5)
+        ctk.CTkButton(self.frame_filtro, text="🔍 Filtrar", command=self.carregar_dados, width=90).pack(side="left", padx=10)
+        self.lbl_linhas = ctk.CTkLabel(self.frame_filtro, text="", text_color="gray")
+        self.lbl_linhas.pack(side="right", padx=10)
 
-        self.tree = ttk.Treeview(self, show="headings", height=15)
-        self.tree.pack(fill="both", expand=True, padx=10, pady=5)
+        self.frame_tree = ctk.CTkFrame(self, fg_color="transparent")
+        self.frame_tree.pack(fill="both", expand=True, padx=10, pady=5)
+        self.scroll = ttk.Scrollbar(self.frame_tree, orient="vertical")
+        self.scroll.pack(side="right", fill="y")
+        self.tree = ttk.Treeview(self.frame_tree, show="headings", height=15, yscrollcommand=self.ao_rolar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scroll.configure(command=self.tree.yview)
         self.tree.bind("<<TreeviewSelect>>", self.ao_selecionar)
         
         self.frame_edit = ctk.CTkScrollableFrame(self, height=100, orientation="horizontal")
         self.frame_edit.pack(fill="x", padx=10, pady=10)
         self.entradas = {}
-        
-        self.carregar_dados()
+        self.colunas = []
+        self.paginador = Paginador(db, "cotistas_mov")
 
-    def carregar_dados(self, _=None):
+    def configurar(self):
         tabela = self.cb_tabela.get()
+        mudou_tabela = tabela != self.paginador.tabela
+        coluna = self.cb_coluna.get()
+        filtros = {
+            "data_ini": self.entry_data_ini.get().strip(),
+            "data_fim": self.entry_data_fim.get().strip(),
+            "ticker": self.entry_ticker.get().strip(),
+            "coluna": None if mudou_tabela or coluna == SEM_FILTRO else coluna,
+            "valor": self.entry_valor.get(),
+        }
+        ordem = None if mudou_tabela else self.cb_ordem.get()
+        self.paginador = Paginador(db, tabela, filtros, ordem, desc=bool(self.chk_desc.get()))
+        for b in (self.btn_salvar, self.btn_excluir): b.configure(state="normal" if tabela in EDITAVEIS else "disabled")
+
+    def carregar(self):
+        pag = self.paginador
+        return pag, pag.colunas, pag.primeira()
+
+    def exibir(self, dados):
+        pag, cols, linhas = dados
+        if pag is not self.paginador: return
         for i in self.tree.get_children(): self.tree.delete(i)
-        for w in self.frame_edit.winfo_children(): w.destroy()
-        self.entradas = {}
-        
-        conn = sqlite3.connect(DB_FILE)
-        df = pd.read_sql_query(f"SELECT * FROM {tabela}", conn)
-        conn.close()
         
-        if df.empty: return
-        
-        cols = list(df.columns)
-        self.tree["columns"] = cols
-        for c in cols:
-            self.tree.heading(c, text=c)
-            self.tree.column(c, width=100, anchor="center")
-            
-            f = ctk.CTkFrame(self.frame_edit)
-            f.pack(side="left", padx=5)
-            ctk.CTkLabel(f, text=c).pack()
-            e = ctk.CTkEntry(f, width=100)
-            e.pack()
-            self.entradas[c] = e
+        if cols != self.colunas:
+            self.colunas = cols
+            for w in self.frame_edit.winfo_children(): w.destroy()
+            self.entradas = {}
+            self.tree["columns"] = cols
+            for c in cols:
+                self.tree.heading(c, text=c)
+                self.tree.column(c, width=100, anchor="center")
+                
+                f = ctk.CTkFrame(self.frame_edit)
+                f.pack(side="left", padx=5)
+                ctk.CTkLabel(f, text=c).pack()
+                e = ctk.CTkEntry(f, width=100)
+                e.pack()
+                self.entradas[c] = e
+            self.cb_coluna.configure(values=[SEM_FILTRO] + cols)
+            self.cb_coluna.set(SEM_FILTRO)
+            self.cb_ordem.configure(values=list(pag.ordenaveis))
+            self.cb_ordem.set(pag.ordem)
             
-        for _, row in df.iterrows():
+        self.anexar((pag, linhas))
+
+    def anexar(self, dados):
+        pag, linhas = dados
+        if pag is not self.paginador: return
+        for row in linhas:
             self.tree.insert("", "end", values=list(row))
+        n = len(self.tree.get_children())
+        self.lbl_linhas.configure(text=f"{n} linhas" + ("" if pag.fim else "+"))
+
+    def ao_rolar(self, primeiro, ultimo):
+        self.scroll.set(primeiro, ultimo)
+        if float(ultimo) > 0.9: self.mais()
+
+    def mais(self):
+        pag = self.paginador
+        agendador = self.master.agendador
+        if pag.fim or agendador.ocupado("Editor"): return
+        agendador.agendar("Editor", lambda: (pag, pag.proxima()), self.anexar, self.master.falha_atualizacao)
+
+    @diagnostico.cronometrado(".carregar_dados")
+    def carregar_dados(self, _=None):
+        try: self.configurar()
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        self.recarregar()
 
     def ao_selecionar(self, event):
         sel = self.tree.selection()
@@ -593,8 +1046,8 @@ class FrameEditor(ctk.CTkFrame):
             self.entradas[c].insert(0, str(vals[i]))
 
     def salvar_edicao(self):
-        tabela = self.cb_tabela.get()
-        pk = "ID" if tabela == "cotistas_mov" else "Ticker"
+        tabela = self.paginador.tabela
+        pk = self.paginador.pk
         id_val = self.entradas[pk].get()
         
         set_clause = []
@@ -608,36 +1061,277 @@ class FrameEditor(ctk.CTkFrame):
         query = f"UPDATE {tabela} SET {', '.join(set_clause)} WHERE {pk} = ?"
         
         try:
-            conn = sqlite3.connect(DB_FILE)
-            conn.execute(query, params)
-            conn.commit()
-            conn.close()
+            self.gravar(query, params, id_val)
             messagebox.showinfo("Info", "Registro atualizado!")
             self.carregar_dados()
         except Exception as e:
             messagebox.showerror("Erro", str(e))
 
+    def recalcular_saldos(self):
+        if not messagebox.askyesno("Confirmar", "Reconstruir posições, PM e Caixa a partir do histórico de trades e movimentações?"): return
+        try:
+            import recalculo
+            n, caixa = recalculo.recalcular_saldos(db)
+            messagebox.showinfo("Info", f"Saldos recalculados: {n} ativos, Caixa R$ {caixa:,.2f}")
+            self.carregar_dados()
+        except Exception as e:
+            messagebox.showerror("Erro", str(e))
+
+    def regerar_cotas(self):
+        # Usa o período do filtro de datas (vazio = histórico inteiro)
+        ini, fim = self.entry_data_ini.get().strip() or None, self.entry_data_fim.get().strip() or None
+        periodo = f"de {ini or 'início'} até {fim or 'hoje'}"
+        if not messagebox.askyesno("Confirmar", f"Recalcular o histórico de cota {periodo} a partir dos trades, movimentações e preços registrados?"): return
+        try:
+            import recalculo
+            n = recalculo.regenerar_historico_cota(db, ini, fim)
+            messagebox.showinfo("Info", f"Histórico de cota regravado: {n} datas")
+        except Exception as e:
+            messagebox.showerror("Erro", str(e))
+
     def excluir(self):
         sel = self.tree.selection()
         if not sel: return
-        tabela = self.cb_tabela.get()
-        pk = "ID" if tabela == "cotistas_mov" else "Ticker"
-        id_val = self.tree.item(sel[0])['values'][0]
+        tabela = self.paginador.tabela
+        pk = self.paginador.pk
+        id_val = self.tree.item(sel[0])['values'][self.colunas.index(pk)]
         
         if messagebox.askyesno("Confirmar", "Apagar registro?"):
-            conn = sqlite3.connect(DB_FILE)
-            conn.execute(f"DELETE FROM {tabela} WHERE {pk} = ?", (id_val,))
-            conn.commit()
-            conn.close()
+            try: self.gravar(f"DELETE FROM {tabela} WHERE {pk} = ?", (id_val,), id_val)
+            except Exception as e: return messagebox.showerror("Erro", str(e))
             self.carregar_dados()
 
+    def gravar(self, sql, params, id_val):
+        # Edição e reprocessamento no mesmo COMMIT
+        if self.paginador.tabela not in EDITAVEIS: raise nucleo.ErroOperacao(f"{self.paginador.tabela} é só leitura")
+        with db.transacao() as conn:
+            data = lambda: conn.execute("SELECT Data FROM cotistas_mov WHERE ID = ?", (id_val,)).fetchone()
+            antes = data()
+            conn.execute(sql, params)
+            datas = [r[0] for r in (antes, data()) if r and r[0]]
+            if datas: nucleo.reprocessar_movimentos(conn, min(datas))
+
+# ==============================================================================
+# 🏦 ABA: CONSOLIDADO (todas as carteiras do registro)
+# ==============================================================================
+class FrameConsolidado(Aba, ctk.CTkFrame):
+    def __init__(self, master):
+        super().__init__(master)
+        ctk.CTkLabel(self, text="Visão Consolidada das Carteiras", font=("Arial", 18, "bold")).pack(pady=10)
+
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        ctk.CTkButton(barra, text="➕ Adicionar Carteira", command=self.adicionar).pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="➖ Remover do Registro", command=self.remover, fg_color="red").pack(side="left", padx=5)
+        self.lbl_total = ctk.CTkLabel(barra, text="PL Consolidado: R$ 0.00", font=("Arial", 16, "bold"))
+        self.lbl_total.pack(side="right", padx=10)
+
+        self.tree = self.tabela(("Carteira", "PL", "Cota", "Caixa", "% do Total", "Arquivo"), 8)
+        frame_aloc = ctk.CTkFrame(self, fg_color="transparent")
+        frame_aloc.pack(fill="both", expand=True)
+        self.tree_tipo = self.tabela(("Classe", "Valor", "% PL"), 12, frame_aloc, side="left")
+        self.tree_ticker = self.tabela(("Ativo", "Valor", "% PL"), 12, frame_aloc, side="left")
+
+    def tabela(self, cols, altura, pai=None, side=None):
+        tree = ttk.Treeview(pai or self, columns=cols, show="headings", height=altura)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=130, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=10, **({"side": side} if side else {}))
+        return tree
+
+    def adicionar(self):
+        from tkinter import filedialog
+        caminho = filedialog.asksaveasfilename(title="Arquivo da carteira (novo ou existente)", defaultextension=".db",
+                                               filetypes=[("SQLite", "*.db")], confirmoverwrite=False)
+        if not caminho: return
+        nome = ctk.CTkInputDialog(text="Nome da carteira:", title="Nova Carteira").get_input()
+        if not nome: return
+        try: registro.adicionar(nome, caminho)
+        except Exception as e: return messagebox.showerror("Erro", str(e))
+        self.master.atualizar_carteiras()
+        self.recarregar()
+
+    def remover(self):
+        sel = self.tree.selection()
+        if not sel: return messagebox.showinfo("Info", "Selecione uma carteira na tabela")
+        nome = str(self.tree.item(sel[0])["values"][0])
+        if not messagebox.askyesno("Confirmar", f"Tirar '{nome}' do registro? (o arquivo .db não é apagado)"): return
+        try: registro.remover(nome)
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        self.master.atualizar_carteiras()
+        self.recarregar()
+
+    def carregar(self):
+        return dict(registro.carteiras), carteiras.consolidar(dict(registro.carteiras))
+
+    def exibir(self, dados):
+        arquivos, (por_carteira, total) = dados
+        for t in (self.tree, self.tree_tipo, self.tree_ticker):
+            for i in t.get_children(): t.delete(i)
+        for nome, r in por_carteira.items():
+            if "erro" in r:
+                self.tree.insert("", "end", values=(nome, r["erro"], "-", "-", "-", arquivos[nome]))
+                continue
+            self.tree.insert("", "end", values=(nome, f"R$ {r['pl']:,.2f}", f"R$ {r['cota']:.6f}", f"R$ {r['caixa']:,.2f}",
+                                                f"{r['participacao']:.2f}%", arquivos[nome]))
+        for tree, linhas in ((self.tree_tipo, total["por_tipo"]), (self.tree_ticker, total["por_ticker"])):
+            for chave, valor, pct in linhas:
+                tree.insert("", "end", values=(chave, f"R$ {valor:,.2f}", f"{pct:.2f}%"))
+        self.lbl_total.configure(text=f"PL Consolidado: R$ {total['pl']:,.2f}")
+
+# ==============================================================================
+# 🕰️ ABA: POSIÇÃO HISTÓRICA (auditoria por data e ticker)
+# ==============================================================================
+class FrameHistorico(Aba, ctk.CTkFrame):
+    def __init__(self, master):
+        super().__init__(master)
+        ctk.CTkLabel(self, text="Posição Histórica (Auditoria por Data e Ticker)", font=("Arial", 18, "bold")).pack(pady=10)
+
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        self.entry_data = ctk.CTkEntry(barra, placeholder_text="Data (YYYY-MM-DD)", width=150)
+        self.entry_data.insert(0, datetime.today().strftime('%Y-%m-%d'))
+        self.entry_data.pack(side="left", padx=5)
+        self.entry_ticker = ctk.CTkEntry(barra, placeholder_text="Ticker (prefixo, opcional)", width=180)
+        self.entry_ticker.pack(side="left", padx=5)
+        self.entry_ticker.bind("<Return>", lambda _: self.buscar())
+        ctk.CTkButton(barra, text="🔎 Buscar", command=self.buscar, width=100).pack(side="left", padx=10)
+        self.lbl_snapshot = ctk.CTkLabel(barra, text="")
+        self.lbl_snapshot.pack(side="right", padx=10)
+
+        cols = ("Ticker", "Qtd", "Preço Médio", "Preço", "Valor", "% PL")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=16)
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=130, anchor="center")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Trilha: o ticker em cada snapshot até a data
+        cols = ("Data", "Qtd", "Preço Médio", "Preço", "Valor")
+        self.tree_trilha = ttk.Treeview(self, columns=cols, show="headings", height=8)
+        for c in cols:
+            self.tree_trilha.heading(c, text=c)
+            self.tree_trilha.column(c, width=130, anchor="center")
+        self.tree_trilha.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.filtro = (nucleo.hoje(), "")  # lido na thread do Tk; carregar() só usa o atributo
+
+    def buscar(self):
+        try: self.filtro = (importacao.data_iso(self.entry_data.get()), self.entry_ticker.get().strip().upper())
+        except ValueError as e: return messagebox.showerror("Erro", str(e))
+        self.recarregar()
+
+    def carregar(self):
+        data, ticker = self.filtro
+        conn = db.conexao()
+        base, carteira = posicoes.carteira_em(conn, data)
+        linhas = [l for l in carteira if l[0].startswith(ticker)]
+        trilha = posicoes.trilha_ticker(conn, ticker, fim=data) if ticker else []
+        return data, base, sum(l[4] or 0.0 for l in carteira), linhas, trilha
+
+    def exibir(self, dados):
+        data, base, pl, linhas, trilha = dados
+        for t in (self.tree, self.tree_trilha):
+            for i in t.get_children(): t.delete(i)
+        if base is None: return self.lbl_snapshot.configure(text=f"Nenhum snapshot até {data}")
+        self.lbl_snapshot.configure(text=f"Snapshot de {base}" + (f" (último até {data})" if base != data else "") + f"  |  PL R$ {pl:,.2f}")
+        for ticker, qtd, pm, preco, valor in linhas:
+            self.tree.insert("", "end", values=(ticker, f"{qtd:,.4f}", f"R$ {pm or 0:,.4f}", f"R$ {preco or 0:,.4f}",
+                                                f"R$ {valor or 0:,.2f}", f"{(valor or 0) / pl * 100 if pl else 0:.2f}%"))
+        for d, qtd, pm, preco in trilha:
+            self.tree_trilha.insert("", "end", values=(d, f"{qtd:,.4f}", f"R$ {pm or 0:,.4f}", f"R$ {preco or 0:,.4f}", f"R$ {qtd * (preco or 0):,.2f}"))
+
+# ==============================================================================
+# 🩺 ABA: DIAGNÓSTICO (tempos das telas e do banco, consultas lentas, cProfile)
+# ==============================================================================
+class FrameDiagnostico(Aba, ctk.CTkFrame):
+    def __init__(self, master):
+        super().__init__(master)
+        ctk.CTkLabel(self, text="Diagnóstico de Desempenho", font=("Arial", 18, "bold")).pack(pady=10)
+
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10)
+        ctk.CTkButton(barra, text="🔄 Atualizar", command=self.recarregar, width=110).pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="🧹 Zerar", command=self.zerar, width=90).pack(side="left", padx=5)
+        ctk.CTkButton(barra, text="💾 Exportar JSON", command=self.exportar).pack(side="left", padx=5)
+        self.btn_perfil = ctk.CTkButton(barra, text="⏺️ Iniciar cProfile", command=self.alternar_perfil)
+        self.btn_perfil.pack(side="left", padx=5)
+        ctk.CTkLabel(barra, text=f"Consulta lenta: ≥ {diagnostico.LENTA_MS:.0f} ms").pack(side="right", padx=10)
+
+        cols = ("Operação", "N", "p50 (ms)", "p95 (ms)", "Máx (ms)", "Total (ms)")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=14)
+        for c in cols:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=90, anchor="center")
+        self.tree.column("Operação", width=520, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        cols = ("Hora", "ms", "Thread", "SQL")
+        self.tree_lentas = ttk.Treeview(self, columns=cols, show="headings", height=6)
+        for c in cols:
+            self.tree_lentas.heading(c, text=c)
+            self.tree_lentas.column(c, width=110, anchor="center")
+        self.tree_lentas.column("SQL", width=620, anchor="w")
+        self.tree_lentas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.tree_lentas.bind("<<TreeviewSelect>>", self.ao_selecionar)
+
+        self.txt = ctk.CTkTextbox(self, height=160, font=("Consolas", 11))
+        self.txt.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.lentas = []
+
+    def carregar(self):
+        return diagnostico.resumo()
+
+    def exibir(self, dados):
+        operacoes, self.lentas = dados
+        for t in (self.tree, self.tree_lentas):
+            for i in t.get_children(): t.delete(i)
+        for nome, n, p50, p95, maximo, total in operacoes:
+            self.tree.insert("", "end", values=(nome, n, f"{p50:.2f}", f"{p95:.2f}", f"{maximo:.2f}", f"{total:.1f}"))
+        for i, l in enumerate(self.lentas):
+            self.tree_lentas.insert("", "end", iid=str(i), values=(l["hora"], f"{l['ms']:.1f}", l["thread"], l["sql"]))
+
+    def ao_selecionar(self, _):
+        sel = self.tree_lentas.selection()
+        if not sel: return
+        l = self.lentas[int(sel[0])]
+        self.mostrar_texto(f"{l['sql']}\n\nEXPLAIN QUERY PLAN:\n" + "\n".join(f"  {p}" for p in l["plano"]))
+
+    def mostrar_texto(self, texto):
+        self.txt.delete("1.0", "end")
+        self.txt.insert("1.0", texto)
+
+    def zerar(self):
+        diagnostico.limpar()
+        self.recarregar()
+
+    def exportar(self):
+        from tkinter import filedialog
+        caminho = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")],
+                                               initialfile=f"diagnostico_{datetime.now():%Y%m%d_%H%M%S}.json")
+        if not caminho: return
+        try: diagnostico.exportar(caminho)
+        except OSError as e: return messagebox.showerror("Erro", str(e))
+        messagebox.showinfo("Sucesso", f"Diagnóstico salvo em {caminho}")
+
+    def alternar_perfil(self):
+        if not diagnostico.perfilando():
+            if not diagnostico.iniciar_perfil(): return messagebox.showerror("Erro", "Outro perfilador já está ativo neste processo")
+            self.btn_perfil.configure(text="⏹️ Parar e Salvar cProfile", fg_color="red")
+            return
+        caminho = obter_caminho_externo(f"perfil_{datetime.now():%Y%m%d_%H%M%S}.prof")
+        try: texto = diagnostico.parar_perfil(caminho)
+        except OSError as e: texto = f"Falha ao salvar o perfil: {e}"
+        self.btn_perfil.configure(text="⏺️ Iniciar cProfile", fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        self.mostrar_texto(f"Perfil salvo em {caminho} (abrir com pstats/snakeviz)\n\n{texto}")
+
 # ==============================================================================
 # APP PRINCIPAL
 # ==============================================================================
 class AppCotas(ctk.CTk):
     def __init__(self):
         super().__init__()
-        self.title("Sistema de Gestão de Fundo")
+        self.title(f"Sistema de Gestão de Fundo - {registro.ativa}")
         self.geometry("1920x1080")
         init_db()
         
@@ -653,8 +1347,19 @@ class AppCotas(ctk.CTk):
         self.btn_sumario = self.menu_btn("🏠 Sumário", lambda: self.show("Sumario"))
         self.btn_cotistas = self.menu_btn("👥 Aportes/Saques", lambda: self.show("Cotistas"))
         self.btn_trading = self.menu_btn("📈 Trading", lambda: self.show("Trading"))
+        self.btn_enquadramento = self.menu_btn("⚖️ Enquadramento", lambda: self.show("Enquadramento"))
+        self.btn_apuracao = self.menu_btn("📉 Apuração (DRE)", lambda: self.show("Apuracao"))
         self.btn_editor = self.menu_btn("📝 Editor BD", lambda: self.show("Editor"))
+        self.btn_historico = self.menu_btn("🕰️ Posição Histórica", lambda: self.show("Historico"))
         
+        self.btn_consolidado = self.menu_btn("🏦 Consolidado", lambda: self.show("Consolidado"))
+        self.btn_diagnostico = self.menu_btn("🩺 Diagnóstico", lambda: self.show("Diagnostico"))
+
+        ctk.CTkLabel(self.sidebar, text="--- Carteira ---").pack(pady=10)
+        self.cb_carteira = ctk.CTkComboBox(self.sidebar, values=registro.nomes(), command=self.trocar_carteira)
+        self.cb_carteira.set(registro.ativa)
+        self.cb_carteira.pack(pady=5, padx=10, fill="x")
+
         ctk.CTkLabel(self.sidebar, text="--- Sistema ---").pack(pady=10)
         self.menu_btn("☁️ Checar Updates", self.checar_updates)
 
@@ -662,9 +1367,45 @@ class AppCotas(ctk.CTk):
             "Sumario": FrameSumario(self),
             "Cotistas": FrameCotistas(self),
             "Trading": FrameTrading(self),
-            "Editor": FrameEditor(self)
+            "Enquadramento": FrameEnquadramento(self),
+            "Apuracao": FrameApuracao(self),
+            "Editor": FrameEditor(self),
+            "Historico": FrameHistorico(self),
+            "Consolidado": FrameConsolidado(self),
+            "Diagnostico": FrameDiagnostico(self)
         }
+        self.aba = "Sumario"
+        self.agendador = Agendador(self)
+        self.interativo = False
+        marcar_fase("app")
         self.show("Sumario")
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+
+    def fechar(self):
+        self.agendador.encerrar()
+        registro.fechar()
+        self.destroy()
+
+    # --- CARTEIRAS ---
+    def atualizar_carteiras(self):
+        self.cb_carteira.configure(values=registro.nomes())
+        self.cb_carteira.set(registro.ativa)
+
+    def trocar_carteira(self, nome):
+        global db
+        if nome == registro.ativa: return
+        # O que estava carregando da carteira anterior é descartado
+        for chave in list(self.frames): self.agendador.cancelar(chave)
+        try:
+            nucleo.preparar_banco(registro.banco(nome))
+            novo = registro.ativar(nome)
+        except Exception as e:
+            self.atualizar_carteiras()
+            return messagebox.showerror("Erro", f"Falha ao abrir a carteira: {e}")
+        db = novo
+        self.title(f"Sistema de Gestão de Fundo - {nome}")
+        self.frames["Editor"].configurar()
+        self.show(self.aba)
 
     def menu_btn(self, t, c):
         btn = ctk.CTkButton(self.sidebar, text=t, command=c, fg_color="transparent", anchor="w", height=40)
@@ -672,10 +1413,25 @@ class AppCotas(ctk.CTk):
         return btn
 
     def show(self, name):
+        self.aba = name
         for f in self.frames.values(): f.grid_forget()
         self.frames[name].grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
-        if hasattr(self.frames[name], "atualizar"): self.frames[name].atualizar()
-        if hasattr(self.frames[name], "carregar_dados"): self.frames[name].carregar_dados()
+        self.agendador.cancelar_outros(name)
+        self.recarregar(name)
+
+    def recarregar(self, name):
+        frame = self.frames[name]
+        self.agendador.agendar(name, frame.carregar, lambda dados: self.exibir_aba(frame, dados), self.falha_atualizacao)
+
+    def exibir_aba(self, frame, dados):
+        frame.exibir(dados)
+        if not self.interativo:
+            self.interativo = True
+            marcar_fase("interativo")
+            salvar_fases()
+
+    def falha_atualizacao(self, erro):
+        messagebox.showerror("Erro", f"Falha ao atualizar: {erro}")
 
     def checar_updates(self):
         try:
@@ -693,6 +1449,8 @@ class AppCotas(ctk.CTk):
             messagebox.showerror("Erro", f"Falha ao verificar: {e}")
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # pool do consolidado no executável (PyInstaller)
     ctk.set_appearance_mode("Dark")
     app = SplashWithLog()
     app.mainloop()
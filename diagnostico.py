@@ -0,0 +1,236 @@
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# ==============================================================================
+# 🩺 DIAGNÓSTICO (tempos por operação, consultas lentas, cProfile sob demanda)
+# ==============================================================================
+# Por operação nomeada: últimas AMOSTRAS durações (p50/p95), máximo, total e
+# histograma. Consultas acima de LENTA_MS vão para o log com o EXPLAIN QUERY PLAN.
+# CARTEIRA_DIAGNOSTICO=0 desliga a medição das consultas.
+ATIVO = os.environ.get("CARTEIRA_DIAGNOSTICO", "1") != "0"
+AMOSTRAS = 2048
+LENTA_MS = 50.0
+MAX_LENTAS = 200
+FAIXAS_MS = [2 ** i for i in range(-2, 14)]  # 0.25 ms ... 8 s
+SEM_PLANO = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "EXPLAIN", "ANALYZE", "CREATE", "DROP", "ALTER")
+
+
+class Estatistica:
+    def __init__(self):
+        self.amostras = deque(maxlen=AMOSTRAS)
+        self.n = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.faixas = [0] * (len(FAIXAS_MS) + 1)
+
+    def adicionar(self, ms):
+        self.amostras.append(ms)
+        self.n += 1
+        self.total += ms
+        self.maximo = max(self.maximo, ms)
+        self.faixas[bisect.bisect_right(FAIXAS_MS, ms)] += 1
+
+    def percentil(self, p):
+        ordenadas = sorted(self.amostras)
+        return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))] if ordenadas else 0.0
+
+
+_estatisticas = {}
+_lentas = deque(maxlen=MAX_LENTAS)
+_lock = threading.Lock()
+
+def registrar(nome, ms):
+    with _lock:
+        est = _estatisticas.get(nome)
+        if est is None: est = _estatisticas[nome] = Estatistica()
+        est.adicionar(ms)
+
+@contextmanager
+def medir(nome):
+    t0 = time.perf_counter()
+    try: yield
+    finally: registrar(nome, (time.perf_counter() - t0) * 1000)
+
+def medido(nome, func):
+    # func embrulhada: mede cada chamada e, com o cProfile ligado, perfila também fora da thread do Tk
+    def rodar(*args, **kwargs):
+        with medir(nome):
+            return _perfilar(func, *args, **kwargs)
+    return rodar
+
+def cronometrado(nome):
+    # Decorador de métodos: o nome da operação fica "Classe.metodo" quando nome começa com "."
+    def decorar(func):
+        def rodar(*args, **kwargs):
+            rotulo = type(args[0]).__name__.replace("Frame", "") + nome if nome.startswith(".") and args else nome
+            with medir(rotulo):
+                return func(*args, **kwargs)
+        rodar.__name__, rodar.__doc__ = func.__name__, func.__doc__
+        return rodar
+    return decorar
+
+# --- SQL ---
+_rotulos = {}  # SQL -> (rótulo do execute, rótulo do fetch); as mesmas poucas SQLs se repetem, evita a regex a cada consulta
+
+def _rotulos_sql(sql):
+    rotulos = _rotulos.get(sql)
+    if rotulos is None:
+        texto = re.sub(r"\s+", " ", sql).strip()[:160]
+        rotulos = ("sql: " + texto, "sql (fetch): " + texto)
+        if len(_rotulos) < 10000: _rotulos[sql] = rotulos
+    return rotulos
+
+_agora = time.perf_counter
+_execute, _executemany = sqlite3.Cursor.execute, sqlite3.Cursor.executemany
+_fetchone, _fetchmany, _fetchall = sqlite3.Cursor.fetchone, sqlite3.Cursor.fetchmany, sqlite3.Cursor.fetchall
+
+class CursorMedido(sqlite3.Cursor):
+    # Caminho curto de propósito (métodos do sqlite3 já resolvidos): a medição roda em toda consulta.
+    # Nada é adiado para o coletor de lixo: cada chamada registra o próprio tempo ao terminar
+    _sql, _params = None, ()
+
+    def execute(self, sql, params=()):
+        t0 = _agora()
+        try: return _execute(self, sql, params)
+        finally:
+            self._sql, self._params = sql, params
+            self._medir(0, _agora() - t0)
+
+    def executemany(self, sql, seq):
+        t0 = _agora()
+        try: return _executemany(self, sql, seq)
+        finally:
+            self._sql, self._params = sql, None
+            self._medir(0, _agora() - t0)
+
+    def fetchone(self):
+        t0 = _agora()
+        try: return _fetchone(self)
+        finally: self._medir(1, _agora() - t0)
+
+    def fetchmany(self, size=None):
+        t0 = _agora()
+        try: return _fetchmany(self, self.arraysize if size is None else size)
+        finally: self._medir(1, _agora() - t0)
+
+    def fetchall(self):
+        t0 = _agora()
+        try: return _fetchall(self)
+        finally: self._medir(1, _agora() - t0)
+
+    def _medir(self, fase, segundos):
+        if self._sql is None: return
+        ms = segundos * 1000
+        registrar(_rotulos_sql(self._sql)[fase], ms)
+        if ms >= LENTA_MS: _registrar_lenta(self.connection, self._sql, self._params, ms)
+
+def _registrar_lenta(conn, sql, params, ms):
+    plano = []
+    if params is not None and not sql.lstrip().upper().startswith(SEM_PLANO):
+        try: plano = [r[3] for r in sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params)]
+        except sqlite3.Error as e: plano = [f"(sem plano: {e})"]
+    with _lock:
+        _lentas.append({"hora": datetime.now().isoformat(timespec="seconds"), "ms": round(ms, 2),
+                        "sql": re.sub(r"\s+", " ", sql).strip(), "plano": plano, "thread": threading.current_thread().name})
+
+class ConexaoMedida(sqlite3.Connection):
+    # Fábrica de conexão para banco.py: toda consulta passa por CursorMedido
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+def fabrica_conexao():
+    return ConexaoMedida if ATIVO else sqlite3.Connection
+
+# --- cPROFILE ---
+# Até o 3.11 cada Profile só vê a sua thread: um para o Tk e um por chamada nas
+# threads do agendador. Do 3.12 em diante (sys.monitoring) só cabe um por processo
+# e ele já vê todas as threads.
+_perfis = None  # lista de cProfile.Profile enquanto o perfil está ligado
+_perfil_tk = None
+UM_PERFIL = sys.version_info >= (3, 12)
+
+def perfilando():
+    return _perfis is not None
+
+def iniciar_perfil():
+    # Perfil da thread que chamou (Tk) + um por chamada medida nas threads do agendador (até o 3.11).
+    # False se outro perfilador (depurador, IDE) já ocupa o processo
+    global _perfis, _perfil_tk
+    if _perfis is not None: return True
+    perfil = cProfile.Profile()
+    try: perfil.enable()
+    except ValueError: return False
+    _perfis, _perfil_tk = [], perfil
+    return True
+
+def _perfilar(func, *args, **kwargs):
+    perfis = _perfis
+    if perfis is None or UM_PERFIL or threading.current_thread() is threading.main_thread(): return func(*args, **kwargs)
+    p = cProfile.Profile()
+    try: p.enable()
+    except ValueError: return func(*args, **kwargs)
+    try: return func(*args, **kwargs)
+    finally:
+        p.disable()
+        with _lock: perfis.append(p)
+
+def parar_perfil(caminho):
+    # Grava o .prof (pstats / snakeviz) e devolve o top 30 por tempo acumulado em texto
+    global _perfis, _perfil_tk
+    if _perfis is None: return ""
+    _perfil_tk.disable()
+    with _lock: perfis, _perfis = _perfis, None
+    stats = pstats.Stats(_perfil_tk)
+    _perfil_tk = None
+    for p in perfis: stats.add(p)
+    stats.dump_stats(caminho)
+    texto = io.StringIO()
+    pstats.Stats(caminho, stream=texto).sort_stats("cumulative").print_stats(30)
+    return texto.getvalue()
+
+# --- LEITURA (aba Diagnóstico) ---
+def resumo():
+    # [(nome, n, p50, p95, máx, total)] por total decrescente e a lista de consultas lentas (mais recentes primeiro)
+    with _lock:
+        itens = [(nome, e.n, e.percentil(50), e.percentil(95), e.maximo, e.total) for nome, e in _estatisticas.items()]
+        lentas = list(reversed(_lentas))
+    return sorted(itens, key=lambda x: -x[5]), lentas
+
+def histogramas():
+    with _lock:
+        return {nome: dict(zip([f"<{f}ms" for f in FAIXAS_MS] + [f">={FAIXAS_MS[-1]}ms"], e.faixas))
+                for nome, e in _estatisticas.items()}
+
+def limpar():
+    with _lock:
+        _estatisticas.clear()
+        _lentas.clear()
+
+def exportar(caminho):
+    operacoes, lentas = resumo()
+    dados = {
+        "gerado": datetime.now().isoformat(timespec="seconds"),
+        "operacoes": [dict(zip(("nome", "n", "p50_ms", "p95_ms", "max_ms", "total_ms"), o)) for o in operacoes],
+        "histogramas": histogramas(),
+        "lentas": lentas,
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import nucleo
+
+# ==============================================================================
+# 📉 APURAÇÃO DE RENDIMENTO (DRE por período fechado)
+# ==============================================================================
+# Resultado = Saldo Final + Resgates - Aplicações - Saldo Inicial, por ativo.
+# Fluxos pela diferença de duas linhas de fluxo_acumulado (busca no índice).
+COLUNAS = ("Início", "Fim", "Ticker", "Saldo Inicial", "Aplicações", "Resgates", "Saldo Final", "Resultado", "Rentab. %")
+
+
+def _acumulado(conn, ticker, data):
+    linha = conn.execute("SELECT Qtd, Compras, Vendas FROM fluxo_acumulado WHERE Ticker = ? AND Data <= ? ORDER BY Data DESC LIMIT 1",
+                         (ticker, data)).fetchone()
+    return linha or (0.0, 0.0, 0.0)
+
+def preco_em(conn, ticker, data):
+    fechamento = conn.execute("SELECT Data, Preco FROM precos_historico WHERE Ticker = ? AND Data <= ? ORDER BY Data DESC LIMIT 1",
+                              (ticker, data)).fetchone()
+    compra = conn.execute("SELECT Data, Preco FROM trades WHERE Ticker = ? AND Data <= ? AND Lado != 'VENDA' ORDER BY Data DESC, ID DESC LIMIT 1",
+                          (ticker, data)).fetchone()
+    if fechamento and (not compra or fechamento[0] >= compra[0]): return fechamento[1]
+    return compra[1] if compra else 0.0
+
+def tickers(conn):
+    return [r[0] for r in conn.execute("SELECT DISTINCT Ticker FROM fluxo_acumulado ORDER BY Ticker")]
+
+def rentabilidade(resultado, saldo_inicial, aplicacoes):
+    base = saldo_inicial + aplicacoes
+    return resultado / base * 100 if base > 0 else 0.0
+
+def apurar(conn, ini, fim, lista_tickers=None):
+    # Linhas (Início, Fim, Ticker, ...) dos ativos com saldo ou movimento no período, mais o TOTAL
+    vespera = (date.fromisoformat(ini) - timedelta(days=1)).isoformat()
+    linhas, total = [], [0.0] * 5
+    for ticker in (lista_tickers if lista_tickers is not None else tickers(conn)):
+        q0, c0, v0 = _acumulado(conn, ticker, vespera)
+        q1, c1, v1 = _acumulado(conn, ticker, fim)
+        aplicacoes, resgates = c1 - c0, v1 - v0
+        if not (q0 or q1 or aplicacoes or resgates): continue
+        saldo_ini = q0 * preco_em(conn, ticker, vespera) if q0 else 0.0
+        saldo_fim = q1 * preco_em(conn, ticker, fim) if q1 else 0.0
+        resultado = saldo_fim + resgates - aplicacoes - saldo_ini
+        valores = (saldo_ini, aplicacoes, resgates, saldo_fim, resultado)
+        total = [a + b for a, b in zip(total, valores)]
+        linhas.append((ini, fim, ticker, *valores, rentabilidade(resultado, saldo_ini, aplicacoes)))
+    linhas.append((ini, fim, "TOTAL", *total, rentabilidade(total[4], total[0], total[1])))
+    return linhas
+
+def meses(conn, ini=None, fim=None):
+    # Períodos mensais [dia 1, último dia] cobrindo o livro de trades (ou [ini, fim])
+    ini = ini or conn.execute("SELECT MIN(Data) FROM trades").fetchone()[0] or nucleo.hoje()
+    fim = fim or nucleo.hoje()
+    periodos = []
+    atual = date.fromisoformat(ini).replace(day=1)
+    ultimo = date.fromisoformat(fim)
+    while atual <= ultimo:
+        proximo = (atual + timedelta(days=32)).replace(day=1)
+        periodos.append((atual.isoformat(), min(proximo - timedelta(days=1), ultimo).isoformat()))
+        atual = proximo
+    return periodos
+
+def exportar_xlsx(conn, caminho, periodos):
+    # Planilha em modo write_only: cada linha vai direto para o arquivo, a memória não cresce com o histórico
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("DRE")
+    ws.append(COLUNAS)
+    lista = tickers(conn)
+    n = 0
+    for ini, fim in periodos:
+        for linha in apurar(conn, ini, fim, lista):
+            ws.append([*linha[:3], *(round(v, 2) for v in linha[3:])])
+            n += 1
+    wb.save(caminho)
+    return n
@@ -0,0 +1,95 @@
+# ==============================================================================
+# ⚖️ ENQUADRAMENTO (limites da política de investimentos)
+# ==============================================================================
+# regras (Limite_Pct = máximo em % do PL) e os tickers de cada uma em
+# regras_ativos. regras_exposicao guarda a soma de cada regra (e do PL em
+# Regra_ID = 0), mantida por gatilhos (migração 011).
+PL = 0
+EPS = 1e-9
+
+
+def percentual(valor, pl):
+    return valor / pl * 100 if pl > 0 else 0.0
+
+# --- EXPOSIÇÃO ATUAL ---
+def exposicoes(conn):
+    # (PL, [(ID, Nome, Limite_Pct, Valor)])
+    pl = conn.execute("SELECT Valor FROM regras_exposicao WHERE Regra_ID = ?", (PL,)).fetchone()
+    regras = conn.execute("SELECT r.ID, r.Nome, r.Limite_Pct, e.Valor FROM regras r "
+                          "JOIN regras_exposicao e ON e.Regra_ID = r.ID ORDER BY r.Nome").fetchall()
+    return (pl[0] if pl else 0.0), regras
+
+def situacao(conn):
+    # [(Nome, Limite_Pct, Valor, % do PL, "TICK1, TICK2")] para a tela
+    pl, regras = exposicoes(conn)
+    vinculos = dict(conn.execute("SELECT Regra_ID, GROUP_CONCAT(Ticker, ', ') FROM "
+                                 "(SELECT Regra_ID, Ticker FROM regras_ativos ORDER BY Ticker) GROUP BY Regra_ID"))
+    return [(nome, limite, valor, percentual(valor, pl), vinculos.get(i, "")) for i, nome, limite, valor in regras]
+
+# --- PRÉ-TRADE ---
+def simular(conn, variacoes, atual=None):
+    # variacoes: {Ticker: variação de Qtd x Preco_Atual}; exposicoes() depois da operação, sem gravar nada
+    pl, regras = atual or exposicoes(conn)
+    if not variacoes: return pl, regras
+    delta = {}
+    marcas = ", ".join("?" * len(variacoes))
+    for regra, ticker in conn.execute(f"SELECT Regra_ID, Ticker FROM regras_ativos WHERE Ticker IN ({marcas})", list(variacoes)):
+        delta[regra] = delta.get(regra, 0.0) + variacoes[ticker]
+    return pl + sum(variacoes.values()), [(i, nome, limite, valor + delta.get(i, 0.0)) for i, nome, limite, valor in regras]
+
+def violacoes(antes, depois):
+    # [(Nome, Limite_Pct, % depois)] das regras acima do limite cuja exposição a operação aumentou
+    valor_antes = {r[0]: r[3] for r in antes[1]}
+    pl = depois[0]
+    return [(nome, limite, percentual(valor, pl)) for i, nome, limite, valor in depois[1]
+            if percentual(valor, pl) > limite + EPS and valor > valor_antes.get(i, 0.0) + EPS]
+
+# --- CADASTRO ---
+def salvar_regra(conn, nome, limite, tickers):
+    # Cria ou atualiza a regra e troca os vínculos; os gatilhos refazem a exposição dela
+    if not nome: raise ValueError("Regra sem nome")
+    if not 0 < limite <= 100: raise ValueError("Limite deve estar entre 0 e 100%")
+    conn.execute("INSERT INTO regras (Nome, Limite_Pct) VALUES (?, ?) ON CONFLICT(Nome) DO UPDATE SET Limite_Pct = excluded.Limite_Pct",
+                 (nome, limite))
+    regra = conn.execute("SELECT ID FROM regras WHERE Nome = ?", (nome,)).fetchone()[0]
+    conn.execute("DELETE FROM regras_ativos WHERE Regra_ID = ?", (regra,))
+    conn.executemany("INSERT OR IGNORE INTO regras_ativos (Regra_ID, Ticker) VALUES (?, ?)", [(regra, t) for t in tickers])
+    return regra
+
+def remover_regra(conn, nome):
+    return conn.execute("DELETE FROM regras WHERE Nome = ?", (nome,)).rowcount
+
+def reconstruir(conn):
+    # Somas do zero (migração; corrige qualquer deriva de arredondamento)
+    conn.execute("INSERT OR REPLACE INTO regras_exposicao (Regra_ID, Valor) SELECT ?, COALESCE(SUM(Qtd * Preco_Atual), 0) FROM ativos", (PL,))
+    conn.execute('''
+        INSERT OR REPLACE INTO regras_exposicao (Regra_ID, Valor)
+        SELECT r.ID, COALESCE((SELECT SUM(a.Qtd * a.Preco_Atual) FROM regras_ativos v JOIN ativos a ON a.Ticker = v.Ticker
+                               WHERE v.Regra_ID = r.ID), 0)
+        FROM regras r
+    ''')
+
+# --- AUDITORIA (lote) ---
+def auditar(conn, ini=None, fim=None):
+    # [(Data, Regra, Limite_Pct, % do PL)] de cada snapshot de historico_cota fora do limite
+    import numpy as np
+    import recalculo
+    regras = conn.execute("SELECT ID, Nome, Limite_Pct FROM regras ORDER BY Nome").fetchall()
+    datas = [r[0] for r in conn.execute("SELECT Data FROM historico_cota WHERE Data >= ? AND Data <= ? ORDER BY Data",
+                                        (ini or "", fim or "9999-12-31"))]
+    m = recalculo.matrizes(conn, ini, fim) if regras and datas else None
+    if m is None: return []
+    grade, tickers, qtd, preco, caixa, _, _ = m
+    linhas = np.searchsorted(grade, datas)  # toda data do histórico está na grade
+    valores = np.column_stack([np.nan_to_num(qtd[linhas] * preco[linhas]), caixa[linhas]])  # datas x (tickers + CAIXA)
+    pl = valores.sum(axis=1)
+
+    coluna = {t: j for j, t in enumerate([*tickers, "CAIXA"])}
+    posicao = {r[0]: k for k, r in enumerate(regras)}
+    vinculo = np.zeros((len(coluna), len(regras)))
+    for regra, ticker in conn.execute("SELECT Regra_ID, Ticker FROM regras_ativos"):
+        if ticker in coluna: vinculo[coluna[ticker], posicao[regra]] = 1.0
+    pct = np.divide(valores @ vinculo * 100, pl[:, None], out=np.zeros((len(datas), len(regras))), where=pl[:, None] > 0)
+    limites = np.array([r[2] for r in regras], dtype=float)
+    i, k = np.nonzero(pct > limites + EPS)
+    return [(datas[a], regras[b][1], regras[b][2], float(pct[a, b])) for a, b in zip(i, k)]
@@ -0,0 +1,194 @@
+import csv
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import groupby, islice
+
+import posicoes
+
+# ==============================================================================
+# 🧾 EXTRATOS DOS COTISTAS (lote mensal)
+# ==============================================================================
+# Um extrato por cotista para [ini, fim]: saldo inicial, movimentos, saldo final
+# e resultado. Os arquivos são montados num pool de processos como o consolidado.
+FORMATOS = ("xlsx", "csv", "pdf")
+MIN_PARALELO = 8      # menos extratos que isso (ou um núcleo só): monta no próprio processo
+EXTRATOS_POR_LOTE = 8  # extratos por envio ao pool
+EM_VOO = 2             # lotes enviados e não concluídos, por processo
+LINHAS_POR_PAGINA = 55
+
+
+def _dia_anterior(iso):
+    return (date.fromisoformat(iso) - timedelta(days=1)).isoformat()
+
+def mes_fechado(hoje=None):
+    # (dia 1, último dia) do mês anterior ao de `hoje`: o período do lote mensal
+    fim = (hoje or date.today()).replace(day=1) - timedelta(days=1)
+    return fim.replace(day=1).isoformat(), fim.isoformat()
+
+def cota_ate(conn, data):
+    # (Data, Valor_Cota) do último snapshot <= data; None antes do primeiro
+    return conn.execute("SELECT Data, Valor_Cota FROM historico_cota WHERE Data <= ? ORDER BY Data DESC LIMIT 1", (data,)).fetchone()
+
+# --- MONTAGEM (processo principal, uma leitura do livro) ---
+def montar(conn, ini, fim):
+    # Gera um dicionário por cotista com posição ou movimento no período
+    base_ini, base_fim = cota_ate(conn, _dia_anterior(ini)), cota_ate(conn, fim)
+    cota_ini, cota_fim = (base_ini[1] if base_ini else 0.0), (base_fim[1] if base_fim else 0.0)
+    livro = conn.execute("SELECT Cotista, Data, Tipo, Valor, Cota_Ref, Qtd_Cotas FROM cotistas_mov WHERE Data <= ? "
+                         "ORDER BY Cotista, Data, ID", (fim,))
+    for nome, movs in groupby(livro, key=lambda r: r[0]):
+        qtd = pm = 0.0
+        inicial, linhas, aportes, resgates = None, [], 0.0, 0.0
+        for _, data, tipo, valor, ref, q in movs:
+            if data >= ini and inicial is None: inicial = (qtd, pm)
+            qtd, pm = posicoes.aplicar_movimento(qtd, pm, q or 0.0, ref or 0.0)
+            if data < ini: continue
+            linhas.append((data, tipo, valor or 0.0, ref or 0.0, q or 0.0, qtd))
+            if (q or 0.0) > 0: aportes += valor or 0.0
+            else: resgates += valor or 0.0
+        qtd_ini, pm_ini = inicial or (qtd, pm)
+        if not linhas and qtd_ini <= posicoes.TOLERANCIA: continue
+        saldo_ini, saldo_fim = qtd_ini * cota_ini, qtd * cota_fim
+        yield {
+            "cotista": nome, "ini": ini, "fim": fim,
+            "data_cota_ini": base_ini and base_ini[0], "cota_ini": cota_ini,
+            "data_cota_fim": base_fim and base_fim[0], "cota_fim": cota_fim,
+            "qtd_ini": qtd_ini, "pm_ini": pm_ini, "saldo_ini": saldo_ini,
+            "movimentos": linhas, "aportes": aportes, "resgates": resgates,
+            "qtd_fim": qtd, "pm_fim": pm, "saldo_fim": saldo_fim,
+            "resultado": saldo_fim + resgates - aportes - saldo_ini,
+            "rentab_cota": (cota_fim / cota_ini - 1) * 100 if cota_ini else None,
+            "rentab_pm": (cota_fim / pm - 1) * 100 if pm > 0 else None,
+        }
+
+# --- RENDERIZAÇÃO (processos do pool) ---
+def _pct(v):
+    return "-" if v is None else f"{v:.4f}%"
+
+def tabela(e):
+    # Linhas do extrato, as mesmas para XLSX, CSV e PDF
+    linhas = [
+        ["Extrato do Cotista", e["cotista"]],
+        ["Período", f"{e['ini']} a {e['fim']}"],
+        ["Cota inicial", e["cota_ini"], e["data_cota_ini"] or "-"],
+        ["Cota final", e["cota_fim"], e["data_cota_fim"] or "-"],
+        [],
+        ["Saldo inicial (cotas)", e["qtd_ini"]],
+        ["Preço médio inicial", e["pm_ini"]],
+        ["Saldo inicial (R$)", round(e["saldo_ini"], 2)],
+        [],
+        ["Data", "Tipo", "Valor (R$)", "Cota", "Cotas", "Saldo de Cotas"],
+    ]
+    linhas += [[d, tipo, round(valor, 2), ref, q, saldo] for d, tipo, valor, ref, q, saldo in e["movimentos"]]
+    if not e["movimentos"]: linhas.append(["(sem movimentos no período)"])
+    linhas += [
+        [],
+        ["Aportes (R$)", round(e["aportes"], 2)],
+        ["Resgates (R$)", round(e["resgates"], 2)],
+        ["Saldo final (cotas)", e["qtd_fim"]],
+        ["Preço médio final", e["pm_fim"]],
+        ["Saldo final (R$)", round(e["saldo_fim"], 2)],
+        ["Resultado do período (R$)", round(e["resultado"], 2)],
+        ["Rentabilidade da cota no período", _pct(e["rentab_cota"])],
+        ["Rentabilidade sobre o preço médio", _pct(e["rentab_pm"])],
+    ]
+    return linhas
+
+def _xlsx(caminho, linhas):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Extrato")
+    for l in linhas: ws.append(l)
+    wb.save(caminho)
+
+def _csv(caminho, linhas):
+    with open(caminho, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f, delimiter=";").writerows(linhas)
+
+def _pdf(caminho, linhas):
+    # Texto monoespaçado em páginas A4 (sem dependência além do matplotlib)
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    fmt = lambda v: f"{v:,.6f}" if isinstance(v, float) else str(v)
+    texto = ["  ".join(f"{fmt(v):<18}" for v in l).rstrip() for l in linhas]
+    with PdfPages(caminho) as pdf:
+        for i in range(0, len(texto), LINHAS_POR_PAGINA):
+            fig = Figure(figsize=(8.27, 11.69))
+            fig.text(0.05, 0.97, "\n".join(texto[i:i + LINHAS_POR_PAGINA]), family="monospace", fontsize=7, va="top")
+            pdf.savefig(fig)
+
+ESCRITORES = {"xlsx": _xlsx, "csv": _csv, "pdf": _pdf}
+
+def renderizar(tarefa):
+    # tarefa: (extrato, caminho sem extensão, formatos) -> arquivos gravados
+    extrato, base, formatos = tarefa
+    linhas = tabela(extrato)
+    arquivos = []
+    for f in formatos:
+        ESCRITORES[f](f"{base}.{f}", linhas)
+        arquivos.append(f"{base}.{f}")
+    return arquivos
+
+def renderizar_lote(tarefas):
+    # Um envio do pool: EXTRATOS_POR_LOTE tarefas de uma vez, menos idas e voltas entre processos
+    return [renderizar(t) for t in tarefas]
+
+# --- LOTE ---
+def _nome_arquivo(nome, usados):
+    base = re.sub(r"[^\w\-]+", "_", nome, flags=re.UNICODE).strip("_") or "cotista"
+    nome, n = base, 1
+    while nome.lower() in usados:
+        n += 1
+        nome = f"{base}_{n}"
+    usados.add(nome.lower())
+    return nome
+
+def _contar(conn, fim):
+    # Cotistas com algum movimento até `fim`: teto do número de extratos (os zerados sem movimento no período saem)
+    return conn.execute("SELECT COUNT(DISTINCT Cotista) FROM cotistas_mov WHERE Data <= ?", (fim,)).fetchone()[0]
+
+def gerar(conn, pasta, ini, fim, formatos=("xlsx",), processos=None, progresso=None):
+    # Extratos de [ini, fim] em `pasta`; progresso(feitos, total) a cada extrato gravado. -> (n extratos, índice CSV)
+    formatos = tuple(f.lower() for f in formatos)
+    invalidos = set(formatos) - set(FORMATOS)
+    if not formatos or invalidos: raise ValueError(f"Formato inválido: {', '.join(sorted(invalidos)) or '(nenhum)'}")
+    if ini > fim: raise ValueError("Início depois do fim")
+    os.makedirs(pasta, exist_ok=True)
+    usados, resumo = set(), []
+
+    def tarefas():
+        # Um extrato por vez: nome do arquivo e linha do índice saem aqui, o dicionário segue para renderizar()
+        for e in montar(conn, ini, fim):
+            base = os.path.join(pasta, f"extrato_{ini}_{fim}_{_nome_arquivo(e['cotista'], usados)}")
+            resumo.append([e["cotista"], os.path.basename(base), round(e["saldo_ini"], 2), round(e["aportes"], 2),
+                           round(e["resgates"], 2), round(e["saldo_fim"], 2), round(e["resultado"], 2), e["qtd_fim"]])
+            yield e, base, formatos
+
+    total = _contar(conn, fim)
+    trabalhadores = min(processos or os.cpu_count() or 1, total)
+    feitos = 0
+    if total >= MIN_PARALELO and trabalhadores > 1:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=contexto) as pool:
+            fila, lotes = deque(), iter(tarefas())
+            while lote := list(islice(lotes, EXTRATOS_POR_LOTE)):
+                fila.append(pool.submit(renderizar_lote, lote))
+                while len(fila) >= trabalhadores * EM_VOO or (fila and fila[0].done()):
+                    feitos += len(fila.popleft().result())
+                    if progresso: progresso(feitos, max(total, feitos))
+            while fila:
+                feitos += len(fila.popleft().result())
+                if progresso: progresso(feitos, max(total, feitos))
+    else:
+        for t in tarefas():
+            renderizar(t)
+            feitos += 1
+            if progresso: progresso(feitos, max(total, feitos))
+
+    indice = os.path.join(pasta, f"extratos_{ini}_{fim}.csv")
+    _csv(indice, [["Cotista", "Arquivo", "Saldo Inicial", "Aportes", "Resgates", "Saldo Final", "Resultado", "Cotas Finais"]] + resumo)
+    return feitos, indice
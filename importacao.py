@@ -0,0 +1,133 @@
+import csv
+import os
+import re
+import unicodedata
+from datetime import datetime
+
+# ==============================================================================
+# 📥 IMPORTAÇÃO EM LOTE (CSV / XLSX)
+# ==============================================================================
+# Valida tudo antes de tocar no banco; os erros voltam todos juntos, por linha.
+#
+# Trades:      Data, Ticker, Lado (COMPRA/VENDA), Qtd, Preco, Taxas (opcional)
+# Movimentos:  Data, Cotista, Tipo (Aporte/Saque), Valor, Ticker (opcional)
+# Preços:      Ticker, Preco (marcação a mercado)
+SINONIMOS = {
+    "data": "data", "dt": "data",
+    "ticker": "ticker", "ativo": "ticker", "ticker_ref": "ticker",
+    "lado": "lado", "op": "lado", "operacao": "lado",
+    "qtd": "qtd", "quantidade": "qtd",
+    "preco": "preco", "preco_unitario": "preco", "preco_atual": "preco", "fechamento": "preco", "cotacao": "preco",
+    "taxas": "taxas", "taxa": "taxas", "custos": "taxas",
+    "cotista": "cotista", "nome": "cotista",
+    "tipo": "tipo", "valor": "valor",
+}
+TIPOS = {"aporte": "Aporte (+)", "aporte (+)": "Aporte (+)", "+": "Aporte (+)",
+         "saque": "Saque (-)", "saque (-)": "Saque (-)", "-": "Saque (-)", "resgate": "Saque (-)"}
+LADOS = {"compra": "COMPRA", "c": "COMPRA", "venda": "VENDA", "v": "VENDA"}
+
+
+class ErroImportacao(ValueError):
+    def __init__(self, erros):
+        self.erros = erros
+        super().__init__("\n".join(erros[:20]) + (f"\n... e mais {len(erros) - 20} erro(s)" if len(erros) > 20 else ""))
+
+
+def _chave(nome):
+    nome = unicodedata.normalize("NFKD", str(nome or "")).encode("ascii", "ignore").decode()
+    return SINONIMOS.get(nome.strip().lower().replace(" ", "_"), nome.strip().lower())
+
+# --- LEITURA ---
+def ler_linhas(caminho):
+    # Gera (número da linha na planilha, {campo: valor}) sem carregar o arquivo inteiro
+    if os.path.splitext(caminho)[1].lower() in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        wb = load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            linhas = wb.active.iter_rows(values_only=True)
+            cab = [_chave(c) for c in next(linhas, ())]
+            for n, valores in enumerate(linhas, start=2):
+                if any(v not in (None, "") for v in valores): yield n, dict(zip(cab, valores))
+        finally:
+            wb.close()
+        return
+
+    with open(caminho, newline="", encoding="utf-8-sig") as f:
+        amostra = f.read(4096)
+        f.seek(0)
+        try: dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+        except csv.Error: dialeto = csv.excel
+        leitor = csv.reader(f, dialeto)
+        cab = [_chave(c) for c in next(leitor, [])]
+        for n, valores in enumerate(leitor, start=2):
+            if any(v.strip() for v in valores): yield n, dict(zip(cab, valores))
+
+# --- CONVERSÕES ---
+# pt-BR: vírgula decimal e ponto de milhar (1.234,56). Sem vírgula, ponto seguido
+# de grupos de três dígitos é milhar (1.234 = 1234); fora isso, ponto decimal (10.5).
+# Formato misto (1,234.56) ou grupos quebrados (1.23.456) são recusados.
+MILHAR = r"[1-9]\d{0,2}(?:\.\d{3})+"
+NUMERO_BR = re.compile(rf"[+-]?(?:\d+|{MILHAR})(?:,\d+)?")
+NUMERO_PONTO = re.compile(r"[+-]?\d+(?:\.\d+)?")
+
+def numero(v):
+    if isinstance(v, (int, float)): return float(v)
+    s = str(v or "").strip().replace("R$", "").replace(" ", "")
+    if NUMERO_BR.fullmatch(s): return float(s.replace(".", "").replace(",", "."))
+    if NUMERO_PONTO.fullmatch(s): return float(s)
+    raise ValueError(f"número inválido '{v}'")
+
+def data_iso(v):
+    if isinstance(v, datetime): return v.strftime("%Y-%m-%d")
+    s = str(v or "").strip()[:10]
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try: return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
+        except ValueError: pass
+    raise ValueError(f"data inválida '{v}'")
+
+def _texto(v):
+    return str(v or "").strip()
+
+# --- VALIDAÇÃO ---
+def _validar(linhas, converter):
+    validas, erros = [], []
+    for n, campos in linhas:
+        try: validas.append((n, *converter(campos)))
+        except (ValueError, TypeError) as e: erros.append(f"linha {n}: {e}")
+    if erros: raise ErroImportacao(erros)
+    return validas
+
+def _trade(c):
+    ticker = _texto(c.get("ticker")).upper()
+    lado = LADOS.get(_texto(c.get("lado")).lower())
+    if not ticker or ticker == "CAIXA": raise ValueError("ticker inválido")
+    if not lado: raise ValueError(f"lado inválido '{c.get('lado')}' (use COMPRA/VENDA)")
+    qtd, preco = numero(c.get("qtd")), numero(c.get("preco"))
+    taxas = numero(c.get("taxas")) if _texto(c.get("taxas")) else 0.0
+    if qtd <= 0 or preco <= 0 or taxas < 0: raise ValueError("quantidade, preço e taxas devem ser positivos")
+    return data_iso(c.get("data")), ticker, lado, qtd, preco, taxas
+
+def _movimento(c):
+    nome = _texto(c.get("cotista"))
+    tipo = TIPOS.get(_texto(c.get("tipo")).lower())
+    if not nome: raise ValueError("cotista vazio")
+    if not tipo: raise ValueError(f"tipo inválido '{c.get('tipo')}' (use Aporte/Saque)")
+    valor = numero(c.get("valor"))
+    if valor <= 0: raise ValueError("valor deve ser positivo")
+    return data_iso(c.get("data")), nome, tipo, valor, _texto(c.get("ticker")).upper() or "CAIXA"
+
+def _preco(c):
+    ticker = _texto(c.get("ticker")).upper()
+    if not ticker or ticker == "CAIXA": raise ValueError("ticker inválido")
+    preco = numero(c.get("preco"))
+    if preco <= 0: raise ValueError("preço deve ser positivo")
+    return ticker, preco
+
+def validar_trades(caminho):
+    return _validar(ler_linhas(caminho), _trade)
+
+def validar_movimentos(caminho):
+    return _validar(ler_linhas(caminho), _movimento)
+
+def validar_precos(caminho):
+    return _validar(ler_linhas(caminho), _preco)
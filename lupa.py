@@ -0,0 +1,59 @@
+import threading
+from bisect import bisect_left
+
+import banco
+import nucleo
+
+# ==============================================================================
+# 🔎 LUPA DE BUSCA (índice de tickers em memória)
+# ==============================================================================
+# Tickers de `ativos` ordenados: busca por prefixo com bisect. O índice vale
+# enquanto o contador 'precos' de `versoes` não mudar.
+LIMITE = 8  # sugestões por busca
+
+
+class IndiceTickers:
+    def __init__(self, linhas, versao=None):
+        self.versao = versao
+        self.dados = {t: (q or 0.0, pm or 0.0, p or 0.0, d) for t, q, pm, p, d in linhas}
+        self.tickers = sorted(self.dados)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def posicao(self, ticker):
+        # (Ticker, Qtd, PM, Preço, Data do preço, P&L R$, P&L %) do ticker exato; None se não houver
+        ticker = ticker.strip().upper()
+        return self._linha(ticker) if ticker in self.dados else None
+
+    def buscar(self, prefixo, limite=LIMITE):
+        # Linhas de posicao() dos tickers que começam com o prefixo, em ordem alfabética
+        prefixo = prefixo.strip().upper()
+        if not prefixo: return []
+        i = bisect_left(self.tickers, prefixo)
+        achados = []
+        for t in self.tickers[i:i + limite]:
+            if not t.startswith(prefixo): break
+            achados.append(self._linha(t))
+        return achados
+
+    def _linha(self, ticker):
+        qtd, pm, preco, data = self.dados[ticker]
+        return ticker, qtd, pm, preco, data, (preco - pm) * qtd, (preco / pm - 1) * 100 if pm > 0 else 0.0
+
+
+_cache = {}  # id(conn) -> (conn, versão, IndiceTickers); a entrada sai quando Banco.fechar() encerra a conexão
+_lock = threading.Lock()
+
+@banco.ao_fechar
+def _esquecer(conn):
+    with _lock: _cache.pop(id(conn), None)
+
+def indice(conn):
+    versao = nucleo.versoes(conn)[1]
+    guardado = _cache.get(id(conn))
+    if guardado and guardado[0] is conn and guardado[1] == versao: return guardado[2]
+    novo = IndiceTickers(conn.execute("SELECT Ticker, Qtd, Preco_Medio, Preco_Atual, Data_Preco FROM ativos WHERE Ticker != 'CAIXA'"), versao)
+    if not conn.in_transaction:
+        with _lock: _cache[id(conn)] = (conn, versao, novo)
+    return novo
@@ -0,0 +1,115 @@
+import math
+from datetime import date
+
+import benchmark
+
+# ==============================================================================
+# 📏 MÉTRICAS DE RISCO INCREMENTAIS (sobre historico_cota)
+# ==============================================================================
+# Estado em metricas_estado / metricas_janela, atualizado a cada snapshot novo:
+# Welford (volatilidade, Sharpe), pico (drawdown) e janela móvel em buffer
+# circular. O último snapshot fica fora do estado até chegar uma data nova.
+JANELA = 252
+LIVRE_RISCO_AA = 0.0
+CAMPOS = ("Base_Data", "Base_Cota", "Primeira_Data", "Primeira_Cota", "N", "Media", "M2", "Media_Exc", "M2_Exc",
+          "Pico", "Max_DD", "Soma_Jan", "Soma2_Jan", "Ultima_Data", "Ultima_Cota")
+
+
+def _dias(ini, fim):
+    return (date.fromisoformat(fim) - date.fromisoformat(ini)).days
+
+def retorno_livre_constante(conn, ini, fim):
+    return (1 + LIVRE_RISCO_AA) ** (_dias(ini, fim) / 365.0) - 1
+
+def retorno_livre_cdi(conn, ini, fim):
+    # CDI do cache local (benchmark.py); se o cache não chega até fim, taxa constante no período todo
+    r = benchmark.retorno(conn, ini, fim)
+    return retorno_livre_constante(conn, ini, fim) if r is None else r
+
+# Retorno do ativo livre de risco entre duas datas; trocar a fonte exige reconstruir()
+fonte_livre_risco = retorno_livre_cdi
+
+# --- ESTADO ---
+def _vazio():
+    return dict.fromkeys(CAMPOS) | {"N": 0, "Media": 0.0, "M2": 0.0, "Media_Exc": 0.0, "M2_Exc": 0.0,
+                                    "Max_DD": 0.0, "Soma_Jan": 0.0, "Soma2_Jan": 0.0}
+
+def carregar(conn):
+    linha = conn.execute(f"SELECT {', '.join(CAMPOS)} FROM metricas_estado WHERE Nome = 'cota'").fetchone()
+    return dict(zip(CAMPOS, linha)) if linha else _vazio()
+
+def _salvar(conn, e):
+    conn.execute(f"INSERT OR REPLACE INTO metricas_estado (Nome, {', '.join(CAMPOS)}) VALUES ('cota', {', '.join('?' * len(CAMPOS))})",
+                 [e[c] for c in CAMPOS])
+
+def _saindo(conn, e):
+    # Retorno que sai da janela quando entrar o próximo (None enquanto ela não encheu)
+    if e["N"] < JANELA: return None
+    linha = conn.execute("SELECT Excesso FROM metricas_janela WHERE Pos = ?", (e["N"] % JANELA,)).fetchone()
+    return linha[0] if linha else None
+
+def _incorporar(conn, e, data, cota, gravar=True):
+    # Incorpora o ponto (data, cota) ao estado acumulado; O(1)
+    if e["Base_Data"] is None:
+        e.update(Base_Data=data, Base_Cota=cota, Primeira_Data=data, Primeira_Cota=cota, Pico=cota)
+        return
+    r = cota / e["Base_Cota"] - 1 if e["Base_Cota"] else 0.0
+    exc = r - fonte_livre_risco(conn, e["Base_Data"], data)
+    saindo = _saindo(conn, e)
+    n = e["N"] + 1
+    for chave, x in (("", r), ("_Exc", exc)):
+        delta = x - e["Media" + chave]
+        e["Media" + chave] += delta / n
+        e["M2" + chave] += delta * (x - e["Media" + chave])
+    e["Soma_Jan"] += exc - (saindo or 0.0)
+    e["Soma2_Jan"] += exc * exc - (saindo or 0.0) ** 2
+    if gravar:
+        conn.execute("INSERT OR REPLACE INTO metricas_janela (Pos, Excesso) VALUES (?, ?)", (e["N"] % JANELA, exc))
+    e["Pico"] = max(e["Pico"], cota)
+    e["Max_DD"] = min(e["Max_DD"], cota / e["Pico"] - 1 if e["Pico"] else 0.0)
+    e.update(N=n, Base_Data=data, Base_Cota=cota)
+
+# --- ATUALIZAÇÃO (chamada por nucleo.gravar_historico_cota) ---
+def registrar(conn, linhas):
+    # linhas: [(Data, Valor_Cota)] recém-gravadas em historico_cota
+    if not linhas: return
+    linhas = sorted(linhas)
+    e = carregar(conn)
+    if e["Ultima_Data"] is not None and linhas[0][0] < e["Ultima_Data"]:
+        return reconstruir(conn)
+    for data, cota in linhas:
+        if e["Ultima_Data"] is not None and data > e["Ultima_Data"]:
+            _incorporar(conn, e, e["Ultima_Data"], e["Ultima_Cota"])
+        e.update(Ultima_Data=data, Ultima_Cota=cota)
+    _salvar(conn, e)
+
+def reconstruir(conn):
+    # Caminho completo: histórico inteiro (migração, retroativos, CDI novo no cache)
+    conn.execute("DELETE FROM metricas_janela")
+    e = _vazio()
+    for data, cota in conn.execute("SELECT Data, Valor_Cota FROM historico_cota ORDER BY Data").fetchall():
+        if e["Ultima_Data"] is not None: _incorporar(conn, e, e["Ultima_Data"], e["Ultima_Cota"])
+        e.update(Ultima_Data=data, Ultima_Cota=cota)
+    _salvar(conn, e)
+
+# --- LEITURA (Sumário) ---
+def resumo(conn):
+    e = carregar(conn)
+    if e["Ultima_Data"] is None: return None
+    _incorporar(conn, e, e["Ultima_Data"], e["Ultima_Cota"], gravar=False)  # cópia em memória, nada é gravado
+    n = e["N"]
+    anos = _dias(e["Primeira_Data"], e["Ultima_Data"]) / 365.0
+    por_ano = n / anos if anos > 0 else 0.0
+    vol = math.sqrt(e["M2"] / (n - 1) * por_ano) if n > 1 else float("nan")
+    dp_exc = math.sqrt(e["M2_Exc"] / (n - 1)) if n > 1 else 0.0
+    k = min(n, JANELA)
+    var_jan = (e["Soma2_Jan"] - e["Soma_Jan"] ** 2 / k) / (k - 1) if k > 1 else 0.0
+    dp_jan = math.sqrt(max(var_jan, 0.0))
+    return {
+        "retorno_total": e["Ultima_Cota"] / e["Primeira_Cota"] - 1 if e["Primeira_Cota"] else float("nan"),
+        "volatilidade_aa": vol,
+        "sharpe_aa": e["Media_Exc"] / dp_exc * math.sqrt(por_ano) if dp_exc > 0 else float("nan"),
+        "sharpe_janela_aa": (e["Soma_Jan"] / k) / dp_jan * math.sqrt(por_ano) if dp_jan > 0 else float("nan"),
+        "max_drawdown": e["Max_DD"],
+        "pontos": n + 1,
+    }
@@ -0,0 +1,369 @@
+from datetime import datetime
+
+import metricas
+
+# ==============================================================================
+# 🧬 MIGRAÇÕES DE ESQUEMA (PRAGMA user_version)
+# ==============================================================================
+# Cada migração roda uma vez, em ordem, numa transação só. Os passos são
+# congelados: só SQL e as regras copiadas aqui como eram na versão deles.
+# RECONSTRUCOES refaz as tabelas derivadas depois do último passo.
+
+def _colunas(conn, tabela):
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({tabela})")}
+
+def _existe(conn, tabela):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (tabela,)).fetchone() is not None
+
+# --- REGRAS CONGELADAS (como eram quando os passos foram escritos) ---
+def _movimento(qtd, pm, delta, preco):
+    # Preço médio: entrada pondera, saída só reduz e zera Qtd e PM quando a posição acaba
+    if delta > 0:
+        total = qtd * pm
+        qtd += delta
+        if qtd > 0: pm = (total + delta * preco) / qtd
+    else:
+        qtd += delta
+        if qtd <= 0: qtd, pm = 0, 0
+    return qtd, pm
+
+def _fluxo_trade(ticker, lado, qtd, preco, taxas):
+    # Efeito no CAIXA; abertura só na linha do próprio CAIXA
+    if lado == "ABERTURA": return qtd * preco if ticker == "CAIXA" else 0.0
+    if lado == "VENDA": return qtd * preco - (taxas or 0.0)
+    return -qtd * preco - (taxas or 0.0)
+
+def _fluxo_movimento(tipo, valor):
+    return (valor or 0.0) * (1 if "Aporte" in (tipo or "") else -1)
+
+def m001_esquema_base(c):
+    # 1. Movimentação de Cotistas
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS cotistas_mov (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Data TEXT,
+            Cotista TEXT,
+            Tipo TEXT,
+            Valor REAL,
+            Cota_Ref REAL,
+            Qtd_Cotas REAL,
+            Ticker_Ref TEXT
+        )
+    ''')
+    if "Ticker_Ref" not in _colunas(c, "cotistas_mov"):
+        c.execute("ALTER TABLE cotistas_mov ADD COLUMN Ticker_Ref TEXT")
+
+    # 2. Carteira de Ativos
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ativos (
+            Ticker TEXT PRIMARY KEY,
+            Qtd REAL,
+            Preco_Medio REAL,
+            Preco_Atual REAL,
+            Stop_Loss REAL,
+            Tipo TEXT
+        )
+    ''')
+
+    # 3. Histórico de Cota
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS historico_cota (
+            Data TEXT,
+            Valor_Cota REAL
+        )
+    ''')
+
+def m002_posicao_cotistas(c):
+    # 4. Posição consolidada por Cotista (mantida a cada movimentação)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS cotista_posicao (
+            Cotista TEXT PRIMARY KEY,
+            Qtd REAL,
+            PM REAL,
+            Ultima_Data TEXT,
+            Ultimo_ID INTEGER
+        )
+    ''')
+    posicao = {}
+    for nome, data, id_mov, qtd, ref in c.execute("SELECT Cotista, Data, ID, Qtd_Cotas, Cota_Ref FROM cotistas_mov ORDER BY Data, ID"):
+        p = posicao.setdefault(nome, [0.0, 0.0, data, id_mov])
+        p[0], p[1] = _movimento(p[0], p[1], qtd or 0.0, ref or 0.0)
+        p[2], p[3] = data, id_mov
+    c.execute("DELETE FROM cotista_posicao")
+    c.executemany("INSERT INTO cotista_posicao (Cotista, Qtd, PM, Ultima_Data, Ultimo_ID) VALUES (?,?,?,?,?)",
+                  [(nome, *p) for nome, p in posicao.items()])
+
+def m003_livro_trades(c):
+    # 5. Livro de Trades (append-only) e checkpoints de posição
+    novo_ledger = not _existe(c, "trades")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS trades (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Data TEXT,
+            Ticker TEXT,
+            Lado TEXT,
+            Qtd REAL,
+            Preco REAL,
+            Taxas REAL DEFAULT 0
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS posicao_checkpoint (
+            Data TEXT,
+            Ticker TEXT,
+            Qtd REAL,
+            Preco_Medio REAL,
+            PRIMARY KEY (Data, Ticker)
+        )
+    ''')
+    if not novo_ledger: return
+    # Banco legado: a carteira atual vira lançamentos de abertura; o CAIXA herdado é o que os aportes/saques não explicam
+    hoje = datetime.today().strftime('%Y-%m-%d')
+    c.execute("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) "
+              "SELECT ?, Ticker, 'ABERTURA', Qtd, Preco_Medio, 0 FROM ativos WHERE Ticker != 'CAIXA' AND Qtd > 0", (hoje,))
+    caixa = c.execute("SELECT Qtd FROM ativos WHERE Ticker='CAIXA'").fetchone()
+    ajuste = ((caixa[0] if caixa else 0.0) or 0.0) - sum(_fluxo_movimento(t, v) for t, v in c.execute("SELECT Tipo, Valor FROM cotistas_mov"))
+    if abs(ajuste) > 1e-9:
+        c.execute("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?, 'CAIXA', 'ABERTURA', ?, 1, 0)", (hoje, ajuste))
+
+def m004_indices(c):
+    # historico_cota passa a ter uma linha por Data (fica o último snapshot gravado)
+    c.execute("DELETE FROM historico_cota WHERE rowid NOT IN (SELECT MAX(rowid) FROM historico_cota GROUP BY Data)")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_historico_cota_data ON historico_cota(Data)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_cotistas_mov_data ON cotistas_mov(Data, ID)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_cotistas_mov_cotista ON cotistas_mov(Cotista, Data, ID)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trades_data ON trades(Data, ID)")
+
+def m005_data_preco(c):
+    # Data da última marcação a mercado de cada ativo (preços defasados no MTM)
+    if "Data_Preco" not in _colunas(c, "ativos"):
+        c.execute("ALTER TABLE ativos ADD COLUMN Data_Preco TEXT")
+
+def m006_precos_historico(c):
+    # 6. Preços por (Data, Ticker): fechamentos do MTM e preços de compra
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS precos_historico (
+            Data TEXT,
+            Ticker TEXT,
+            Preco REAL,
+            PRIMARY KEY (Data, Ticker)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_precos_historico_ticker ON precos_historico(Ticker, Data)")
+    # Preço atual de cada ativo vira a primeira observação da série
+    c.execute("INSERT OR IGNORE INTO precos_historico (Data, Ticker, Preco) SELECT COALESCE(Data_Preco, ?), Ticker, Preco_Atual "
+              "FROM ativos WHERE Ticker != 'CAIXA' AND Preco_Atual IS NOT NULL", (datetime.today().strftime('%Y-%m-%d'),))
+
+# Contadores que mudam a cada escrita, para caches saberem quando recalcular:
+# 'ledger' (trades e cotistas_mov) e 'precos' (ativos e precos_historico)
+VERSIONADAS = {"trades": "ledger", "cotistas_mov": "ledger", "ativos": "precos", "precos_historico": "precos"}
+
+def m007_versoes(c):
+    c.execute("CREATE TABLE IF NOT EXISTS versoes (Nome TEXT PRIMARY KEY, Valor INTEGER NOT NULL DEFAULT 0)")
+    c.executemany("INSERT OR IGNORE INTO versoes (Nome, Valor) VALUES (?, 0)", [(n,) for n in set(VERSIONADAS.values())])
+    for tabela, nome in VERSIONADAS.items():
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(f"CREATE TRIGGER IF NOT EXISTS tg_{tabela}_{evento.lower()} AFTER {evento} ON {tabela} "
+                      f"BEGIN UPDATE versoes SET Valor = Valor + 1 WHERE Nome = '{nome}'; END")
+
+def m008_metricas(c):
+    # 8. Estado das métricas de risco incrementais (ver metricas.py)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS metricas_estado (
+            Nome TEXT PRIMARY KEY,
+            Base_Data TEXT, Base_Cota REAL, Primeira_Data TEXT, Primeira_Cota REAL, N INTEGER,
+            Media REAL, M2 REAL, Media_Exc REAL, M2_Exc REAL, Pico REAL, Max_DD REAL,
+            Soma_Jan REAL, Soma2_Jan REAL, Ultima_Data TEXT, Ultima_Cota REAL
+        )
+    ''')
+    c.execute("CREATE TABLE IF NOT EXISTS metricas_janela (Pos INTEGER PRIMARY KEY, Excesso REAL)")
+
+def m009_fluxo_acumulado(c):
+    # 9. Somas acumuladas por (Ticker, Data) para a apuração de período (DRE)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS fluxo_acumulado (
+            Ticker TEXT,
+            Data TEXT,
+            Qtd REAL,
+            Compras REAL,
+            Vendas REAL,
+            PRIMARY KEY (Ticker, Data)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trades_ticker ON trades(Ticker, Data, ID)")
+    c.execute("DELETE FROM fluxo_acumulado")
+    c.execute('''
+        INSERT INTO fluxo_acumulado (Ticker, Data, Qtd, Compras, Vendas)
+        SELECT Ticker, Data,
+               SUM(SUM(CASE WHEN Lado = 'VENDA' THEN -Qtd ELSE Qtd END)) OVER w,
+               SUM(SUM(CASE WHEN Lado = 'VENDA' THEN 0 WHEN Lado = 'ABERTURA' THEN Qtd * Preco ELSE Qtd * Preco + COALESCE(Taxas, 0) END)) OVER w,
+               SUM(SUM(CASE WHEN Lado = 'VENDA' THEN Qtd * Preco - COALESCE(Taxas, 0) ELSE 0 END)) OVER w
+        FROM trades WHERE Ticker != 'CAIXA'
+        GROUP BY Ticker, Data
+        WINDOW w AS (PARTITION BY Ticker ORDER BY Data)
+    ''')
+
+def m010_benchmark(c):
+    # 10. Cache local de séries do Banco Central (CDI) com o fator acumulado (ver benchmark.py)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS benchmark_series (
+            Serie INTEGER,
+            Data TEXT,
+            Valor REAL,
+            Fator REAL,
+            PRIMARY KEY (Serie, Data)
+        )
+    ''')
+
+def m011_enquadramento(c):
+    # 11. Regras de enquadramento e exposição por regra mantida por gatilhos (ver enquadramento.py)
+    c.execute("CREATE TABLE IF NOT EXISTS regras (ID INTEGER PRIMARY KEY AUTOINCREMENT, Nome TEXT UNIQUE NOT NULL, Limite_Pct REAL NOT NULL)")
+    c.execute("CREATE TABLE IF NOT EXISTS regras_ativos (Regra_ID INTEGER, Ticker TEXT, PRIMARY KEY (Regra_ID, Ticker))")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_regras_ativos_ticker ON regras_ativos(Ticker, Regra_ID)")
+    c.execute("CREATE TABLE IF NOT EXISTS regras_exposicao (Regra_ID INTEGER PRIMARY KEY, Valor REAL NOT NULL DEFAULT 0)")
+    # Regra_ID 0 = PL inteiro; as demais só as regras vinculadas ao ticker
+    alvo = "WHERE Regra_ID = 0 OR Regra_ID IN (SELECT Regra_ID FROM regras_ativos WHERE Ticker = {t}.Ticker)"
+    valor = "COALESCE({t}.Qtd * {t}.Preco_Atual, 0)"
+    somar = lambda t, sinal: f"UPDATE regras_exposicao SET Valor = Valor {sinal} {valor.format(t=t)} {alvo.format(t=t)};"
+    gatilhos = {
+        "tg_ativos_exposicao_insert": ("AFTER INSERT ON ativos", somar("NEW", "+")),
+        "tg_ativos_exposicao_update": ("AFTER UPDATE OF Ticker, Qtd, Preco_Atual ON ativos", somar("OLD", "-") + somar("NEW", "+")),
+        "tg_ativos_exposicao_delete": ("AFTER DELETE ON ativos", somar("OLD", "-")),
+        "tg_regras_ativos_insert": ("AFTER INSERT ON regras_ativos",
+                                    "UPDATE regras_exposicao SET Valor = Valor + COALESCE((SELECT Qtd * Preco_Atual FROM ativos "
+                                    "WHERE Ticker = NEW.Ticker), 0) WHERE Regra_ID = NEW.Regra_ID;"),
+        "tg_regras_ativos_delete": ("AFTER DELETE ON regras_ativos",
+                                    "UPDATE regras_exposicao SET Valor = Valor - COALESCE((SELECT Qtd * Preco_Atual FROM ativos "
+                                    "WHERE Ticker = OLD.Ticker), 0) WHERE Regra_ID = OLD.Regra_ID;"),
+        "tg_regras_insert": ("AFTER INSERT ON regras", "INSERT OR IGNORE INTO regras_exposicao (Regra_ID, Valor) VALUES (NEW.ID, 0);"),
+        "tg_regras_delete": ("AFTER DELETE ON regras",
+                             "DELETE FROM regras_ativos WHERE Regra_ID = OLD.ID; DELETE FROM regras_exposicao WHERE Regra_ID = OLD.ID;"),
+    }
+    for nome, (evento, corpo) in gatilhos.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END")
+    c.execute("INSERT OR REPLACE INTO regras_exposicao (Regra_ID, Valor) SELECT 0, COALESCE(SUM(Qtd * Preco_Atual), 0) FROM ativos")
+    c.execute("INSERT OR REPLACE INTO regras_exposicao (Regra_ID, Valor) SELECT r.ID, COALESCE((SELECT SUM(a.Qtd * a.Preco_Atual) "
+              "FROM regras_ativos v JOIN ativos a ON a.Ticker = v.Ticker WHERE v.Regra_ID = r.ID), 0) FROM regras r")
+
+def m012_posicao_historica(c):
+    # 12. Carteira completa em cada data de historico_cota, para a auditoria por data e ticker (ver posicoes.py)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS posicao_historica (
+            Data TEXT,
+            Ticker TEXT,
+            Qtd REAL,
+            Preco_Medio REAL,
+            Preco REAL,
+            PRIMARY KEY (Data, Ticker)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_posicao_historica_ticker ON posicao_historica(Ticker, Data)")
+    # Uma passada pelo livro em ordem de data: Qtd/PM pela regra congelada, CAIXA pelos fluxos e o
+    # último preço <= data (precos_historico vence a compra/abertura do mesmo dia)
+    datas = [r[0] for r in c.execute("SELECT Data FROM historico_cota ORDER BY Data")]
+    if not datas: return
+    eventos = [(d, 0, None, (tipo, valor)) for d, tipo, valor in c.execute("SELECT Data, Tipo, Valor FROM cotistas_mov")]
+    eventos += [(d, 1, i, trade) for i, (d, *trade) in enumerate(c.execute("SELECT Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades ORDER BY Data, ID"))]
+    eventos += [(d, 2, t, p) for d, t, p in c.execute("SELECT Data, Ticker, Preco FROM precos_historico")]
+    eventos.sort(key=lambda e: e[:2] + ((e[2],) if e[1] == 1 else ()))
+    posicao, preco, caixa, i, linhas = {}, {}, 0.0, 0, []
+    for data in datas:
+        while i < len(eventos) and eventos[i][0] <= data:
+            _, tipo, chave, ev = eventos[i]
+            i += 1
+            if tipo == 0: caixa += _fluxo_movimento(*ev)
+            elif tipo == 2: preco[chave] = ev
+            else:
+                ticker, lado, qtd, p, taxas = ev
+                caixa += _fluxo_trade(ticker, lado, qtd, p, taxas)
+                if ticker == "CAIXA": continue
+                q, pm = posicao.get(ticker, (0.0, 0.0))
+                posicao[ticker] = _movimento(q, pm, -qtd if lado == "VENDA" else qtd, p)
+                if lado != "VENDA": preco[ticker] = p
+        linhas += [(data, t, q, pm, preco.get(t)) for t, (q, pm) in sorted(posicao.items()) if abs(q) > 1e-9]
+        linhas.append((data, "CAIXA", caixa, 1.0, 1.0))
+    c.executemany("INSERT OR REPLACE INTO posicao_historica (Data, Ticker, Qtd, Preco_Medio, Preco) VALUES (?,?,?,?,?)", linhas)
+
+def m013_indices_editor(c):
+    # 13. (coluna, ID) para a paginação por chave do Editor nas ordenações permitidas (ver paginacao.py)
+    c.execute("CREATE INDEX IF NOT EXISTS ix_cotistas_mov_cotista_id ON cotistas_mov(Cotista, ID)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_trades_ticker_id ON trades(Ticker, ID)")
+
+MIGRACOES = [
+    m001_esquema_base,
+    m002_posicao_cotistas,
+    m003_livro_trades,
+    m004_indices,
+    m005_data_preco,
+    m006_precos_historico,
+    m007_versoes,
+    m008_metricas,
+    m009_fluxo_acumulado,
+    m010_benchmark,
+    m011_enquadramento,
+    m012_posicao_historica,
+    m013_indices_editor,
+]
+VERSAO_ATUAL = len(MIGRACOES)
+# Passo -> reconstrução que ele exige (métricas leem benchmark_series, criada só na 010)
+RECONSTRUCOES = {m008_metricas: metricas.reconstruir}
+
+
+def versao(db):
+    return db.valor("PRAGMA user_version", padrao=0)
+
+def migrar(db):
+    atual = versao(db)
+    if atual > VERSAO_ATUAL:
+        raise RuntimeError(f"Banco na versão {atual}, mais nova que este programa ({VERSAO_ATUAL}). Atualize o sistema.")
+    if atual == VERSAO_ATUAL: return atual, VERSAO_ATUAL
+    with db.transacao() as c:
+        for numero, passo in enumerate(MIGRACOES[atual:], start=atual + 1):
+            passo(c)
+            c.execute(f"PRAGMA user_version = {numero}")
+        for passo in MIGRACOES[atual:]:
+            if passo in RECONSTRUCOES: RECONSTRUCOES[passo](c)
+    return atual, VERSAO_ATUAL
+
+# ==============================================================================
+# 🔎 PLANOS DE CONSULTA (devem continuar indexados conforme as tabelas crescem)
+# ==============================================================================
+# (consulta, parâmetros, índice esperado no EXPLAIN QUERY PLAN)
+CONSULTAS_INDEXADAS = [
+    ("SELECT * FROM trades WHERE Ticker IS NOT NULL AND (Ticker, ID) > (?, ?) ORDER BY Ticker, ID LIMIT 200", ("X", 0), "ix_trades_ticker_id"),
+    ("SELECT * FROM trades WHERE Ticker IS NULL AND ID < ? ORDER BY Ticker DESC, ID DESC LIMIT 200", (0,), "ix_trades_ticker_id"),
+    ("SELECT * FROM trades WHERE Data IS NOT NULL AND (Data, ID) < (?, ?) ORDER BY Data DESC, ID DESC LIMIT 200", ("9999", 0), "ix_trades_data"),
+    ("SELECT * FROM cotistas_mov WHERE Cotista IS NOT NULL AND (Cotista, ID) > (?, ?) ORDER BY Cotista, ID LIMIT 200", ("X", 0), "ix_cotistas_mov_cotista_id"),
+    ("SELECT Cotista, Data, ID, Qtd_Cotas, Cota_Ref FROM cotistas_mov ORDER BY Data ASC, ID ASC", (), "ix_cotistas_mov_data"),
+    ("SELECT Cotista, Data, ID, Qtd_Cotas, Cota_Ref FROM cotistas_mov WHERE Cotista = ? ORDER BY Data ASC, ID ASC", ("X",), "ix_cotistas_mov_cotista"),
+    ("SELECT Tipo, Valor FROM cotistas_mov WHERE Data > ? AND Data <= ?", ("", "9999"), "ix_cotistas_mov_data"),
+    ("SELECT Data, Valor_Cota FROM historico_cota ORDER BY Data", (), "ux_historico_cota_data"),
+    ("SELECT Valor_Cota FROM historico_cota WHERE Data = ?", ("2000-01-01",), "ux_historico_cota_data"),
+    ("SELECT Ticker, Lado, Qtd, Preco, Taxas FROM trades WHERE Data > ? AND Data <= ? ORDER BY Data, ID", ("", "9999"), "ix_trades_data"),
+    ("SELECT Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades WHERE Data > ? AND Data <= ? ORDER BY Data, ID", ("", "9999"), "ix_trades_data"),
+    ("SELECT Data, Ticker, Preco FROM precos_historico WHERE Data > ? AND Data <= ? ORDER BY Data", ("", "9999"), "sqlite_autoindex_precos_historico_1"),
+    ("SELECT MAX(Data) FROM posicao_checkpoint WHERE Data <= ?", ("9999",), "sqlite_autoindex_posicao_checkpoint_1"),
+    ("SELECT Data, Preco FROM precos_historico WHERE Ticker = ? ORDER BY Data", ("X",), "ix_precos_historico_ticker"),
+    ("SELECT Data, Preco FROM precos_historico WHERE Ticker = ? AND Data <= ? ORDER BY Data DESC LIMIT 1", ("X", "9999"), "ix_precos_historico_ticker"),
+    ("SELECT Data, Preco FROM trades WHERE Ticker = ? AND Data <= ? AND Lado != 'VENDA' ORDER BY Data DESC, ID DESC LIMIT 1", ("X", "9999"), "ix_trades_ticker"),
+    ("SELECT Qtd, Compras, Vendas FROM fluxo_acumulado WHERE Ticker = ? AND Data <= ? ORDER BY Data DESC LIMIT 1", ("X", "9999"), "sqlite_autoindex_fluxo_acumulado_1"),
+    ("SELECT Regra_ID, Ticker FROM regras_ativos WHERE Ticker IN (?)", ("X",), "ix_regras_ativos_ticker"),
+    ("SELECT Fator FROM benchmark_series WHERE Serie = ? AND Data < ? ORDER BY Data DESC LIMIT 1", (12, "9999"), "sqlite_autoindex_benchmark_series_1"),
+    ("SELECT MAX(Data) FROM posicao_historica WHERE Data <= ?", ("9999",), "PRIMARY KEY"),
+    ("SELECT Qtd, Preco_Medio, Preco FROM posicao_historica WHERE Data = ? AND Ticker = ?", ("2000-01-01", "X"), "PRIMARY KEY"),
+    ("SELECT Data, Qtd, Preco_Medio, Preco FROM posicao_historica WHERE Ticker = ? AND Data >= ? AND Data <= ? ORDER BY Data", ("X", "", "9999"), "ix_posicao_historica_ticker"),
+]
+
+def plano(conn, sql, params=()):
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def verificar_planos(db):
+    # Lista de (consulta, plano) que deixaram de usar o índice esperado ou precisam ordenar em memória
+    conn = db.conexao()
+    falhas = []
+    for sql, params, indice in CONSULTAS_INDEXADAS:
+        detalhes = plano(conn, sql, params)
+        usa_indice = any(indice in d for d in detalhes)
+        ordena = any("TEMP B-TREE" in d for d in detalhes)
+        if not usa_indice or ordena: falhas.append((sql, detalhes))
+    return falhas
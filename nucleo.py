@@ -0,0 +1,391 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import banco
+import enquadramento
+import metricas
+import migracoes
+import posicoes
+
+# ==============================================================================
+# 🧮 REGRAS DE NEGÓCIO (sem interface)
+# ==============================================================================
+# Regras das telas, da linha de comando e da importação. Nada aqui faz COMMIT.
+
+class ErroOperacao(ValueError):
+    pass
+
+class ErroEnquadramento(ErroOperacao):
+    def __init__(self, violacoes):
+        self.violacoes = violacoes  # [(Regra, Limite_Pct, % depois da ordem)]
+        super().__init__("Ordem desenquadra a carteira:\n" +
+                         "\n".join(f"{nome}: {pct:.2f}% do PL (limite {limite:.2f}%)" for nome, limite, pct in violacoes))
+
+
+def preparar_banco(db):
+    # Esquema versionado em migracoes.py (PRAGMA user_version) + CAIXA sempre presente
+    migracoes.migrar(db)
+    db.garantir_caixa()
+
+def hoje():
+    return datetime.today().strftime('%Y-%m-%d')
+
+# --- CÁLCULOS FINANCEIROS ---
+def patrimonio_liquido(conn):
+    return conn.execute("SELECT SUM(Qtd * Preco_Atual) FROM ativos").fetchone()[0] or 0.0
+
+def total_cotas(conn):
+    return conn.execute("SELECT SUM(Qtd_Cotas) FROM cotistas_mov").fetchone()[0] or 0.0
+
+def cota_de(pl, cotas):
+    if cotas <= 0: return 1.0
+    return pl / cotas
+
+def valor_cota(conn):
+    return resumo_cota(conn)["cota"]
+
+# --- COTA EM CACHE (por conexão) ---
+# Vale enquanto a conexão não gravou nada e nenhuma outra confirmou mudanças
+# (PRAGMA data_version); dentro de uma transação não é guardado.
+_cache_cota = {}
+_lock_cota = threading.Lock()
+
+@banco.ao_fechar
+def _esquecer_cota(conn):
+    with _lock_cota: _cache_cota.pop(id(conn), None)
+
+def resumo_cota(conn):
+    chave = (conn.total_changes, conn.execute("PRAGMA data_version").fetchone()[0])
+    guardado = _cache_cota.get(id(conn))
+    if guardado and guardado[0] is conn and guardado[1] == chave: return guardado[2]
+    pl, cotas = patrimonio_liquido(conn), total_cotas(conn)
+    caixa = conn.execute("SELECT Qtd FROM ativos WHERE Ticker = 'CAIXA'").fetchone()
+    valores = {"pl": pl, "cotas": cotas, "caixa": (caixa[0] if caixa else None) or 0.0, "cota": cota_de(pl, cotas)}
+    if not conn.in_transaction:
+        with _lock_cota: _cache_cota[id(conn)] = (conn, chave, valores)
+    return valores
+
+def gravar_historico_cota(conn, linhas, m=None):
+    # linhas: [(Data, Valor_Cota)]; uma linha por data (a última gravada vale). Único
+    # caminho de escrita do histórico, então as métricas de risco e a posição de
+    # cada data (posicao_historica) acompanham aqui. m: matrizes do recálculo, se o chamador já tem
+    conn.executemany("INSERT INTO historico_cota (Data, Valor_Cota) VALUES (?, ?) ON CONFLICT(Data) DO UPDATE SET Valor_Cota = excluded.Valor_Cota",
+                     linhas)
+    metricas.registrar(conn, linhas)
+    posicoes.registrar_posicoes_historicas(conn, [d for d, _ in linhas], hoje(), m)
+
+def versoes(conn):
+    # (ledger, precos): mudam a cada escrita nas tabelas (gatilhos da migração 007)
+    v = dict(conn.execute("SELECT Nome, Valor FROM versoes"))
+    return v.get("ledger", 0), v.get("precos", 0)
+
+def registrar_cotas(conn, cotas):
+    # cotas: {Data: cota}. Data passada regrava todo snapshot dali em diante pela série
+    dia = hoje()
+    passadas = [d for d in cotas if d < dia]
+    m = None
+    if passadas:
+        import recalculo
+        ini = min(passadas)
+        gravadas = [r[0] for r in conn.execute("SELECT Data FROM historico_cota WHERE Data >= ? AND Data < ?", (ini, dia))]
+        datas = sorted(set(passadas) | set(gravadas))
+        m = recalculo.matrizes(conn, ini, datas[-1], datas, checkpoint=True)
+        serie = recalculo.serie_cota(conn, m=m)
+        alvo = set(datas)
+        cotas = {**cotas, **{d: float(v) for d, v in zip(serie["Data"], serie["Valor_Cota"]) if d in alvo}}
+        if dia not in cotas and conn.execute("SELECT 1 FROM historico_cota WHERE Data = ?", (dia,)).fetchone():
+            cotas[dia] = valor_cota(conn)
+    gravar_historico_cota(conn, sorted(cotas.items()), m)
+
+def cotas_retroativas(conn, movimentos):
+    # movimentos: [(Data, fluxo)] em ordem de data, ainda fora de cotistas_mov (fluxo: +aporte, -saque).
+    # Cota de emissão de cada um = cota do fim daquele dia pela série de recalculo.serie_cota (a mesma
+    # dos snapshots retroativos), contando o caixa e as cotas dos anteriores da lista. -> [cota]
+    import recalculo, series
+    datas = sorted({d for d, _ in movimentos})
+    grade, _, qtd, preco, caixa, cotas, _ = recalculo.matrizes(conn, datas[0], datas[-1], datas, checkpoint=True)
+    pl, _ = series.patrimonio_e_cota(qtd, preco, caixa, cotas)
+    fluxo_dia = {}
+    for d, f in movimentos: fluxo_dia[d] = fluxo_dia.get(d, 0.0) + f
+    entradas = emitidas = 0.0
+    cota_dia = {}
+    for d, i in zip(datas, grade.searchsorted(datas)):
+        cota_dia[d] = cota_de(float(pl[i]) + entradas, float(cotas[i]) + emitidas) or 1.0
+        entradas += fluxo_dia[d]
+        emitidas += fluxo_dia[d] / cota_dia[d]
+    return [cota_dia[d] for d, _ in movimentos]
+
+def registrar_precos(conn, linhas, substituir=True):
+    # linhas: [(Data, Ticker, Preco)]. Fechamento (MTM) substitui; preço de compra só preenche a data
+    verbo = "INSERT OR REPLACE" if substituir else "INSERT OR IGNORE"
+    conn.executemany(f"{verbo} INTO precos_historico (Data, Ticker, Preco) VALUES (?, ?, ?)", linhas)
+
+# ==============================================================================
+# 💼 CARTEIRA EM MEMÓRIA
+# ==============================================================================
+# Estado de `ativos` + total de cotas; gravar() devolve as linhas tocadas.
+class Carteira:
+    def __init__(self, ativos, cotas):
+        self.ativos = ativos  # {Ticker: [Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo]}
+        self.cotas = cotas
+        self.alterados = set()
+        self.removidos = set()
+        if "CAIXA" not in self.ativos:
+            self.ativos["CAIXA"] = [0.0, 1, 1, 0, "Caixa"]
+            self.alterados.add("CAIXA")
+
+    @classmethod
+    def carregar(cls, conn):
+        ativos = {r[0]: list(r[1:]) for r in conn.execute("SELECT Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo FROM ativos")}
+        return cls(ativos, resumo_cota(conn)["cotas"])
+
+    @property
+    def caixa(self):
+        return self.ativos["CAIXA"][0] or 0.0
+
+    def valor_de(self, ticker):
+        a = self.ativos.get(ticker)
+        return (a[0] or 0.0) * (a[2] or 0.0) if a else 0.0
+
+    def patrimonio(self):
+        return sum((a[0] or 0.0) * (a[2] or 0.0) for a in self.ativos.values())
+
+    def valor_cota(self):
+        return cota_de(self.patrimonio(), self.cotas)
+
+    def _tocar(self, ticker):
+        self.alterados.add(ticker)
+        self.removidos.discard(ticker)
+
+    def _mover_caixa(self, valor):
+        self.ativos["CAIXA"][0] = self.caixa + valor
+        self._tocar("CAIXA")
+
+    # --- MESA DE OPERAÇÕES ---
+    def ordem(self, op, ticker, qtd, preco, taxas=0.0):
+        if not ticker or ticker == "CAIXA": raise ErroOperacao("Ticker inválido")
+        if qtd <= 0 or preco <= 0 or taxas < 0: raise ErroOperacao("Dados inválidos")
+        total = qtd * preco
+        existe = self.ativos.get(ticker)
+
+        if op == "COMPRA":
+            if self.caixa < total + taxas: raise ErroOperacao("Sem Caixa")
+            self._mover_caixa(-(total + taxas))
+            if existe:
+                existe[0], existe[1] = posicoes.aplicar_movimento(existe[0], existe[1], qtd, preco)
+                existe[2] = preco
+            else:
+                self.ativos[ticker] = [qtd, preco, preco, 0, 'Ação']
+            self._tocar(ticker)
+
+        elif op == "VENDA":
+            if not existe or existe[0] < qtd - posicoes.TOLERANCIA: raise ErroOperacao("Sem Ativos")
+            self._mover_caixa(total - taxas)
+            nova_qtd = existe[0] - qtd
+            if abs(nova_qtd) < posicoes.TOLERANCIA:
+                del self.ativos[ticker]
+                self.alterados.discard(ticker)
+                self.removidos.add(ticker)
+            else:
+                existe[0] = nova_qtd
+                self._tocar(ticker)
+        else:
+            raise ErroOperacao(f"Operação inválida: {op}")
+
+    # --- COTISTAS ---
+    def movimento(self, tipo, valor, cota=None):
+        # Aporte/saque entram pela cota atual (ou a do dia, se retroativo: cotas_retroativas),
+        # então não alteram o valor da cota
+        if valor <= 0: raise ErroOperacao("Valor inválido")
+        cota = self.valor_cota() if cota is None else cota
+        if cota == 0: cota = 1.0
+        fator = 1 if "Aporte" in tipo else -1
+        qtd_cotas = valor / cota * fator
+        self.cotas += qtd_cotas
+        self._mover_caixa(valor * fator)
+        return cota, qtd_cotas
+
+    def gravar(self, conn):
+        linhas = [(t, *self.ativos[t]) for t in self.alterados]
+        conn.executemany("INSERT INTO ativos (Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo) VALUES (?,?,?,?,?,?) "
+                         "ON CONFLICT(Ticker) DO UPDATE SET Qtd = excluded.Qtd, Preco_Medio = excluded.Preco_Medio, Preco_Atual = excluded.Preco_Atual",
+                         linhas)
+        conn.executemany("DELETE FROM ativos WHERE Ticker = ?", [(t,) for t in self.removidos])
+        self.alterados.clear()
+        self.removidos.clear()
+
+# ==============================================================================
+# ✍️ OPERAÇÕES UNITÁRIAS (telas)
+# ==============================================================================
+def checar_enquadramento(conn, variacoes):
+    # Pré-trade: O(regras) sobre as somas de regras_exposicao, nada é gravado
+    antes = enquadramento.exposicoes(conn)
+    violadas = enquadramento.violacoes(antes, enquadramento.simular(conn, variacoes, antes))
+    if violadas: raise ErroEnquadramento(violadas)
+
+def violacao_retroativa(conn, ordens, movimentos=()):
+    # Ordem retroativa: precisa de Qtd e caixa na própria data e nas seguintes
+    # ordens: [(linha, Data, Ticker, Lado, Qtd, Preco, Taxas)]; movimentos como em aplicar_lote -> (linha, erro) ou None
+    if not ordens: return None
+    ini = min(o[1] for o in ordens)
+    fim = conn.execute("SELECT MAX(Data) FROM (SELECT MAX(Data) AS Data FROM trades UNION ALL SELECT MAX(Data) FROM cotistas_mov)").fetchone()[0]
+    if fim is None or ini >= fim: return None  # no fim do livro a sequência da Carteira já basta
+    estado = posicoes.posicao_em(conn, (date.fromisoformat(ini) - timedelta(days=1)).isoformat())
+    saldo = {t: [(estado.get(t) or [0.0])[0]] * 2 for t in {o[2] for o in ordens} | {"CAIXA"}}
+    eventos = [(d, 0, i, posicoes.fluxo_movimento(tipo, valor), None, 0.0, None)
+               for i, (d, tipo, valor) in enumerate(conn.execute("SELECT Data, Tipo, Valor FROM cotistas_mov WHERE Data >= ?", (ini,)))]
+    eventos += [(d, 1, len(eventos) + i, posicoes.fluxo_trade(t, lado, q, p, tx), t, -q if lado == "VENDA" else q, None)
+                for i, (d, t, lado, q, p, tx) in enumerate(conn.execute(
+                    "SELECT Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades WHERE Data >= ? ORDER BY Data, ID", (ini,)))]
+    eventos += [(m[1], 2, len(eventos) + i, posicoes.fluxo_movimento(m[3], m[4]), None, 0.0, None) for i, m in enumerate(movimentos)]
+    eventos += [(d, 3, len(eventos) + i, posicoes.fluxo_trade(t, lado, q, p, tx), t, -q if lado == "VENDA" else q, linha)
+                for i, (linha, d, t, lado, q, p, tx) in enumerate(ordens)]
+    autor = {}
+    for d, grupo, _, caixa, ticker, delta, linha in sorted(eventos, key=lambda e: e[:3]):
+        lados = (1,) if grupo == 3 else (0, 1)
+        for i in lados: saldo["CAIXA"][i] += caixa
+        tocados = ["CAIXA"]
+        if ticker in saldo and ticker != "CAIXA":
+            for i in lados: saldo[ticker][i] += delta
+            tocados.append(ticker)
+        if grupo == 3: autor.update(dict.fromkeys(tocados, linha))
+        for item in tocados:
+            sem, com = saldo[item]
+            if com < -posicoes.TOLERANCIA and com < sem - posicoes.TOLERANCIA * max(1.0, abs(sem)):
+                if item == "CAIXA": return autor[item], f"Sem Caixa em {d} (R$ {com:,.2f})"
+                return autor[item], f"Sem Ativos: {item} ficaria com {com:g} em {d}"
+    return None
+
+def executar_ordem(conn, data, op, ticker, qtd, preco, taxas=0.0, enquadrar=True):
+    carteira = Carteira.carregar(conn)
+    antes = {t: carteira.valor_de(t) for t in (ticker, "CAIXA")}
+    carteira.ordem(op, ticker, qtd, preco, taxas)
+    erro = violacao_retroativa(conn, [(None, data, ticker, op, qtd, preco, taxas)])
+    if erro: raise ErroOperacao(erro[1])
+    if enquadrar: checar_enquadramento(conn, {t: carteira.valor_de(t) - v for t, v in antes.items()})
+    carteira.gravar(conn)
+    posicoes.registrar_trade(conn, data, ticker, op, qtd, preco, taxas)
+    if op == "COMPRA": registrar_precos(conn, [(data, ticker, preco)], substituir=False)
+    registrar_cotas(conn, {data: carteira.valor_cota()})
+    return carteira
+
+def registrar_movimento(conn, data, nome, tipo, valor, ticker="CAIXA"):
+    carteira = Carteira.carregar(conn)
+    cota = cotas_retroativas(conn, [(data, 0.0)])[0] if data < hoje() else None
+    cota, qtd_cotas = carteira.movimento(tipo, valor, cota)
+    cur = conn.execute("INSERT INTO cotistas_mov (Data, Cotista, Tipo, Valor, Cota_Ref, Qtd_Cotas, Ticker_Ref) VALUES (?,?,?,?,?,?,?)",
+                       (data, nome, tipo, valor, cota, qtd_cotas, ticker))
+    posicoes.registrar_movimento_cotista(conn, cur.lastrowid, nome, data, qtd_cotas, cota)
+    posicoes.invalidar_checkpoints(conn, data)
+    carteira.gravar(conn)
+    registrar_cotas(conn, {data: carteira.valor_cota()})
+    return cota, qtd_cotas
+
+def estornar_trade(conn, id_trade, data=None, enquadrar=False):
+    # Correção do livro append-only: ordem inversa (mesma Qtd e preço, sem taxas) na data do
+    # original ou em `data`. O trade errado fica no livro; o estorno passa por executar_ordem
+    linha = conn.execute("SELECT Data, Ticker, Lado, Qtd, Preco FROM trades WHERE ID = ?", (id_trade,)).fetchone()
+    if not linha: raise ErroOperacao(f"Trade {id_trade} não encontrado")
+    original, ticker, lado, qtd, preco = linha
+    if lado not in ("COMPRA", "VENDA"): raise ErroOperacao(f"Lançamento de {lado} não tem estorno")
+    return executar_ordem(conn, data or original, "VENDA" if lado == "COMPRA" else "COMPRA", ticker, qtd, preco, 0.0, enquadrar)
+
+def reprocessar_movimentos(conn, desde):
+    # Edição no lugar de cotistas_mov (Editor): posição dos cotistas, CAIXA, checkpoints e todo
+    # snapshot de `desde` em diante voltam a sair do livro, como em recalculo.regenerar_historico_cota
+    posicoes.materializar_cotistas(conn)
+    posicoes.invalidar_checkpoints(conn, desde)
+    caixa = posicoes.posicao_em(conn, "9999-12-31")["CAIXA"][0]
+    conn.execute("UPDATE ativos SET Qtd = ? WHERE Ticker = 'CAIXA'", (caixa,))
+    registrar_cotas(conn, {desde: valor_cota(conn)})
+
+def marcar_a_mercado(conn, precos, data):
+    # precos: [(Ticker, Preco)]. Vai todo para precos_historico; Preco_Atual só muda se
+    # `data` não for anterior à última marcação. Tickers fora da carteira voltam em `ignorados`
+    carteira = {r[0] for r in conn.execute("SELECT Ticker FROM ativos WHERE Ticker != 'CAIXA'")}
+    registrar_precos(conn, [(data, ticker, preco) for ticker, preco in precos])
+    linhas = [(preco, data, ticker, data) for ticker, preco in precos if ticker in carteira]
+    conn.executemany("UPDATE ativos SET Preco_Atual = ?, Data_Preco = ? WHERE Ticker = ? AND (Data_Preco IS NULL OR Data_Preco <= ?)", linhas)
+    return len(linhas), sorted({t for t, _ in precos} - carteira)
+
+# ==============================================================================
+# 📦 LOTE (importação)
+# ==============================================================================
+# movimentos: [(linha, Data, Cotista, Tipo, Valor, Ticker_Ref)]
+# trades:     [(linha, Data, Ticker, Lado, Qtd, Preco, Taxas)]
+# Aplica em ordem de data (movimentos do dia antes das ordens) e grava cada
+# tabela com um executemany e um snapshot por data. Qualquer regra violada
+# aborta o lote inteiro.
+def _ordenar_eventos(movimentos, trades):
+    return sorted([(m[1], 0, i, m) for i, m in enumerate(movimentos)] +
+                  [(t[1], 1, i, t) for i, t in enumerate(trades)], key=lambda e: e[:3])
+
+def aplicar_lote(conn, movimentos=(), trades=(), enquadrar=False):
+    eventos = _ordenar_eventos(movimentos, trades)
+    carteira = Carteira.carregar(conn)
+    linhas_mov, linhas_trades, snapshots = [], [], {}
+    antes = {t: carteira.valor_de(t) for t in {t[2] for t in trades} | {"CAIXA"}} if enquadrar else {}
+
+    cotas_antes, pl_mov = carteira.cotas, []
+    for data, tipo, _, ev in eventos:
+        try:
+            if tipo == 0:
+                _, _, nome, tp, valor, ticker = ev
+                pl_mov.append(carteira.patrimonio())
+                carteira.movimento(tp, valor)  # caixa e validação; a cota vem depois
+                linhas_mov.append([data, nome, tp, valor, None, valor * (1 if "Aporte" in tp else -1), ticker])
+            else:
+                _, _, ticker, lado, qtd, preco, taxas = ev
+                carteira.ordem(lado, ticker, qtd, preco, taxas)
+                linhas_trades.append((data, ticker, lado, qtd, preco, taxas))
+        except ErroOperacao as e:
+            raise ErroOperacao(f"linha {ev[0]} ({data}): {e}") from None
+        snapshots[data] = carteira.patrimonio()
+    erro = violacao_retroativa(conn, trades, movimentos)
+    if erro: raise ErroOperacao(f"linha {erro[0]}: {erro[1]}")
+    if enquadrar: checar_enquadramento(conn, {t: carteira.valor_de(t) - v for t, v in antes.items()})
+
+    posicoes.registrar_trades(conn, linhas_trades)
+    registrar_precos(conn, [(d, t, p) for d, t, lado, _, p, _ in linhas_trades if lado == "COMPRA"], substituir=False)
+    # Cota de emissão: passadas pela série, com as ordens do lote já gravadas; o resto em sequência pelo PL em memória
+    passados = [l for l in linhas_mov if l[0] < hoje()]
+    if passados:
+        for l, cota in zip(passados, cotas_retroativas(conn, [(l[0], l[5]) for l in passados])): l[4] = cota
+    cotas_total, i = cotas_antes + sum(l[5] / l[4] for l in passados), 0
+    for data in sorted(snapshots):
+        while i < len(linhas_mov) and linhas_mov[i][0] <= data:
+            l = linhas_mov[i]
+            if l[4] is None:
+                l[4] = cota_de(pl_mov[i], cotas_total) or 1.0
+                cotas_total += l[5] / l[4]
+            l[5] /= l[4]
+            i += 1
+        snapshots[data] = cota_de(snapshots[data], cotas_total)
+
+    if linhas_mov:
+        ultimo_id = conn.execute("SELECT COALESCE(MAX(ID), 0) FROM cotistas_mov").fetchone()[0]
+        conn.executemany("INSERT INTO cotistas_mov (Data, Cotista, Tipo, Valor, Cota_Ref, Qtd_Cotas, Ticker_Ref) VALUES (?,?,?,?,?,?,?)",
+                         linhas_mov)
+        posicoes.registrar_movimentos_cotistas(conn, conn.execute(
+            "SELECT ID, Cotista, Data, Qtd_Cotas, Cota_Ref FROM cotistas_mov WHERE ID > ? ORDER BY ID", (ultimo_id,)).fetchall())
+    if linhas_mov: posicoes.invalidar_checkpoints(conn, min(m[0] for m in linhas_mov))
+    carteira.gravar(conn)
+    registrar_cotas(conn, snapshots)
+    return len(linhas_mov), len(linhas_trades), sorted(snapshots)
+
+# ==============================================================================
+# 🧾 BOLETA (várias ordens, uma transação)
+# ==============================================================================
+# Projeta e executa todas as ordens da mesa juntas por aplicar_lote(enquadrar=True).
+def projetar_boleta(conn, ordens):
+    # ordens: [(linha, Data, Ticker, Lado, Qtd, Preco, Taxas)] -> {linha: (caixa depois, qtd do ticker depois, erro ou None)}
+    carteira = Carteira.carregar(conn)
+    projecao = {}
+    for _, _, _, (linha, _, ticker, lado, qtd, preco, taxas) in _ordenar_eventos((), ordens):
+        try: carteira.ordem(lado, ticker, qtd, preco, taxas); erro = None
+        except ErroOperacao as e: erro = str(e)
+        projecao[linha] = (carteira.caixa, (carteira.ativos.get(ticker) or [0.0])[0], erro)
+    if not any(p[2] for p in projecao.values()):
+        retro = violacao_retroativa(conn, ordens)
+        if retro: projecao[retro[0]] = (*projecao[retro[0]][:2], retro[1])
+    return projecao
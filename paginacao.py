@@ -0,0 +1,97 @@
+# ==============================================================================
+# 📄 PAGINAÇÃO POR CHAVE (keyset) PARA O EDITOR
+# ==============================================================================
+# Cada página é "as próximas N linhas depois da última chave vista". O custo só
+# é constante com um índice (coluna, pk): a ordenação fica restrita a ORDENAVEIS
+# (índices da migração 013). Filtros que não estão no índice da ordem ainda
+# percorrem as linhas que descartam.
+TAMANHO_PAGINA = 200
+CHAVES = {"cotistas_mov": "ID", "ativos": "Ticker", "trades": "ID"}
+ORDENAVEIS = {"cotistas_mov": ("ID", "Data", "Cotista"), "ativos": ("Ticker",), "trades": ("ID", "Data", "Ticker")}
+COLUNA_TICKER = {"cotistas_mov": "Ticker_Ref", "ativos": "Ticker", "trades": "Ticker"}
+
+
+class Paginador:
+    def __init__(self, db, tabela, filtros=None, ordem=None, desc=False, tamanho=TAMANHO_PAGINA):
+        if tabela not in CHAVES: raise ValueError(f"Tabela não editável: {tabela}")
+        self.db = db
+        self.tabela = tabela
+        self.pk = CHAVES[tabela]
+        self.filtros = filtros or {}
+        self.desc = desc
+        self.tamanho = tamanho
+        self._colunas = None
+        self.ordem = ordem or self.pk
+        if self.ordem not in self.ordenaveis: raise ValueError(f"Ordenação só por coluna indexada: {', '.join(self.ordenaveis)}")
+        self.fim = False
+        self._ultimo = None
+        self._nulos = None if self.ordem == self.pk else not desc  # trecho atual: NULL ou não NULL
+
+    @property
+    def ordenaveis(self):
+        return ORDENAVEIS[self.tabela]
+
+    @property
+    def colunas(self):
+        if self._colunas is None:
+            self._colunas = [r[1] for r in self.db.consultar(f"PRAGMA table_info({self.tabela})")]
+        return self._colunas
+
+    def _coluna(self, nome):
+        if nome not in self.colunas: raise ValueError(f"Coluna inexistente em {self.tabela}: {nome}")
+        return nome
+
+    def _where_filtros(self):
+        clausulas, params = [], []
+        f = self.filtros
+        if "Data" in self.colunas:
+            if f.get("data_ini"): clausulas.append("Data >= ?"); params.append(f["data_ini"])
+            if f.get("data_fim"): clausulas.append("Data <= ?"); params.append(f["data_fim"])
+        if f.get("ticker"):
+            clausulas.append(f"{COLUNA_TICKER[self.tabela]} = ?"); params.append(f["ticker"].upper())
+        if f.get("coluna") and f.get("valor") not in (None, ""):
+            clausulas.append(f"CAST({self._coluna(f['coluna'])} AS TEXT) LIKE ?"); params.append(f"{f['valor']}%")
+        return clausulas, params
+
+    def _where_chave(self):
+        # Dois trechos, cada um uma busca no índice (ordem, pk): NULL vem antes no ASC e depois no DESC
+        o, pk = self._coluna(self.ordem), self.pk
+        if o == pk: return ([f"{pk} {'<' if self.desc else '>'} ?"], [self._ultimo[1]]) if self._ultimo else ([], [])
+        comparar = "<" if self.desc else ">"
+        if self._nulos:
+            if self._ultimo is None: return [f"{o} IS NULL"], []
+            return [f"{o} IS NULL", f"{pk} {comparar} ?"], [self._ultimo[1]]
+        if self._ultimo is None: return [f"{o} IS NOT NULL"], []
+        return [f"{o} IS NOT NULL", f"({o}, {pk}) {comparar} (?, ?)"], list(self._ultimo)
+
+    def sql(self, limite=None):
+        clausulas, params = self._where_filtros()
+        c2, p2 = self._where_chave()
+        clausulas += c2; params += p2
+        o = self._coluna(self.ordem)
+        direcao = " DESC" if self.desc else ""
+        ordem = f"{o}{direcao}" if o == self.pk else f"{o}{direcao}, {self.pk}{direcao}"
+        where = f" WHERE {' AND '.join(clausulas)}" if clausulas else ""
+        return f"SELECT * FROM {self.tabela}{where} ORDER BY {ordem} LIMIT {int(limite or self.tamanho)}", params
+
+    def primeira(self):
+        self._ultimo = None
+        self._nulos = None if self.ordem == self.pk else not self.desc
+        self.fim = False
+        return self.proxima()
+
+    def proxima(self):
+        linhas = []
+        while not self.fim and len(linhas) < self.tamanho:
+            limite = self.tamanho - len(linhas)
+            sql, params = self.sql(limite)
+            lote = self.db.consultar(sql, params)
+            linhas += lote
+            if lote:
+                ult = lote[-1]
+                self._ultimo = (ult[self.colunas.index(self.ordem)], ult[self.colunas.index(self.pk)])
+            if len(lote) < limite:
+                # Trecho esgotado: passa ao outro (NULL / não NULL) ou acabou
+                if self._nulos is not None and self._nulos == (not self.desc): self._nulos, self._ultimo = not self._nulos, None
+                else: self.fim = True
+        return linhas
@@ -0,0 +1,41 @@
+import benchmark
+import metricas
+import nucleo
+
+# ==============================================================================
+# 🖥️ DADOS DAS TELAS (sem Tk)
+# ==============================================================================
+# O que as abas mostram, sem widgets (roda no worker do agendador).
+
+
+def serie_grafico(conn, largura_px):
+    # (cota, cdi): pontos (x, y) já reduzidos à largura do gráfico (LTTB); x em datas do matplotlib.
+    # Cota x CDI num join só (benchmark.comparativo); o CDI parte do mesmo valor da cota
+    import matplotlib.dates as mdates
+    import numpy as np
+    import series
+
+    linhas = benchmark.comparativo(conn)
+    if not linhas: return None
+    datas, valores, fatores = zip(*linhas)
+    x = mdates.date2num(np.array(datas, dtype="datetime64[D]"))
+    cota = series.lttb(x, valores, largura_px)
+    base = next(((v, f) for v, f in zip(valores, fatores) if f is not None), None)
+    if base is None: return cota, None
+    ok = np.array([f is not None for f in fatores])
+    cdi = np.array([f for f in fatores if f is not None]) / base[1] * base[0]
+    return cota, series.lttb(x[ok], cdi, largura_px)
+
+def sumario(db, largura_px=500):
+    # (pl, cota, caixa, cotistas [(Nome, Qtd, PM)], gráfico, tirs, risco) da aba Sumário
+    import tir
+    conn = db.conexao()
+    cota = nucleo.resumo_cota(conn)
+    # Posição materializada em cotista_posicao (ver posicoes.py)
+    cotistas = conn.execute("SELECT Cotista, Qtd, PM FROM cotista_posicao WHERE Qtd > 0.001 ORDER BY Cotista").fetchall()
+    # XIRR de todos os cotistas e da carteira num lote só; cache até o ledger mudar
+    return (cota["pl"], cota["cota"], cota["caixa"], cotistas, serie_grafico(conn, largura_px),
+            tir.tirs(db), metricas.resumo(conn))
+
+def rentabilidade_cotista(cota, pm):
+    return (cota - pm) / pm * 100 if pm > 0 else 0.0
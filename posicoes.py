@@ -0,0 +1,262 @@
+# ==============================================================================
+# 📒 POSIÇÕES MATERIALIZADAS
+# ==============================================================================
+# Regra de Preço Médio usada em todo o sistema: entrada (qtd > 0) pondera o PM,
+# saída só reduz a quantidade e zera a posição (Qtd e PM) quando ela acaba.
+TOLERANCIA = 1e-9
+
+
+def aplicar_movimento(qtd, pm, delta, preco):
+    if delta > 0: # Compra
+        total_atual = qtd * pm
+        qtd += delta
+        if qtd > 0: pm = (total_atual + delta * preco) / qtd
+    else: # Venda
+        qtd += delta
+        if qtd <= 0: qtd, pm = 0, 0
+    return qtd, pm
+
+# --- COTISTAS ---
+def replay_cotistas(conn, cotista=None):
+    sql = "SELECT Cotista, Data, ID, Qtd_Cotas, Cota_Ref FROM cotistas_mov"
+    params = ()
+    if cotista is not None:
+        sql += " WHERE Cotista = ?"
+        params = (cotista,)
+    posicoes = {}
+    for nome, data, id_mov, qtd, ref in conn.execute(sql + " ORDER BY Data ASC, ID ASC", params):
+        p = posicoes.setdefault(nome, [0.0, 0.0, data, id_mov])
+        p[0], p[1] = aplicar_movimento(p[0], p[1], qtd or 0.0, ref or 0.0)
+        p[2], p[3] = data, id_mov
+    return posicoes
+
+def _gravar(conn, posicoes):
+    conn.executemany("INSERT OR REPLACE INTO cotista_posicao (Cotista, Qtd, PM, Ultima_Data, Ultimo_ID) VALUES (?,?,?,?,?)",
+                     [(nome, *p) for nome, p in posicoes.items()])
+
+def registrar_movimento_cotista(conn, id_mov, nome, data, qtd_cotas, cota_ref):
+    # Chamado dentro da mesma transação do INSERT em cotistas_mov
+    atual = conn.execute("SELECT Qtd, PM, Ultima_Data, Ultimo_ID FROM cotista_posicao WHERE Cotista = ?", (nome,)).fetchone()
+    if atual and (data, id_mov) < (atual[2], atual[3]):
+        # Lançamento retroativo: a ordem do replay mudou, refaz só este cotista
+        _gravar(conn, replay_cotistas(conn, nome))
+        return
+    qtd, pm = aplicar_movimento(atual[0] if atual else 0.0, atual[1] if atual else 0.0, qtd_cotas, cota_ref)
+    _gravar(conn, {nome: [qtd, pm, data, id_mov]})
+
+def registrar_movimentos_cotistas(conn, linhas):
+    # Lote: linhas [(ID, Cotista, Data, Qtd_Cotas, Cota_Ref)] em ordem de ID, já inseridas
+    por_cotista = {}
+    for id_mov, nome, data, qtd, ref in linhas: por_cotista.setdefault(nome, []).append((data, id_mov, qtd, ref))
+    atuais = {}
+    for nome in por_cotista:
+        atual = conn.execute("SELECT Qtd, PM, Ultima_Data, Ultimo_ID FROM cotista_posicao WHERE Cotista = ?", (nome,)).fetchone()
+        atuais[nome] = list(atual) if atual else [0.0, 0.0, "", 0]
+    novas = {}
+    for nome, movs in por_cotista.items():
+        p = atuais[nome]
+        if movs != sorted(movs) or movs[0][:2] < (p[2], p[3]):
+            novas.update(replay_cotistas(conn, nome))
+            continue
+        for data, id_mov, qtd, ref in movs:
+            p[0], p[1] = aplicar_movimento(p[0], p[1], qtd, ref)
+            p[2], p[3] = data, id_mov
+        novas[nome] = p
+    _gravar(conn, novas)
+
+def verificar_posicoes_cotistas(conn):
+    esperado = replay_cotistas(conn)
+    gravado = {r[0]: r[1:] for r in conn.execute("SELECT Cotista, Qtd, PM FROM cotista_posicao")}
+    divergencias = []
+    for nome in set(esperado) | set(gravado):
+        e = esperado.get(nome, [0.0, 0.0])
+        g = gravado.get(nome, (0.0, 0.0))
+        if abs(e[0] - g[0]) > TOLERANCIA * max(1.0, abs(e[0])) or abs(e[1] - g[1]) > TOLERANCIA * max(1.0, abs(e[1])):
+            divergencias.append((nome, tuple(e[:2]), tuple(g)))
+    return divergencias
+
+def materializar_cotistas(conn):
+    conn.execute("DELETE FROM cotista_posicao")
+    _gravar(conn, replay_cotistas(conn))
+    divergencias = verificar_posicoes_cotistas(conn)
+    if divergencias:
+        raise RuntimeError(f"Reconstrução de posições divergente: {divergencias[:5]}")
+
+def reconstruir_posicoes_cotistas(db):
+    # Caminho completo (editor alterou o histórico): refaz tudo e confere antes do COMMIT
+    with db.transacao() as conn:
+        materializar_cotistas(conn)
+
+# ==============================================================================
+# 🧾 LIVRO DE TRADES E CHECKPOINTS
+# ==============================================================================
+# trades é append-only. Um checkpoint guarda a posição de todos os tickers ao fim
+# de um dia; a carteira em D parte do último checkpoint <= D.
+INTERVALO_CHECKPOINT = 500
+
+
+def fluxo_trade(ticker, lado, qtd, preco, taxas):
+    if lado == "ABERTURA": return qtd * preco if ticker == "CAIXA" else 0.0
+    if lado == "VENDA": return qtd * preco - (taxas or 0.0)
+    return -qtd * preco - (taxas or 0.0)
+
+def fluxo_movimento(tipo, valor):
+    return (valor or 0.0) * (1 if "Aporte" in (tipo or "") else -1)
+
+def abrir_ledger(conn, data):
+    # Banco legado: transforma a carteira atual em lançamentos de abertura
+    ativos = conn.execute("SELECT Ticker, Qtd, Preco_Medio FROM ativos WHERE Ticker != 'CAIXA' AND Qtd > 0").fetchall()
+    conn.executemany("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?, ?, 'ABERTURA', ?, ?, 0)",
+                     [(data, t, q, pm) for t, q, pm in ativos])
+    caixa = conn.execute("SELECT Qtd FROM ativos WHERE Ticker='CAIXA'").fetchone()
+    fluxos = sum(fluxo_movimento(t, v) for t, v in conn.execute("SELECT Tipo, Valor FROM cotistas_mov"))
+    ajuste = (caixa[0] if caixa else 0.0) - fluxos
+    if abs(ajuste) > TOLERANCIA:
+        conn.execute("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?, 'CAIXA', 'ABERTURA', ?, 1, 0)", (data, ajuste))
+
+def registrar_trade(conn, data, ticker, lado, qtd, preco, taxas=0.0):
+    # Chamado dentro da mesma transação que altera a tabela ativos
+    cur = conn.execute("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?,?,?,?,?,?)",
+                       (data, ticker, lado, qtd, preco, taxas))
+    acumular_trades(conn, [(data, ticker, lado, qtd, preco, taxas)])
+    invalidar_checkpoints(conn, data)
+    talvez_checkpoint(conn)
+    return cur.lastrowid
+
+def registrar_trades(conn, linhas):
+    # Lote: linhas [(Data, Ticker, Lado, Qtd, Preco, Taxas)]; invalida e checa checkpoint uma vez só
+    if not linhas: return
+    conn.executemany("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?,?,?,?,?,?)", linhas)
+    acumular_trades(conn, linhas)
+    invalidar_checkpoints(conn, min(l[0] for l in linhas))
+    talvez_checkpoint(conn)
+
+def invalidar_checkpoints(conn, data=None):
+    # Lançamento retroativo (ou edição) torna inválidos os checkpoints a partir da data
+    if data is None: conn.execute("DELETE FROM posicao_checkpoint")
+    else: conn.execute("DELETE FROM posicao_checkpoint WHERE Data >= ?", (data,))
+
+def posicao_em(conn, data):
+    # {Ticker: [Qtd, PM]} ao fim do dia `data` (CAIXA incluso)
+    base = conn.execute("SELECT MAX(Data) FROM posicao_checkpoint WHERE Data <= ?", (data,)).fetchone()[0] or ""
+    estado = {t: [q, pm] for t, q, pm in conn.execute(
+        "SELECT Ticker, Qtd, Preco_Medio FROM posicao_checkpoint WHERE Data = ?", (base,))}
+    caixa = estado.setdefault("CAIXA", [0.0, 1.0])
+
+    for ticker, lado, qtd, preco, taxas in conn.execute(
+            "SELECT Ticker, Lado, Qtd, Preco, Taxas FROM trades WHERE Data > ? AND Data <= ? ORDER BY Data, ID", (base, data)):
+        caixa[0] += fluxo_trade(ticker, lado, qtd, preco, taxas)
+        if ticker == "CAIXA": continue
+        p = estado.setdefault(ticker, [0.0, 0.0])
+        p[0], p[1] = aplicar_movimento(p[0], p[1], -qtd if lado == "VENDA" else qtd, preco)
+
+    for tipo, valor in conn.execute("SELECT Tipo, Valor FROM cotistas_mov WHERE Data > ? AND Data <= ?", (base, data)):
+        caixa[0] += fluxo_movimento(tipo, valor)
+    return estado
+
+def gravar_checkpoint(conn, data):
+    estado = posicao_em(conn, data)
+    conn.execute("DELETE FROM posicao_checkpoint WHERE Data = ?", (data,))
+    conn.executemany("INSERT INTO posicao_checkpoint (Data, Ticker, Qtd, Preco_Medio) VALUES (?,?,?,?)",
+                     [(data, t, q, pm) for t, (q, pm) in estado.items() if q or t == "CAIXA"])
+
+def talvez_checkpoint(conn):
+    ultimo = conn.execute("SELECT MAX(Data) FROM posicao_checkpoint").fetchone()[0] or ""
+    pendentes = conn.execute("SELECT COUNT(*) FROM trades WHERE Data > ?", (ultimo,)).fetchone()[0]
+    if pendentes < INTERVALO_CHECKPOINT: return
+    # Só dias fechados: o dia mais recente ainda pode receber lançamentos
+    fechado = conn.execute("SELECT MAX(Data) FROM trades WHERE Data < (SELECT MAX(Data) FROM trades)").fetchone()[0]
+    if fechado and fechado > ultimo: gravar_checkpoint(conn, fechado)
+
+# ==============================================================================
+# ➕ ACUMULADOS POR TICKER (somas prefixadas para apuração de período)
+# ==============================================================================
+# Qtd, Compras e Vendas acumuladas por (Ticker, Data); um período é a diferença
+# de duas linhas.
+def fluxo_ticker(lado, qtd, preco, taxas):
+    # (delta Qtd, Compras, Vendas); abertura conta como aplicação pelo PM herdado
+    taxas = taxas or 0.0
+    if lado == "VENDA": return -qtd, 0.0, qtd * preco - taxas
+    if lado == "ABERTURA": return qtd, qtd * preco, 0.0
+    return qtd, qtd * preco + taxas, 0.0
+
+def acumular_trades(conn, linhas):
+    # linhas: [(Data, Ticker, Lado, Qtd, Preco, Taxas)] recém-inseridas em trades
+    por_ticker = {}
+    for data, ticker, lado, qtd, preco, taxas in linhas:
+        if ticker != "CAIXA": por_ticker.setdefault(ticker, []).append((data, lado, qtd, preco, taxas))
+    for ticker, movs in por_ticker.items():
+        ultimo = conn.execute("SELECT Data, Qtd, Compras, Vendas FROM fluxo_acumulado WHERE Ticker = ? ORDER BY Data DESC LIMIT 1",
+                              (ticker,)).fetchone()
+        if ultimo and min(m[0] for m in movs) < ultimo[0]:
+            reconstruir_acumulados(conn, ticker)
+            continue
+        qtd, compras, vendas = ultimo[1:] if ultimo else (0.0, 0.0, 0.0)
+        novas = {}
+        for data, lado, q, p, taxas in sorted(movs, key=lambda m: m[0]):
+            dq, c, v = fluxo_ticker(lado, q, p, taxas)
+            qtd, compras, vendas = qtd + dq, compras + c, vendas + v
+            novas[data] = (qtd, compras, vendas)
+        conn.executemany("INSERT OR REPLACE INTO fluxo_acumulado (Ticker, Data, Qtd, Compras, Vendas) VALUES (?,?,?,?,?)",
+                         [(ticker, d, *v) for d, v in novas.items()])
+
+def reconstruir_acumulados(conn, ticker=None):
+    # Caminho completo (migração, edição de trades): somas acumuladas por janela no próprio SQL
+    filtro, params = (" AND Ticker = ?", (ticker,)) if ticker else ("", ())
+    conn.execute("DELETE FROM fluxo_acumulado" + (" WHERE Ticker = ?" if ticker else ""), params)
+    conn.execute(f"""
+        INSERT INTO fluxo_acumulado (Ticker, Data, Qtd, Compras, Vendas)
+        SELECT Ticker, Data,
+               SUM(SUM(CASE WHEN Lado = 'VENDA' THEN -Qtd ELSE Qtd END)) OVER w,
+               SUM(SUM(CASE WHEN Lado = 'VENDA' THEN 0 WHEN Lado = 'ABERTURA' THEN Qtd * Preco ELSE Qtd * Preco + COALESCE(Taxas, 0) END)) OVER w,
+               SUM(SUM(CASE WHEN Lado = 'VENDA' THEN Qtd * Preco - COALESCE(Taxas, 0) ELSE 0 END)) OVER w
+        FROM trades WHERE Ticker != 'CAIXA'{filtro}
+        GROUP BY Ticker, Data
+        WINDOW w AS (PARTITION BY Ticker ORDER BY Data)""", params)
+
+# ==============================================================================
+# 🕰️ POSIÇÃO HISTÓRICA (auditoria por data e ticker)
+# ==============================================================================
+# A carteira inteira em cada data de historico_cota, gravada junto com o snapshot.
+def posicoes_atuais(conn, datas):
+    if not datas: return []
+    atual = conn.execute("SELECT Ticker, Qtd, Preco_Medio, Preco_Atual FROM ativos WHERE Qtd != 0 OR Ticker = 'CAIXA'").fetchall()
+    return [(d, t, q, pm, p) for d in datas for t, q, pm, p in atual]
+
+def gravar_posicoes_historicas(conn, linhas):
+    # linhas: [(Data, Ticker, Qtd, Preco_Medio, Preco)]; cada Data gravada substitui o snapshot inteiro daquela data
+    conn.executemany("DELETE FROM posicao_historica WHERE Data = ?", [(d,) for d in sorted({l[0] for l in linhas})])
+    conn.executemany("INSERT INTO posicao_historica (Data, Ticker, Qtd, Preco_Medio, Preco) VALUES (?,?,?,?,?)", linhas)
+
+def registrar_posicoes_historicas(conn, datas, hoje, m=None):
+    # m: matrizes já calculadas pelo chamador para as datas passadas (recalculo.matrizes), evita refazer a grade
+    linhas = posicoes_atuais(conn, [d for d in datas if d >= hoje])
+    passadas = [d for d in datas if d < hoje]
+    if passadas:
+        import recalculo
+        linhas += recalculo.posicoes_nas_datas(conn, passadas, m)
+    gravar_posicoes_historicas(conn, linhas)
+
+def data_snapshot(conn, data):
+    # Último snapshot <= data (None antes do primeiro)
+    return conn.execute("SELECT MAX(Data) FROM posicao_historica WHERE Data <= ?", (data,)).fetchone()[0]
+
+def carteira_em(conn, data, ticker=None):
+    # (data do snapshot, [(Ticker, Qtd, Preco_Medio, Preco, Valor)]); ticker filtra por prefixo
+    base = data_snapshot(conn, data)
+    if base is None: return None, []
+    filtro, params = (" AND Ticker >= ? AND Ticker < ?", (ticker, ticker + "\uffff")) if ticker else ("", ())
+    return base, conn.execute("SELECT Ticker, Qtd, Preco_Medio, Preco, Qtd * Preco FROM posicao_historica "
+                              "WHERE Data = ?" + filtro + " ORDER BY Ticker", (base, *params)).fetchall()
+
+def posicao_ticker_em(conn, ticker, data):
+    # (data do snapshot, Qtd, Preco_Medio, Preco); Qtd 0 se o ticker não estava na carteira naquele snapshot
+    base = data_snapshot(conn, data)
+    if base is None: return None
+    linha = conn.execute("SELECT Qtd, Preco_Medio, Preco FROM posicao_historica WHERE Data = ? AND Ticker = ?", (base, ticker)).fetchone()
+    return (base, *(linha or (0.0, 0.0, None)))
+
+def trilha_ticker(conn, ticker, ini=None, fim=None):
+    # [(Data, Qtd, Preco_Medio, Preco)] do ticker nos snapshots em que estava na carteira (índice Ticker, Data)
+    return conn.execute("SELECT Data, Qtd, Preco_Medio, Preco FROM posicao_historica WHERE Ticker = ? AND Data >= ? AND Data <= ? ORDER BY Data",
+                        (ticker, ini or "", fim or "9999-12-31")).fetchall()
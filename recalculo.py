@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+import nucleo
+import series
+from posicoes import aplicar_movimento
+
+# ==============================================================================
+# 🔁 MOTOR DE RECÁLCULO (replay vetorizado do livro de movimentações)
+# ==============================================================================
+# Qtd e PM por chave sem loop Python: zeragens pela recursão de Lindley e custo
+# por episódio com somas acumuladas em escala log (estouro cai no loop exato).
+EPS = 1e-9
+LIMITE_LOG = 600.0
+
+
+def _por_grupo(valores, grupos):
+    return pd.Series(valores).groupby(grupos, sort=False)
+
+def replay_posicoes(df, chave):
+    # df: colunas [chave, 'Data', 'Ordem', 'Delta', 'Preco'] -> mesmas linhas + 'Qtd', 'PM'
+    df = df.sort_values([chave, "Data", "Ordem"], kind="mergesort").reset_index(drop=True)
+    n = len(df)
+    if n == 0: return df.assign(Qtd=pd.Series(dtype=float), PM=pd.Series(dtype=float))
+
+    grupo = pd.factorize(df[chave], sort=False)[0]
+    d = df["Delta"].to_numpy(dtype=float)
+    p = df["Preco"].to_numpy(dtype=float)
+
+    # 1. Zeragens (Lindley por grupo)
+    s = _por_grupo(d, grupo).cumsum().to_numpy()
+    zerado = s - np.minimum(_por_grupo(s, grupo).cummin().to_numpy(), 0.0) <= EPS
+
+    # 2. Episódios: começam no início do grupo ou logo após uma zeragem.
+    #    A quantidade é reacumulada dentro de cada episódio, partindo de zero como
+    #    no loop original, para não carregar o erro de arredondamento de S.
+    novo_grupo = np.empty(n, dtype=bool)
+    novo_grupo[0] = True
+    novo_grupo[1:] = grupo[1:] != grupo[:-1]
+    inicio = novo_grupo.copy()
+    inicio[1:] |= zerado[:-1]
+    episodio = np.cumsum(inicio)
+
+    q = _por_grupo(d, episodio).cumsum().to_numpy(copy=True)
+    q[zerado] = 0.0
+    q_ant = np.where(inicio, 0.0, np.roll(q, 1))
+
+    # 3. Custo por episódio
+    compra = d > 0
+    venda_parcial = ~compra & ~zerado & (q_ant > 0)
+    razao = np.ones(n)
+    razao[venda_parcial] = q[venda_parcial] / q_ant[venda_parcial]
+    log_s = _por_grupo(np.log(razao), episodio).cumsum().to_numpy()
+    b = np.where(compra, d * p, 0.0)
+
+    estoura = log_s < -LIMITE_LOG
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        custo = np.exp(log_s) * _por_grupo(b * np.exp(-log_s), episodio).cumsum().to_numpy()
+        pm = np.where(zerado, 0.0, custo / np.where(zerado, 1.0, q))
+
+    if estoura.any():
+        for ep in np.unique(episodio[estoura]):
+            idx = np.flatnonzero(episodio == ep)
+            qi, pmi = 0.0, 0.0
+            for i in idx:
+                qi, pmi = aplicar_movimento(qi, pmi, d[i], p[i])
+                pm[i] = pmi
+
+    return df.assign(Qtd=q, PM=pm)
+
+def posicao_final(df, chave):
+    hist = replay_posicoes(df, chave)
+    return hist.groupby(chave, sort=True).tail(1)[[chave, "Qtd", "PM"]].reset_index(drop=True)
+
+# --- COTISTAS ---
+def ledger_cotistas(df_mov):
+    # cotistas_mov -> formato do motor (ID como desempate, igual ao ORDER BY Data, ID)
+    return pd.DataFrame({
+        "Cotista": df_mov["Cotista"],
+        "Data": df_mov["Data"],
+        "Ordem": df_mov["ID"],
+        "Delta": df_mov["Qtd_Cotas"].fillna(0.0),
+        "Preco": df_mov["Cota_Ref"].fillna(0.0),
+    })
+
+def recalcular_cotistas(db):
+    df = db.dataframe("SELECT ID, Data, Cotista, Qtd_Cotas, Cota_Ref FROM cotistas_mov")
+    return posicao_final(ledger_cotistas(df), "Cotista")
+
+# --- ATIVOS E CAIXA ---
+def ledger_trades(df_trades):
+    # trades: Data, Ticker, Lado (COMPRA/VENDA/ABERTURA), Qtd, Preco — CAIXA fica de fora
+    df_trades = df_trades[df_trades["Ticker"] != "CAIXA"]
+    sinal = np.where(df_trades["Lado"].str.upper() == "VENDA", -1.0, 1.0)
+    return pd.DataFrame({
+        "Ticker": df_trades["Ticker"],
+        "Data": df_trades["Data"],
+        "Ordem": df_trades["ID"] if "ID" in df_trades else np.arange(len(df_trades)),
+        "Delta": sinal * df_trades["Qtd"].to_numpy(dtype=float),
+        "Preco": df_trades["Preco"],
+    })
+
+def recalcular_ativos(df_trades):
+    return posicao_final(ledger_trades(df_trades), "Ticker")
+
+def fluxos(df_mov, df_trades):
+    # Entradas/saídas do CAIXA somadas por data: aportes - saques - compras + vendas - taxas
+    fator_mov = np.where(df_mov["Tipo"].fillna("").str.contains("Aporte"), 1.0, -1.0)
+    mov = pd.DataFrame({"Data": df_mov["Data"], "Fluxo": fator_mov * df_mov["Valor"].fillna(0.0)})
+    lado = df_trades["Lado"].str.upper()
+    abertura = lado == "ABERTURA"
+    # Abertura só movimenta caixa na linha do próprio CAIXA (saldo herdado)
+    sinal = np.select([abertura & (df_trades["Ticker"] == "CAIXA"), abertura, lado == "VENDA"], [1.0, 0.0, 1.0], -1.0)
+    taxas = df_trades["Taxas"].fillna(0.0) if "Taxas" in df_trades else 0.0
+    trd = pd.DataFrame({"Data": df_trades["Data"],
+                        "Fluxo": sinal * df_trades["Qtd"] * df_trades["Preco"] - taxas})
+    return pd.concat([mov, trd], ignore_index=True).groupby("Data", sort=True)["Fluxo"].sum()
+
+def fluxo_caixa(df_mov, df_trades):
+    # Série do CAIXA por data
+    return fluxos(df_mov, df_trades).cumsum().rename("Caixa")
+
+def recalcular_caixa(df_mov, df_trades):
+    serie = fluxo_caixa(df_mov, df_trades)
+    return float(serie.iloc[-1]) if len(serie) else 0.0
+
+# ==============================================================================
+# 📈 SÉRIE DE PATRIMÔNIO E COTA (posições x preços por data)
+# ==============================================================================
+# Saldos acumulados numa grade de datas x preços com forward fill. checkpoint=True
+# parte do posicao_checkpoint mais próximo <= ini e só lê o livro depois dele.
+def _df(conn, sql, params=()):
+    return pd.read_sql_query(sql, conn, params=params)
+
+def _abertura(conn, base):
+    # Checkpoint `base` como (trades de abertura, movimento com as cotas até ali, preço de cada ticker)
+    import dre
+    carteira = conn.execute("SELECT Ticker, Qtd, Preco_Medio FROM posicao_checkpoint WHERE Data = ?", (base,)).fetchall()
+    trades = pd.DataFrame([(base, t, "ABERTURA", q, 1.0 if t == "CAIXA" else pm, 0.0) for t, q, pm in carteira],
+                          columns=["Data", "Ticker", "Lado", "Qtd", "Preco", "Taxas"])
+    cotas = conn.execute("SELECT COALESCE(SUM(Qtd_Cotas), 0) FROM cotistas_mov WHERE Data <= ?", (base,)).fetchone()[0]
+    mov = pd.DataFrame({"Data": [base], "Tipo": [""], "Valor": [0.0], "Qtd_Cotas": [cotas]})
+    precos = pd.DataFrame([(base, t, dre.preco_em(conn, t, base)) for t, _, _ in carteira if t != "CAIXA"], columns=["Data", "Ticker", "Preco"])
+    return trades, mov, precos
+
+def matrizes(conn, ini=None, fim=None, datas=(), checkpoint=False):
+    # (grade, tickers, qtd, preco, caixa, cotas, livro): datas x tickers e séries por data na janela, e o livro
+    # lido (formato de ledger_trades) para o PM de posicoes_nas_datas sem reler trades.
+    # datas: entram na grade mesmo sem evento (snapshot retroativo ainda não gravado em historico_cota)
+    ini, fim = ini or "", fim or "9999-12-31"
+    base = (conn.execute("SELECT MAX(Data) FROM posicao_checkpoint WHERE Data <= ?", (ini,)).fetchone()[0] or "") if checkpoint and ini else ""
+    trades = _df(conn, "SELECT Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades WHERE Data > ? AND Data <= ? ORDER BY Data, ID", (base, fim))
+    mov = _df(conn, "SELECT Data, Tipo, Valor, Qtd_Cotas FROM cotistas_mov WHERE Data > ? AND Data <= ?", (base, fim))
+    precos = _df(conn, "SELECT Data, Ticker, Preco FROM precos_historico WHERE Data > ? AND Data <= ? ORDER BY Data", (base, fim))
+    if base:
+        inicio = _abertura(conn, base)
+        trades, mov, precos = (pd.concat([a, b], ignore_index=True) for a, b in zip(inicio, (trades, mov, precos)))
+    hist = _df(conn, "SELECT Data FROM historico_cota WHERE Data >= ? AND Data <= ?", (ini, fim))
+
+    todas = np.concatenate([trades["Data"], mov["Data"], precos["Data"], hist["Data"], np.asarray(list(datas), dtype=object)]).astype(str)
+    grade = np.unique(todas[(todas >= ini) & (todas <= fim)])
+    if len(grade) == 0: return None
+
+    livro = ledger_trades(trades)
+    tickers, col = np.unique(np.concatenate([livro["Ticker"], precos["Ticker"]]).astype(str), return_inverse=True)
+    col_livro, col_precos = col[:len(livro)], col[len(livro):]
+    qtd = series.acumular(grade, livro["Data"], livro["Delta"], col_livro, len(tickers))
+
+    # Observações de preço: compras/aberturas (prioridade 0) e precos_historico (1)
+    compra = (trades.loc[livro.index, "Lado"].str.upper() != "VENDA").to_numpy()
+    obs = pd.DataFrame({
+        "Data": np.concatenate([livro["Data"].to_numpy()[compra], precos["Data"]]),
+        "Col": np.concatenate([col_livro[compra], col_precos]),
+        "Preco": np.concatenate([livro["Preco"].to_numpy(dtype=float)[compra], precos["Preco"].to_numpy(dtype=float)]),
+        "Prio": np.concatenate([np.zeros(compra.sum()), np.ones(len(precos))]),
+    }).sort_values(["Data", "Prio"], kind="mergesort")
+    preco = series.ultimo_observado(grade, obs["Data"], obs["Preco"], obs["Col"], len(tickers))
+
+    fluxo = fluxos(mov, trades)
+    caixa = series.acumular(grade, fluxo.index, fluxo.to_numpy())[:, 0]
+    cotas = series.acumular(grade, mov["Data"], mov["Qtd_Cotas"].fillna(0.0))[:, 0]
+    return grade, tickers, qtd, preco, caixa, cotas, livro
+
+def serie_cota(conn, ini=None, fim=None, m=None):
+    m = matrizes(conn, ini, fim) if m is None else m
+    if m is None: return pd.DataFrame({"Data": [], "PL": [], "Cotas": [], "Valor_Cota": []})
+    grade, _, qtd, preco, caixa, cotas, _ = m
+    pl, cota = series.patrimonio_e_cota(qtd, preco, caixa, cotas)
+    return pd.DataFrame({"Data": grade, "PL": pl, "Cotas": cotas, "Valor_Cota": cota})
+
+def posicoes_nas_datas(conn, datas, m=None):
+    # [(Data, Ticker, Qtd, Preco_Medio, Preco)] ao fim de cada data (CAIXA incluso) para posicao_historica.
+    # Qtd, preço e caixa da grade de matrizes(); PM pelo replay do livro que ela leu, última linha <= cada data
+    datas = sorted(set(datas))
+    if not datas: return []
+    if m is None: m = matrizes(conn, datas[0], datas[-1], datas, checkpoint=True)
+    if m is None: return []
+    grade, tickers, qtd, preco, caixa, _, livro = m
+    linhas = np.maximum(np.searchsorted(grade, datas, side="right") - 1, 0)
+    livro = replay_posicoes(livro[livro["Data"] <= datas[-1]], "Ticker")
+    pm = series.ultimo_observado(grade, livro["Data"], livro["PM"], np.searchsorted(tickers, livro["Ticker"].astype(str)), len(tickers))
+
+    q = qtd[linhas]
+    i, j = np.nonzero((np.abs(q) > EPS) & (tickers != "CAIXA"))
+    d = np.asarray(datas, dtype=object)
+    saida = list(zip(d[i].tolist(), tickers[j].tolist(), q[i, j].tolist(), pm[linhas][i, j].tolist(), preco[linhas][i, j].tolist()))
+    return saida + [(data, "CAIXA", c, 1.0, 1.0) for data, c in zip(datas, caixa[linhas].tolist())]
+
+def regenerar_historico_cota(db, ini=None, fim=None):
+    # Regrava historico_cota (e a posição de cada data) na janela: datas com evento, preço ou snapshot anterior
+    with db.transacao() as conn:
+        m = matrizes(conn, ini, fim)
+        serie = serie_cota(conn, m=m)
+        nucleo.gravar_historico_cota(conn, list(zip(serie["Data"], serie["Valor_Cota"].astype(float))), m)
+    return len(serie)
+
+# --- RECALCULAR SALDOS (Editor BD) ---
+def recalcular_saldos(db):
+    # Reconstrói ativos (Qtd, PM), CAIXA e cotista_posicao do dia zero até hoje
+    trades = db.dataframe("SELECT ID, Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades")
+    mov = db.dataframe("SELECT ID, Data, Cotista, Tipo, Valor, Cota_Ref, Qtd_Cotas FROM cotistas_mov")
+    ativos = recalcular_ativos(trades)
+    caixa = recalcular_caixa(mov, trades)
+    cotistas = recalcular_cotistas(db)
+    ultimo_preco = trades.sort_values(["Data", "ID"]).groupby("Ticker")["Preco"].last()
+
+    with db.transacao() as conn:
+        conn.execute("DELETE FROM ativos WHERE Ticker != 'CAIXA' AND Ticker NOT IN (SELECT Ticker FROM trades)")
+        for ticker, qtd, pm in ativos.itertuples(index=False):
+            if qtd <= 0:
+                conn.execute("DELETE FROM ativos WHERE Ticker = ?", (ticker,))
+                continue
+            cur = conn.execute("UPDATE ativos SET Qtd = ?, Preco_Medio = ? WHERE Ticker = ?", (qtd, pm, ticker))
+            if cur.rowcount == 0:
+                preco = float(ultimo_preco.get(ticker, pm))
+                conn.execute("INSERT INTO ativos (Ticker, Qtd, Preco_Medio, Preco_Atual, Stop_Loss, Tipo) VALUES (?, ?, ?, ?, 0, 'Ação')", (ticker, qtd, pm, preco))
+        db.garantir_caixa()
+        conn.execute("UPDATE ativos SET Qtd = ? WHERE Ticker = 'CAIXA'", (caixa,))
+
+        conn.execute("DELETE FROM cotista_posicao")
+        ultimos = mov.sort_values(["Data", "ID"]).groupby("Cotista")[["Data", "ID"]].last()
+        conn.executemany("INSERT INTO cotista_posicao (Cotista, Qtd, PM, Ultima_Data, Ultimo_ID) VALUES (?,?,?,?,?)",
+                         [(nome, float(qtd), float(pm), ultimos.at[nome, "Data"], int(ultimos.at[nome, "ID"]))
+                          for nome, qtd, pm in cotistas.itertuples(index=False)])
+    return len(ativos), caixa
@@ -0,0 +1,60 @@
+import numpy as np
+
+# ==============================================================================
+# 📉 SÉRIES TEMPORAIS
+# ==============================================================================
+
+# --- DOWNSAMPLING (Largest-Triangle-Three-Buckets) ---
+def lttb(x, y, n):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    total = len(x)
+    if n >= total or n < 3: return x, y
+
+    limites = np.linspace(1, total - 1, n - 1).astype(int)
+    escolhidos = np.empty(n, dtype=int)
+    escolhidos[0], escolhidos[-1] = 0, total - 1
+    a = 0
+    for i in range(n - 2):
+        ini, fim = limites[i], max(limites[i + 1], limites[i] + 1)
+        prox_ini, prox_fim = fim, (limites[i + 2] if i + 2 < len(limites) else total)
+        prox_fim = max(prox_fim, prox_ini + 1)
+        mx, my = x[prox_ini:prox_fim].mean(), y[prox_ini:prox_fim].mean()
+        area = np.abs((x[a] - mx) * (y[ini:fim] - y[a]) - (x[a] - x[ini:fim]) * (my - y[a]))
+        a = ini + int(area.argmax())
+        escolhidos[i + 1] = a
+    return x[escolhidos], y[escolhidos]
+
+# --- GRADE DE DATAS ---
+# Eventos anteriores à grade se somam na primeira linha.
+def _linhas_grade(grade, datas):
+    i = np.searchsorted(grade, np.asarray(datas).astype(str), side="left")
+    return i, i < len(grade)
+
+def acumular(grade, datas, valores, colunas=None, largura=1):
+    # Saldo acumulado por data da grade (matriz datas x colunas)
+    i, ok = _linhas_grade(grade, datas)
+    j = np.zeros(len(i), dtype=int) if colunas is None else np.asarray(colunas)
+    m = np.zeros((len(grade), largura))
+    np.add.at(m, (i[ok], j[ok]), np.asarray(valores, dtype=float)[ok])
+    return m.cumsum(axis=0)
+
+def ultimo_observado(grade, datas, valores, colunas, largura):
+    # Última observação <= cada data da grade (forward fill); NaN antes da primeira.
+    # As observações devem vir ordenadas: dentro de um mesmo balde vale a última.
+    i, ok = _linhas_grade(grade, datas)
+    i, j, v = i[ok], np.asarray(colunas)[ok], np.asarray(valores, dtype=float)[ok]
+    chave = i * largura + j
+    _, ult = np.unique(chave[::-1], return_index=True)
+    sel = len(chave) - 1 - ult
+    m = np.full((len(grade), largura), np.nan)
+    m[i[sel], j[sel]] = v[sel]
+    linha = np.where(np.isnan(m), 0, np.arange(len(grade))[:, None])
+    np.maximum.accumulate(linha, axis=0, out=linha)
+    return m[linha, np.arange(largura)]
+
+def patrimonio_e_cota(qtd, precos, caixa, cotas):
+    # qtd, precos: datas x tickers; caixa, cotas: por data
+    pl = np.nansum(qtd * precos, axis=1) + caixa
+    cota = np.divide(pl, cotas, out=np.ones_like(pl), where=cotas > 0)
+    return pl, cota
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do app ficam na raiz do repositório (sem pacote)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import Banco  # noqa: E402
+import nucleo  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Banco novo, migrado e com CAIXA, como o app abre
+    db = Banco(str(tmp_path / "carteira.db"))
+    nucleo.preparar_banco(db)
+    yield db
+    db.fechar()
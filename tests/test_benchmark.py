@@ -0,0 +1,36 @@
+import pytest
+
+import benchmark
+import metricas
+
+# ==============================================================================
+# 📡 CDI EM CACHE
+# ==============================================================================
+
+
+@pytest.fixture
+def conn(db):
+    # 1% ao dia de 2024-01-01 (segunda) a 2024-01-05 (sexta)
+    with db.transacao() as c: benchmark.gravar(c, [(f"2024-01-0{d}", 1.0) for d in range(1, 6)])
+    return db.conexao()
+
+
+def test_retorno_dentro_do_cache(conn):
+    assert benchmark.retorno(conn, "2024-01-02", "2024-01-04") == pytest.approx(1.01 ** 2 - 1)
+    # Fim de semana depois da sexta ainda é coberto (a taxa de sexta rende até segunda)
+    assert benchmark.retorno(conn, "2024-01-01", "2024-01-08") == pytest.approx(1.01 ** 5 - 1)
+
+
+def test_retorno_alem_do_cache_e_none(conn):
+    assert benchmark.retorno(conn, "2024-01-01", "2024-01-31") is None
+    assert metricas.retorno_livre_cdi(conn, "2024-01-01", "2024-01-31") == pytest.approx(
+        metricas.retorno_livre_constante(conn, "2024-01-01", "2024-01-31"))
+
+
+def test_comparativo_marca_datas_descobertas(db, conn):
+    with db.transacao() as c:
+        c.executemany("INSERT INTO historico_cota (Data, Valor_Cota) VALUES (?, 1.0)", [("2024-01-03",), ("2024-01-08",), ("2024-01-09",)])
+    fatores = {d: f for d, _, f in benchmark.comparativo(conn)}
+    assert fatores["2024-01-03"] == pytest.approx(1.01 ** 2)
+    assert fatores["2024-01-08"] == pytest.approx(1.01 ** 5)
+    assert fatores["2024-01-09"] is None
@@ -0,0 +1,42 @@
+import cProfile
+import threading
+
+import pytest
+
+import diagnostico
+
+# ==============================================================================
+# ⏱️ cPROFILE COM AS THREADS DO AGENDADOR
+# ==============================================================================
+
+
+def _na_thread(func):
+    saida = []
+    t = threading.Thread(target=lambda: saida.append(func()))
+    t.start()
+    t.join()
+    return saida[0]
+
+
+@pytest.fixture
+def perfil(tmp_path):
+    assert diagnostico.iniciar_perfil()
+    yield
+    assert "function calls" in diagnostico.parar_perfil(str(tmp_path / "perfil.prof"))
+    assert not diagnostico.perfilando()
+
+
+@pytest.mark.parametrize("um_perfil", [False, True])
+def test_chamada_medida_com_o_perfil_ligado(perfil, monkeypatch, um_perfil):
+    monkeypatch.setattr(diagnostico, "UM_PERFIL", um_perfil)
+    assert _na_thread(lambda: diagnostico.medido("teste.perfil", sum)([1, 2, 3])) == 6
+
+
+def test_outro_perfilador_ativo_fica_so_no_tempo(perfil, monkeypatch):
+    # Como no 3.12+ sem UM_PERFIL: o segundo Profile recusa enable()
+    class Ocupado(cProfile.Profile):
+        def enable(self, *args, **kwargs): raise ValueError("Another profiling tool is already active")
+    monkeypatch.setattr(diagnostico, "UM_PERFIL", False)
+    monkeypatch.setattr(diagnostico.cProfile, "Profile", Ocupado)
+    assert _na_thread(lambda: diagnostico.medido("teste.ocupado", sum)([1, 2])) == 3
+    assert any(nome == "teste.ocupado" for nome, *_ in diagnostico.resumo()[0])
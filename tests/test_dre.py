@@ -0,0 +1,44 @@
+import pytest
+
+import dre
+import nucleo
+
+# ==============================================================================
+# 📉 APURAÇÃO (DRE)
+# ==============================================================================
+# Compra 100 PETR4 a 10 (taxa 1) em janeiro, fecha janeiro a 12; vende 50 a 13
+# (taxa 1) em fevereiro e fecha fevereiro a 11.
+
+
+@pytest.fixture
+def conn(db):
+    with db.transacao() as c:
+        nucleo.registrar_movimento(c, "2024-01-02", "Ana", "Aporte", 10_000)
+        nucleo.executar_ordem(c, "2024-01-10", "COMPRA", "PETR4", 100, 10, 1)
+        nucleo.marcar_a_mercado(c, [("PETR4", 12.0)], "2024-01-31")
+        nucleo.executar_ordem(c, "2024-02-15", "VENDA", "PETR4", 50, 13, 1)
+        nucleo.marcar_a_mercado(c, [("PETR4", 11.0)], "2024-02-29")
+    return db.conexao()
+
+
+def _valores(linha):
+    return linha[3:8]
+
+
+def test_totais_por_mes(conn):
+    jan, fev = (dre.apurar(conn, ini, fim) for ini, fim in dre.meses(conn, "2024-01-01", "2024-02-29"))
+    assert [l[2] for l in jan] == ["PETR4", "TOTAL"]
+    # Saldo Inicial, Aplicações, Resgates, Saldo Final, Resultado
+    assert _valores(jan[-1]) == pytest.approx((0, 1001, 0, 1200, 199))
+    assert _valores(fev[-1]) == pytest.approx((1200, 0, 649, 550, -1))
+    assert jan[-1][8] == pytest.approx(199 / 1001 * 100)
+
+
+def test_periodo_inteiro_soma_os_meses(conn):
+    total = dre.apurar(conn, "2024-01-01", "2024-02-29")[-1]
+    assert _valores(total) == pytest.approx((0, 1001, 649, 550, 198))
+
+
+def test_periodo_sem_movimento(conn):
+    # Só carrega o saldo: sem aplicações nem resgates, resultado pela variação do preço
+    assert _valores(dre.apurar(conn, "2024-03-01", "2024-03-31")[-1]) == pytest.approx((550, 0, 0, 550, 0))
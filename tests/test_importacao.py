@@ -0,0 +1,29 @@
+import pytest
+
+import importacao
+
+# ==============================================================================
+# 🔢 NÚMEROS pt-BR
+# ==============================================================================
+
+
+@pytest.mark.parametrize("texto, valor", [
+    ("1.234", 1234.0), ("1.234.567", 1234567.0), ("1.234,56", 1234.56), ("R$ 1.234,56", 1234.56),
+    ("1234,56", 1234.56), ("-3,5", -3.5), ("10.5", 10.5), ("0.123", 0.123), ("33.12", 33.12), ("12", 12.0), (7, 7.0),
+])
+def test_numero(texto, valor):
+    assert importacao.numero(texto) == pytest.approx(valor)
+
+
+@pytest.mark.parametrize("texto", ["1,234.56", "1.23.456", "1,2,3", "1.234,5.6", "abc", ""])
+def test_numero_ambiguo_recusado(texto):
+    with pytest.raises(ValueError):
+        importacao.numero(texto)
+
+
+def test_linha_com_formato_misto_vai_para_os_erros(tmp_path):
+    arquivo = tmp_path / "trades.csv"
+    arquivo.write_text("Data;Ticker;Lado;Qtd;Preco\n2024-01-02;PETR4;COMPRA;1.000;30,50\n2024-01-03;VALE3;COMPRA;10;1,234.56\n", encoding="utf-8")
+    with pytest.raises(importacao.ErroImportacao) as erro:
+        importacao.validar_trades(str(arquivo))
+    assert erro.value.erros == ["linha 3: número inválido '1,234.56'"]
@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+import metricas
+import migracoes
+import nucleo
+import posicoes
+from banco import Banco
+
+# ==============================================================================
+# 🧬 MIGRAÇÕES (banco da versão original até a atual)
+# ==============================================================================
+# O banco "baseline" é o que o app criava antes do versionamento: três tabelas,
+# historico_cota sem chave (com data repetida) e user_version = 0.
+HOJE = nucleo.hoje()
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.executescript('''
+        CREATE TABLE cotistas_mov (ID INTEGER PRIMARY KEY AUTOINCREMENT, Data TEXT, Cotista TEXT, Tipo TEXT,
+                                   Valor REAL, Cota_Ref REAL, Qtd_Cotas REAL, Ticker_Ref TEXT);
+        CREATE TABLE ativos (Ticker TEXT PRIMARY KEY, Qtd REAL, Preco_Medio REAL, Preco_Atual REAL, Stop_Loss REAL, Tipo TEXT);
+        CREATE TABLE historico_cota (Data TEXT, Valor_Cota REAL);
+    ''')
+    conn.executemany("INSERT INTO cotistas_mov (Data, Cotista, Tipo, Valor, Cota_Ref, Qtd_Cotas, Ticker_Ref) VALUES (?,?,?,?,?,?,'CAIXA')", [
+        ("2024-01-02", "Ana", "Aporte (+)", 1000.0, 1.0, 1000.0),
+        ("2024-01-10", "Bia", "Aporte (+)", 550.0, 1.1, 500.0),
+        ("2024-02-01", "Ana", "Saque (-)", 240.0, 1.2, -200.0),
+    ])
+    conn.executemany("INSERT INTO ativos VALUES (?,?,?,?,?,?)", [
+        ("CAIXA", 110.0, 1, 1, 0, "Caixa"), ("PETR4", 30.0, 30.0, 35.0, 0, "Ação"), ("VALE3", 0.0, 0.0, 60.0, 0, "Ação")])
+    conn.executemany("INSERT INTO historico_cota VALUES (?, ?)",
+                     [("2024-01-02", 1.0), ("2024-01-10", 1.05), ("2024-01-10", 1.1), ("2024-02-01", 1.2)])
+    conn.commit()
+    conn.close()
+    db = Banco(caminho)
+    yield db
+    db.fechar()
+
+
+def test_baseline_ate_a_versao_atual(baseline):
+    assert migracoes.migrar(baseline) == (0, migracoes.VERSAO_ATUAL)
+    assert migracoes.versao(baseline) == migracoes.VERSAO_ATUAL
+    c = baseline.conexao()
+    # m004: uma linha por data, a última gravada
+    assert c.execute("SELECT Data, Valor_Cota FROM historico_cota ORDER BY Data").fetchall() == [
+        ("2024-01-02", 1.0), ("2024-01-10", 1.1), ("2024-02-01", 1.2)]
+    # m002: posição dos cotistas pelo livro
+    assert {r[0]: r[1:] for r in c.execute("SELECT Cotista, Qtd, PM FROM cotista_posicao")} == {"Ana": (800.0, 1.0), "Bia": (500.0, 1.1)}
+    # m003: carteira vira abertura; o CAIXA herdado é o que os movimentos (1000 + 550 - 240) não explicam
+    assert c.execute("SELECT Ticker, Lado, Qtd, Preco FROM trades ORDER BY ID").fetchall() == [
+        ("PETR4", "ABERTURA", 30.0, 30.0), ("CAIXA", "ABERTURA", 110.0 - 1310.0, 1.0)]
+    assert posicoes.posicao_em(c, HOJE)["CAIXA"][0] == pytest.approx(110.0)
+    # m006, m009, m011
+    assert c.execute("SELECT Ticker, Preco FROM precos_historico ORDER BY Ticker").fetchall() == [("PETR4", 35.0), ("VALE3", 60.0)]
+    assert c.execute("SELECT Ticker, Qtd, Compras, Vendas FROM fluxo_acumulado").fetchall() == [("PETR4", 30.0, 900.0, 0.0)]
+    assert c.execute("SELECT Valor FROM regras_exposicao WHERE Regra_ID = 0").fetchone()[0] == pytest.approx(110.0 + 30 * 35.0)
+    # m012: snapshots anteriores à abertura só têm o CAIXA dos movimentos
+    assert c.execute("SELECT Data, Ticker, Qtd FROM posicao_historica ORDER BY Data").fetchall() == [
+        ("2024-01-02", "CAIXA", 1000.0), ("2024-01-10", "CAIXA", 1550.0), ("2024-02-01", "CAIXA", 1310.0)]
+    # RECONSTRUCOES: métricas sobre o histórico migrado (o último snapshot fica fora do acumulado)
+    assert c.execute("SELECT N, Ultima_Data FROM metricas_estado WHERE Nome = 'cota'").fetchone() == (1, "2024-02-01")
+    assert metricas.resumo(c)["retorno_total"] == pytest.approx(0.2)
+
+
+def test_migrar_de_novo_nao_faz_nada(baseline):
+    migracoes.migrar(baseline)
+    n = baseline.conexao().execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    assert migracoes.migrar(baseline) == (migracoes.VERSAO_ATUAL, migracoes.VERSAO_ATUAL)
+    assert baseline.conexao().execute("SELECT COUNT(*) FROM trades").fetchone()[0] == n
+
+
+def test_banco_mais_novo_e_recusado(baseline):
+    baseline.executar(f"PRAGMA user_version = {migracoes.VERSAO_ATUAL + 1}")
+    with pytest.raises(RuntimeError):
+        migracoes.migrar(baseline)
+
+
+def _tabela(c, sql):
+    return [tuple(round(v, 6) if isinstance(v, float) else v for v in r) for r in c.execute(sql)]
+
+
+@pytest.mark.parametrize("versao, tabela, ordem", [
+    (1, "cotista_posicao", "Cotista"),
+    (8, "fluxo_acumulado", "Ticker, Data"),
+    (11, "posicao_historica", "Data, Ticker"),
+])
+def test_passo_congelado_reproduz_o_app(db, versao, tabela, ordem):
+    # Os passos não usam o código dos módulos, mas num banco gravado pelo app têm de dar o mesmo resultado
+    with db.transacao() as c:
+        nucleo.aplicar_lote(c, movimentos=[(1, "2024-01-02", "Ana", "Aporte (+)", 10_000, "CAIXA"),
+                                           (2, "2024-02-05", "Bia", "Aporte (+)", 5_000, "CAIXA")],
+                            trades=[(3, "2024-01-03", "PETR4", "COMPRA", 100, 30, 5), (4, "2024-01-20", "PETR4", "VENDA", 40, 33, 2),
+                                    (5, "2024-02-06", "PETR4", "COMPRA", 50, 31, 1), (6, "2024-02-06", "VALE3", "COMPRA", 20, 60, 0)])
+        nucleo.marcar_a_mercado(c, [("PETR4", 34.0), ("VALE3", 58.0)], "2024-02-07")
+        nucleo.registrar_cotas(c, {"2024-02-07": nucleo.valor_cota(c)})
+    c = db.conexao()
+    esperado = _tabela(c, f"SELECT * FROM {tabela} ORDER BY {ordem}")
+    with db.transacao() as t: t.execute(f"DELETE FROM {tabela}")
+    db.executar(f"PRAGMA user_version = {versao}")
+    with db.transacao() as t: migracoes.MIGRACOES[versao](t)
+    assert _tabela(c, f"SELECT * FROM {tabela} ORDER BY {ordem}") == esperado
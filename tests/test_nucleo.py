@@ -0,0 +1,56 @@
+import pytest
+
+import nucleo
+import posicoes
+
+# ==============================================================================
+# ⏪ ORDENS RETROATIVAS
+# ==============================================================================
+# Uma ordem com data passada é conferida contra a posição daquela data e de
+# todas as seguintes, não só contra a carteira de hoje.
+
+
+@pytest.fixture
+def petr4(db):
+    with db.transacao() as c:
+        nucleo.registrar_movimento(c, "2024-01-02", "Ana", "Aporte", 10_000)
+        nucleo.executar_ordem(c, "2024-01-03", "COMPRA", "PETR4", 100, 30)
+        nucleo.executar_ordem(c, "2024-02-10", "VENDA", "PETR4", 40, 32)
+    return db
+
+
+def test_venda_antes_da_compra_e_recusada(petr4):
+    with pytest.raises(nucleo.ErroOperacao, match="Sem Ativos"):
+        with petr4.transacao() as c: nucleo.executar_ordem(c, "2024-01-02", "VENDA", "PETR4", 60, 30)
+    c = petr4.conexao()
+    assert c.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 2
+    assert posicoes.posicao_em(c, "2024-03-01")["PETR4"][0] == 60
+
+
+def test_venda_retroativa_que_esvazia_venda_posterior_e_recusada(petr4):
+    # Hoje há 160 e em 2024-01-20 há 100, mas a venda de 40 em 2024-02-10 ficaria descoberta
+    with petr4.transacao() as c: nucleo.executar_ordem(c, "2024-03-01", "COMPRA", "PETR4", 100, 30)
+    with pytest.raises(nucleo.ErroOperacao, match="2024-02-10"):
+        with petr4.transacao() as c: nucleo.executar_ordem(c, "2024-01-20", "VENDA", "PETR4", 70, 31)
+
+
+def test_venda_retroativa_coberta_e_aceita(petr4):
+    with petr4.transacao() as c: nucleo.executar_ordem(c, "2024-01-20", "VENDA", "PETR4", 60, 31)
+    c = petr4.conexao()
+    assert posicoes.posicao_em(c, "2024-01-20")["PETR4"][0] == 40
+    assert c.execute("SELECT Qtd FROM posicao_historica WHERE Data = '2024-01-20' AND Ticker = 'PETR4'").fetchone()[0] == 40
+    assert c.execute("SELECT Qtd FROM ativos WHERE Ticker = 'PETR4'").fetchone() is None
+
+
+def test_compra_retroativa_sem_caixa_na_data_e_recusada(petr4):
+    # Hoje há caixa, mas antes do aporte de 2024-01-02 não havia
+    with pytest.raises(nucleo.ErroOperacao, match="Sem Caixa"):
+        with petr4.transacao() as c: nucleo.executar_ordem(c, "2024-01-01", "COMPRA", "VALE3", 10, 60)
+
+
+def test_boleta_aponta_a_linha_retroativa(petr4):
+    ordens = [(1, "2024-03-01", "VALE3", "COMPRA", 10, 50, 0.0), (2, "2024-01-02", "PETR4", "VENDA", 60, 30, 0.0)]
+    c = petr4.conexao()
+    assert "Sem Ativos" in nucleo.projetar_boleta(c, ordens)[2][2]
+    with pytest.raises(nucleo.ErroOperacao, match="linha 2"):
+        with petr4.transacao() as c: nucleo.aplicar_lote(c, trades=ordens)
@@ -0,0 +1,34 @@
+import pytest
+
+from paginacao import Paginador
+
+# ==============================================================================
+# 📄 PAGINAÇÃO POR CHAVE
+# ==============================================================================
+
+
+@pytest.fixture
+def trades(db):
+    with db.transacao() as c:
+        c.executemany("INSERT INTO trades (Data, Ticker, Lado, Qtd, Preco, Taxas) VALUES (?, ?, 'COMPRA', 1, 10, 0)",
+                      [(f"2024-01-{i % 28 + 1:02d}", None if i % 7 == 0 else f"T{i % 5}") for i in range(53)])
+    return db
+
+
+def _todas(pag):
+    linhas = pag.primeira()
+    while not pag.fim: linhas += pag.proxima()
+    return [r[0] for r in linhas]
+
+
+@pytest.mark.parametrize("ordem", ["ID", "Data", "Ticker"])
+@pytest.mark.parametrize("desc", [False, True])
+def test_paginas_seguem_a_ordem_completa(trades, ordem, desc):
+    direcao = " DESC" if desc else ""
+    esperado = [r[0] for r in trades.consultar(f"SELECT ID FROM trades ORDER BY {ordem}{direcao}, ID{direcao}")]
+    assert _todas(Paginador(trades, "trades", ordem=ordem, desc=desc, tamanho=4)) == esperado
+
+
+def test_ordenacao_sem_indice_recusada(trades):
+    with pytest.raises(ValueError):
+        Paginador(trades, "trades", ordem="Preco")
@@ -0,0 +1,25 @@
+import bench
+import migracoes
+
+# ==============================================================================
+# 🔎 PLANOS DE CONSULTA
+# ==============================================================================
+# As consultas críticas (migracoes.CONSULTAS_INDEXADAS) precisam usar o índice
+# esperado e não ordenar em memória, no banco recém-migrado e depois que as
+# tabelas crescem (as estatísticas do planejador mudam com o volume).
+
+
+def _sem_indice(falhas):
+    return "\n".join(f"{sql}\n    {detalhes}" for sql, detalhes in falhas)
+
+
+def test_planos_no_banco_vazio(db):
+    falhas = migracoes.verificar_planos(db)
+    assert not falhas, _sem_indice(falhas)
+
+
+def test_planos_com_tabelas_cheias(db):
+    bench.popular_tabelas(db, 20_000)
+    db.conexao().execute("ANALYZE")
+    falhas = migracoes.verificar_planos(db)
+    assert not falhas, _sem_indice(falhas)
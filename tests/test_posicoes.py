@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import nucleo
+import posicoes
+import recalculo
+
+# ==============================================================================
+# 📒 REPLAY E PREÇO MÉDIO
+# ==============================================================================
+
+
+def test_regra_do_preco_medio():
+    q, pm = 0.0, 0.0
+    for delta, preco, esperado in [(100, 10, (100, 10)), (100, 20, (200, 15)), (-50, 99, (150, 15)),
+                                   (-150, 99, (0, 0)), (10, 30, (10, 30))]:
+        q, pm = posicoes.aplicar_movimento(q, pm, delta, preco)
+        assert (q, pm) == pytest.approx(esperado)
+
+
+def test_replay_vetorizado_igual_ao_loop():
+    # Livro aleatório com zeragens, recompras e vendas parciais em sequência
+    rng = np.random.default_rng(7)
+    n = 3_000
+    df = pd.DataFrame({"Ticker": rng.choice(["A", "B", "C", "D"], n), "Data": np.sort(rng.integers(0, 500, n)).astype(str),
+                       "Ordem": np.arange(n), "Delta": rng.integers(-60, 100, n).astype(float), "Preco": rng.uniform(5, 50, n)})
+    hist = recalculo.replay_posicoes(df, "Ticker")
+    estado = {}
+    for ticker, _, _, delta, preco, qtd, pm in hist.itertuples(index=False):
+        estado[ticker] = posicoes.aplicar_movimento(*estado.get(ticker, (0.0, 0.0)), delta, preco)
+        assert (qtd, pm) == pytest.approx(estado[ticker], rel=1e-9, abs=1e-6)
+
+
+def test_posicao_em_parte_do_checkpoint(db, monkeypatch):
+    monkeypatch.setattr(posicoes, "INTERVALO_CHECKPOINT", 5)
+    with db.transacao() as c:
+        nucleo.registrar_movimento(c, "2024-01-02", "Ana", "Aporte", 100_000)
+        for i in range(1, 13): nucleo.executar_ordem(c, f"2024-01-{i + 2:02d}", "COMPRA", "PETR4", 10, 10 + i)
+    c = db.conexao()
+    assert c.execute("SELECT COUNT(DISTINCT Data) FROM posicao_checkpoint").fetchone()[0] >= 1
+    qtd, pm = posicoes.posicao_em(c, "2024-01-14")["PETR4"]
+    assert qtd == 120 and pm == pytest.approx(sum(10 + i for i in range(1, 13)) / 12)
+    assert posicoes.posicao_em(c, "2024-01-14")["CAIXA"][0] == pytest.approx(100_000 - 10 * sum(10 + i for i in range(1, 13)))
+
+
+def test_matrizes_do_checkpoint_igual_a_leitura_completa(db, monkeypatch):
+    monkeypatch.setattr(posicoes, "INTERVALO_CHECKPOINT", 4)
+    with db.transacao() as c:
+        nucleo.registrar_movimento(c, "2024-01-02", "Ana", "Aporte", 100_000)
+        for i in range(1, 13):
+            nucleo.executar_ordem(c, f"2024-01-{i + 2:02d}", "COMPRA" if i % 3 else "VENDA", "PETR4" if i % 2 else "VALE3", 10, 10 + i)
+            nucleo.registrar_precos(c, [(f"2024-01-{i + 2:02d}", "PETR4", 20.0 + i)])
+    c = db.conexao()
+    ini, fim = "2024-01-10", "2024-01-14"
+    base = c.execute("SELECT MAX(Data) FROM posicao_checkpoint WHERE Data <= ?", (ini,)).fetchone()[0]
+    assert base is not None
+    datas = ["2024-01-10", "2024-01-12", "2024-01-14"]
+    completa, parcial = recalculo.matrizes(c, ini, fim, datas), recalculo.matrizes(c, ini, fim, datas, checkpoint=True)
+    assert list(parcial[0]) == list(completa[0])
+    assert recalculo.serie_cota(c, m=parcial)["Valor_Cota"].tolist() == pytest.approx(recalculo.serie_cota(c, m=completa)["Valor_Cota"].tolist())
+    assert recalculo.posicoes_nas_datas(c, datas, parcial) == pytest.approx(recalculo.posicoes_nas_datas(c, datas, completa))
+    assert (parcial[6]["Data"] >= base).all()
+
+
+# ==============================================================================
+# ⏪ SNAPSHOTS RETROATIVOS
+# ==============================================================================
+@pytest.fixture
+def carteira(db):
+    with db.transacao() as c:
+        nucleo.registrar_movimento(c, "2024-01-02", "Ana", "Aporte", 10_000)
+        nucleo.executar_ordem(c, "2024-01-03", "COMPRA", "PETR4", 100, 30)
+        nucleo.marcar_a_mercado(c, [("PETR4", 33.0)], "2024-02-01")
+        nucleo.registrar_cotas(c, {"2024-02-01": nucleo.valor_cota(c)})
+        nucleo.registrar_movimento(c, "2024-03-01", "Bia", "Aporte", 5_000)
+    return db
+
+
+def _confere_historico(c):
+    serie = recalculo.serie_cota(c)
+    esperado = dict(zip(serie["Data"], serie["Valor_Cota"]))
+    for data, cota in c.execute("SELECT Data, Valor_Cota FROM historico_cota"):
+        assert cota == pytest.approx(esperado[data]), data
+        for ticker, qtd in c.execute("SELECT Ticker, Qtd FROM posicao_historica WHERE Data = ?", (data,)):
+            assert qtd == pytest.approx(posicoes.posicao_em(c, data)[ticker][0]), (data, ticker)
+
+
+@pytest.mark.parametrize("evento", ["movimento", "trade"])
+def test_evento_retroativo_regrava_snapshots_seguintes(carteira, evento):
+    with carteira.transacao() as c:
+        if evento == "movimento": nucleo.registrar_movimento(c, "2024-01-15", "Caio", "Aporte", 3_000)
+        else: nucleo.executar_ordem(c, "2024-01-15", "COMPRA", "VALE3", 20, 60)
+    c = carteira.conexao()
+    assert "2024-01-15" in {r[0] for r in c.execute("SELECT Data FROM historico_cota")}
+    _confere_historico(c)
+    assert not posicoes.verificar_posicoes_cotistas(c)
+
+
+def test_aporte_retroativo_entra_pela_cota_do_dia(carteira):
+    c = carteira.conexao()
+    cota_dia = c.execute("SELECT Valor_Cota FROM historico_cota WHERE Data = '2024-02-01'").fetchone()[0]
+    with carteira.transacao() as t: cota, qtd = nucleo.registrar_movimento(t, "2024-02-01", "Caio", "Aporte", 3_300)
+    assert cota == pytest.approx(cota_dia) and qtd == pytest.approx(3_300 / cota_dia)
+    # Emitido pela cota do dia, o aporte não muda o valor da cota daquela data
+    assert c.execute("SELECT Valor_Cota FROM historico_cota WHERE Data = '2024-02-01'").fetchone()[0] == pytest.approx(cota_dia)
+    _confere_historico(c)
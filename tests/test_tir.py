@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+import nucleo
+import tir
+
+# ==============================================================================
+# 📐 TIR (XIRR)
+# ==============================================================================
+
+
+def test_xirr_lote_varios_grupos():
+    # grupo 0: 10% em um ano; 1: dobra em dois anos; 2: taxa alta (bisseção); 3: só aporte (sem TIR)
+    grupo = [0, 0, 1, 1, 2, 2, 3]
+    dias = [0, 365, 0, 730, 0, 365, 0]
+    valores = [-1000, 1100, -500, 1000, -1, 500, -100]
+    r = tir.xirr_lote(grupo, dias, valores, 4)
+    assert r[0] == pytest.approx(0.10, rel=1e-8)
+    assert r[1] == pytest.approx(math.sqrt(2) - 1, rel=1e-8)
+    assert r[2] == pytest.approx(499, rel=1e-6)
+    assert math.isnan(r[3])
+
+
+def test_xirr_com_fluxos_intermediarios():
+    # Aporte, saque parcial e resgate final: a taxa zera o valor presente
+    dias, valores = [0, 100, 250, 400], [-1000, -500, 300, 1400]
+    r = tir.xirr_lote([0] * 4, dias, valores, 1)[0]
+    assert sum(v * (1 + r) ** (-d / 365) for d, v in zip(dias, valores)) == pytest.approx(0, abs=1e-6)
+
+
+def test_tir_da_carteira_e_do_ativo(db):
+    with db.transacao() as c:
+        nucleo.registrar_movimento(c, "2023-01-01", "Ana", "Aporte", 1_000)
+        nucleo.executar_ordem(c, "2023-01-01", "COMPRA", "PETR4", 10, 100)
+        nucleo.marcar_a_mercado(c, [("PETR4", 110.0)], "2024-01-01")
+    tirs = tir.calcular_tirs(db.conexao(), hoje="2024-01-01")
+    assert tirs["carteira"] == pytest.approx(0.10, rel=1e-8)
+    assert tirs["ativos"]["PETR4"] == pytest.approx(0.10, rel=1e-8)
+    assert tirs["cotistas"]["Ana"] == pytest.approx(0.10, rel=1e-8)
@@ -0,0 +1,140 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import nucleo
+
+# ==============================================================================
+# 📐 TIR (XIRR) EM LOTE
+# ==============================================================================
+# sum_i v_i * (1 + r)^(-t_i) = 0 para todos os grupos de uma vez: Newton
+# vetorizado e bisseção para os que não convergem (sem raiz: NaN). Compra/aporte
+# negativo, venda/saque positivo, posição atual como resgate hoje.
+DIAS_ANO = 365.0
+MAX_NEWTON = 50
+MAX_BISSECAO = 100
+TOLERANCIA = 1e-10
+MIN_TAXA, MAX_TAXA = -0.9999, 1000.0
+
+
+def _somas(r, grupo, t, v, n):
+    base = 1.0 + r[grupo]
+    termo = v * base ** (-t)
+    return np.bincount(grupo, termo, n), np.bincount(grupo, -t * termo / base, n)
+
+def xirr_lote(grupo, dias, valores, n, chute=0.1):
+    # grupo: código 0..n-1 por fluxo; dias: dias desde o primeiro fluxo do grupo
+    grupo = np.asarray(grupo, dtype=np.int64)
+    t = np.asarray(dias, dtype=float) / DIAS_ANO
+    v = np.asarray(valores, dtype=float)
+    escala = np.bincount(grupo, np.abs(v), n)
+    positivo = np.bincount(grupo, v > 0, n) > 0
+    negativo = np.bincount(grupo, v < 0, n) > 0
+    # Precisa de entrada, saída e de tempo entre os fluxos
+    valido = positivo & negativo & (np.bincount(grupo, t > 0, n) > 0)
+
+    r = np.full(n, chute)
+    pronto = ~valido
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(MAX_NEWTON):
+            if pronto.all(): break
+            f, df = _somas(r, grupo, t, v, n)
+            passo = np.divide(f, df, out=np.zeros(n), where=(df != 0) & ~pronto)
+            r = np.where(pronto, r, r - passo)
+            fora = ~pronto & (~np.isfinite(r) | (r <= -1.0))
+            r[fora] = chute
+            pronto |= ~fora & (np.abs(passo) <= TOLERANCIA * (1.0 + np.abs(r)))
+
+        f, _ = _somas(np.where(pronto & valido, r, 0.0), grupo, t, v, n)
+        ok = pronto & valido & (np.abs(f) <= 1e-7 * np.maximum(escala, 1.0))
+        falhos = valido & ~ok
+        r[~valido] = np.nan
+        if falhos.any(): r[falhos] = _bissecao(falhos, grupo, t, v, n)
+    return r
+
+def _bissecao(falhos, grupo, t, v, n):
+    # Só os fluxos dos grupos que falharam no Newton
+    sel = falhos[grupo]
+    codigos, g = np.unique(grupo[sel], return_inverse=True)
+    t, v, m = t[sel], v[sel], len(codigos)
+    def f(x): return np.bincount(g, v * np.exp(-x[g] * t), m)
+    lo, hi = np.full(m, np.log1p(MIN_TAXA)), np.full(m, np.log1p(MAX_TAXA))
+    f_lo = f(lo)
+    sem_raiz = np.sign(f_lo) == np.sign(f(hi))
+    for _ in range(MAX_BISSECAO):
+        meio = (lo + hi) / 2
+        f_meio = f(meio)
+        mesmo = np.sign(f_meio) == np.sign(f_lo)
+        lo, f_lo = np.where(mesmo, meio, lo), np.where(mesmo, f_meio, f_lo)
+        hi = np.where(mesmo, hi, meio)
+    return np.where(sem_raiz, np.nan, np.expm1((lo + hi) / 2))
+
+# --- FLUXOS ---
+def _lote(nomes, grupo, datas, valores):
+    # Agrupa, converte datas em dias desde o primeiro fluxo do grupo e resolve
+    nomes = list(nomes)
+    if not nomes: return {}
+    dia = pd.to_datetime(pd.Series(datas)).to_numpy().astype("datetime64[D]").astype(np.int64)
+    primeiro = np.full(len(nomes), np.iinfo(np.int64).max)
+    np.minimum.at(primeiro, grupo, dia)
+    taxas = xirr_lote(grupo, dia - primeiro[grupo], valores, len(nomes))
+    return dict(zip(nomes, taxas.tolist()))
+
+def _concatenar(partes):
+    partes = [p for p in partes if len(p)]
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=["Nome", "Data", "Valor"])
+
+def fluxos_ativos(conn, hoje):
+    trades = pd.read_sql_query("SELECT Data, Ticker, Lado, Qtd, Preco, Taxas FROM trades WHERE Ticker != 'CAIXA'", conn)
+    venda = trades["Lado"].str.upper() == "VENDA"
+    bruto = trades["Qtd"] * trades["Preco"]
+    taxas = trades["Taxas"].fillna(0.0)
+    fluxos = pd.DataFrame({"Nome": trades["Ticker"], "Data": trades["Data"],
+                           "Valor": np.where(venda, bruto - taxas, -bruto - taxas)})
+    posicao = pd.read_sql_query("SELECT Ticker AS Nome, ? AS Data, Qtd * Preco_Atual AS Valor FROM ativos "
+                                "WHERE Ticker != 'CAIXA' AND Qtd > 0", conn, params=(hoje,))
+    return _concatenar([fluxos, posicao])
+
+def fluxos_movimentos(conn):
+    mov = pd.read_sql_query("SELECT Cotista AS Nome, Data, Tipo, Valor FROM cotistas_mov", conn)
+    aporte = mov["Tipo"].fillna("").str.contains("Aporte")
+    return mov.assign(Valor=np.where(aporte, -mov["Valor"].fillna(0.0), mov["Valor"].fillna(0.0)))[["Nome", "Data", "Valor"]]
+
+def fluxos_cotistas(conn, hoje, cota, movimentos=None):
+    movimentos = fluxos_movimentos(conn) if movimentos is None else movimentos
+    posicao = pd.read_sql_query("SELECT Cotista AS Nome, ? AS Data, Qtd * ? AS Valor FROM cotista_posicao WHERE Qtd > 0",
+                                conn, params=(hoje, cota))
+    return _concatenar([movimentos, posicao])
+
+def _resolver(fluxos):
+    codigos, nomes = pd.factorize(fluxos["Nome"])
+    return _lote(nomes, codigos, fluxos["Data"], fluxos["Valor"].to_numpy(dtype=float))
+
+def calcular_tirs(conn, hoje=None):
+    hoje = hoje or nucleo.hoje()
+    cota = nucleo.resumo_cota(conn)
+    pl = cota["pl"]
+    movimentos = fluxos_movimentos(conn)
+    # Carteira: todos os aportes/saques + PL de hoje
+    carteira = _concatenar([movimentos.assign(Nome=""), pd.DataFrame({"Nome": [""], "Data": [hoje], "Valor": [pl]})])
+    return {
+        "ativos": _resolver(fluxos_ativos(conn, hoje)),
+        "cotistas": _resolver(fluxos_cotistas(conn, hoje, cota["cota"], movimentos)),
+        "carteira": _resolver(carteira).get("", float("nan")),
+    }
+
+# --- CACHE (por banco, chaveado pela versão do ledger/preços e pela data) ---
+_cache = {}
+_lock = threading.Lock()
+
+def tirs(db):
+    conn = db.conexao()
+    chave = (nucleo.versoes(conn), nucleo.hoje())
+    with _lock:
+        guardado = _cache.get(db.caminho)
+    if guardado and guardado[0] == chave: return guardado[1]
+    resultado = calcular_tirs(conn, chave[1])
+    with _lock:
+        _cache[db.caminho] = (chave, resultado)
+    return resultado